@@ -0,0 +1,113 @@
+"""
+Import-time benchmark: how long a fresh interpreter takes to import the
+package's entry modules, and what loading each provider SDK costs on first use.
+
+    python benchmarks/bench_import.py                 # 7 runs per target
+    python benchmarks/bench_import.py --runs 15 --out /tmp/import.json
+
+Every measurement is a new `python -c ...` process (nothing is warm). Per target
+it reports median/min/max seconds, the number of modules loaded and which
+provider SDKs ended up in `sys.modules`. Results go to
+`benchmarks/results/import-<timestamp>.json`; compare runs with `compare.py`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+MODULES = ["c4modeler.llm", "c4modeler.graph", "c4modeler.evaluation", "c4modeler.experiments", "c4modeler.pipeline"]
+# One model per provider: cost of the first `get_model_class` after `import c4modeler.pipeline`.
+PROVIDER_MODELS = {"google": "gemini-1.5-flash-latest", "openai": "gpt-4o", "deepseek": "deepseek-chat",
+                   "xai": "grok-3-latest", "fake": "fake:instant"}
+SDKS = ["langchain_google_genai", "langchain_openai", "langchain_deepseek", "langchain_xai"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+{setup}
+t1 = time.perf_counter()
+{body}
+t2 = time.perf_counter()
+print(json.dumps({{"setup_s": t1 - t0, "s": t2 - t1, "modules": len(sys.modules),
+                  "sdks": [m for m in {sdks!r} if m in sys.modules]}}))
+"""
+
+
+def _probe(setup: str, body: str) -> Dict[str, Any]:
+    code = _PROBE.format(setup=setup, body=body, sdks=SDKS)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT / "src"), os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _measure(scenario: str, params: Dict[str, Any], setup: str, body: str, runs: int) -> Dict[str, Any]:
+    samples = [_probe(setup, body) for _ in range(runs)]
+    ok = [s for s in samples if "error" not in s]
+    record: Dict[str, Any] = {"scenario": scenario, "params": params, "runs": runs}
+    if not ok:
+        return {**record, "error": samples[0]["error"]}
+    times = [s["s"] for s in ok]
+    return {
+        **record,
+        "import_s": {"median": round(statistics.median(times), 4), "min": round(min(times), 4), "max": round(max(times), 4)},
+        "modules_loaded": ok[-1]["modules"],
+        "provider_sdks_loaded": ok[-1]["sdks"],
+        "errors": len(samples) - len(ok),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Path:
+    parser = argparse.ArgumentParser(description="Import-time benchmark (fresh interpreter per sample).")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    for module in MODULES:
+        results.append(_measure("import", {"module": module}, "", f"import {module}", args.runs))
+    for provider, model in PROVIDER_MODELS.items():
+        results.append(_measure(
+            "first_use", {"provider": provider},
+            "import c4modeler.pipeline", f"from c4modeler.llm import get_model_class; get_model_class({model!r})",
+            args.runs,
+        ))
+    for r in results:
+        what = r["params"].get("module") or r["params"].get("provider")
+        if "error" in r:
+            print(f"{r['scenario']:<10} {what:<24} error: {r['error']}")
+        else:
+            print(f"{r['scenario']:<10} {what:<24} median={r['import_s']['median']:.3f}s  "
+                  f"modules={r['modules_loaded']}  sdks={','.join(r['provider_sdks_loaded']) or '-'}")
+
+    report = {
+        "benchmark": "import",
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {"runs": args.runs},
+        },
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"import-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {out}")
+    return out
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+End-to-end throughput benchmarks against the offline `fake:` models.
+
+Runs `generate_c4_for_brief`, `generate_c4_for_briefs_dir`,
+`run_all_experiments` and `run_full_evaluation` with a fixed simulated LLM
+latency and reports, per scenario:
+
+  - briefs/minute and p50/p95/p99 per-brief latency,
+  - simulated LLM time (from `fake_llm.fake_usage`) and orchestration overhead
+    (wall time minus simulated LLM time),
+  - peak RSS of the process that ran the scenario,
+
+sweeping the number of containers and `collab_rounds`. Every scenario runs in
+a fresh process so peak RSS and the compiled-graph cache are per scenario.
+
+    python benchmarks/bench_pipeline.py                      # full sweep
+    python benchmarks/bench_pipeline.py --quick              # smoke run
+    python benchmarks/bench_pipeline.py --only brief,evaluation --latency 0.1
+    python benchmarks/compare.py benchmarks/results/old.json benchmarks/results/new.json
+
+Results go to `benchmarks/results/pipeline-<timestamp>.json` (or `--out`).
+`run_full_evaluation` compiles diagrams with PlantUML, so without a local
+plantuml.jar/Java that metric reports an error and the scenario measures the rest.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+BRIEFS_DIR = ROOT / "data" / "briefs"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SCENARIOS = ("brief", "briefs_dir", "experiments", "evaluation")
+
+
+# =======
+# Helpers
+# =======
+
+def _import_package() -> None:
+    if str(ROOT / "src") not in sys.path:
+        sys.path.insert(0, str(ROOT / "src"))
+
+
+def fake_model(latency: float, n_containers: int) -> str:
+    """A `fake:` model name with a fixed (zero-variance, error-free) latency."""
+    return f"fake:fast?latency={latency}&latency_sigma=0&n_containers={n_containers}"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in [0, 1]); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = q * (len(ordered) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _briefs(count: int) -> List[Path]:
+    files = sorted(BRIEFS_DIR.glob("*.yaml"))
+    if not files:
+        raise SystemExit(f"no briefs found in {BRIEFS_DIR}")
+    return list(islice(cycle(files), count))
+
+
+def _summarize(latencies: List[float], wall_s: float, simulated_s: float, llm_calls: int,
+               sequential: bool) -> Dict[str, Any]:
+    n = len(latencies)
+    out: Dict[str, Any] = {
+        "briefs": n,
+        "wall_s": round(wall_s, 4),
+        "briefs_per_min": round(n / wall_s * 60, 3) if wall_s else None,
+        "latency_s": {
+            "mean": round(sum(latencies) / n, 4) if n else None,
+            **{f"p{int(q * 100)}": (round(v, 4) if (v := percentile(latencies, q)) is not None else None)
+               for q in (0.5, 0.95, 0.99)},
+        },
+        "llm_calls": llm_calls,
+        "llm_calls_per_brief": round(llm_calls / n, 2) if n else None,
+        "simulated_llm_s": round(simulated_s, 4),
+    }
+    if sequential:
+        # Only meaningful when LLM calls do not overlap; concurrent runs report efficiency instead.
+        out["orchestration_overhead_s"] = round(wall_s - simulated_s, 4)
+        out["overhead_per_brief_s"] = round((wall_s - simulated_s) / n, 4) if n else None
+        out["overhead_fraction"] = round((wall_s - simulated_s) / wall_s, 4) if wall_s else None
+    else:
+        out["llm_concurrency"] = round(simulated_s / wall_s, 3) if wall_s else None
+    return out
+
+
+def _timed_briefs(run: Callable[[Path], None], files: List[Path]) -> Dict[str, Any]:
+    """Runs `run` once per brief file, sequentially, timing each call."""
+    from c4modeler.fake_llm import fake_usage, reset_fake_usage
+
+    reset_fake_usage()
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for brief_file in files:
+        t0 = time.perf_counter()
+        run(brief_file)
+        latencies.append(time.perf_counter() - t0)
+    wall_s = time.perf_counter() - started
+    usage = fake_usage()
+    return _summarize(latencies, wall_s, usage["simulated_s"], usage["calls"], sequential=True)
+
+
+# =========
+# Scenarios
+# =========
+
+def _scenario_brief(params: Dict[str, Any], workdir: Path) -> Dict[str, Any]:
+    from c4modeler.pipeline import generate_c4_for_brief
+    from c4modeler.utils import load_yaml
+
+    model = fake_model(params["latency"], params["n_containers"])
+
+    def run(brief_file: Path) -> None:
+        generate_c4_for_brief(
+            load_yaml(brief_file), model_name=model, analysis_method=params["analysis_method"],
+            collab_rounds=params["collab_rounds"], results_dir=workdir, result_name=brief_file.stem,
+            diagram_method=params["diagram_method"],
+        )
+
+    for brief_file in _briefs(params["warmup"]):
+        run(brief_file)
+    return _timed_briefs(run, _briefs(params["briefs"]))
+
+
+def _scenario_briefs_dir(params: Dict[str, Any], workdir: Path) -> Dict[str, Any]:
+    import yaml
+
+    from c4modeler.fake_llm import fake_usage, reset_fake_usage
+    from c4modeler.pipeline import generate_c4_for_brief, generate_c4_for_briefs_dir
+    from c4modeler.utils import load_yaml
+
+    model = fake_model(params["latency"], params["n_containers"])
+    kwargs = dict(model_name=model, analysis_method=params["analysis_method"],
+                  collab_rounds=params["collab_rounds"], diagram_method=params["diagram_method"])
+    for brief_file in _briefs(params["warmup"]):
+        generate_c4_for_brief(load_yaml(brief_file), results_dir=workdir / "warmup", **kwargs)
+
+    briefs_dir = workdir / "briefs"
+    briefs_dir.mkdir()
+    for i, brief_file in enumerate(_briefs(params["briefs"])):
+        # Copies get their own title, hence their own results folder and metrics.json.
+        brief = load_yaml(brief_file)
+        brief["title"] = f"{brief.get('title') or brief_file.stem}-{i}"
+        (briefs_dir / f"{i:03d}-{brief_file.name}").write_text(yaml.safe_dump(brief, sort_keys=False), encoding="utf-8")
+
+    reset_fake_usage()
+    started = time.perf_counter()
+    outputs = generate_c4_for_briefs_dir(briefs_dir, results_dir=workdir / "results",
+                                         max_workers=params["max_workers"], collect_metrics=True, **kwargs)
+    wall_s = time.perf_counter() - started
+    usage = fake_usage()
+    # Per-brief latency comes from each brief's metrics.json (the batch runs them concurrently).
+    latencies = [json.loads((Path(out) / "metrics.json").read_text())["summary"]["wall_s"] for out in outputs.values()]
+    return _summarize(latencies, wall_s, usage["simulated_s"], usage["calls"], sequential=params["max_workers"] == 1)
+
+
+def _scenario_experiments(params: Dict[str, Any], workdir: Path) -> Dict[str, Any]:
+    from c4modeler.experiments import build_app_from_config, run_all_experiments
+
+    app = build_app_from_config(
+        model_name=fake_model(params["latency"], params["n_containers"]),
+        analysis_method=params["analysis_method"], collab_rounds=params["collab_rounds"],
+        diagram_method=params["diagram_method"],
+    )
+
+    def run(brief_file: Path) -> None:
+        run_all_experiments(app, {brief_file.stem: brief_file.read_text(encoding="utf-8")})
+
+    for brief_file in _briefs(params["warmup"]):
+        run(brief_file)
+    return _timed_briefs(run, _briefs(params["briefs"]))
+
+
+def _scenario_evaluation(params: Dict[str, Any], workdir: Path) -> Dict[str, Any]:
+    from c4modeler.evaluation import run_full_evaluation
+    from c4modeler.pipeline import generate_c4_for_brief
+    from c4modeler.utils import load_yaml
+
+    # Models are generated up front (instantly); only the evaluation is timed.
+    generator = fake_model(0.0, params["n_containers"])
+    models: Dict[Path, Any] = {}
+    for brief_file in dict.fromkeys(_briefs(params["briefs"])):
+        models[brief_file], _ = generate_c4_for_brief(
+            load_yaml(brief_file), model_name=generator, analysis_method="simple",
+            results_dir=workdir, result_name=brief_file.stem, diagram_method="render",
+        )
+    judge = fake_model(params["latency"], params["n_containers"])
+
+    def run(brief_file: Path) -> None:
+        run_full_evaluation(brief_file.read_text(encoding="utf-8"), models[brief_file], judge_model_name=judge)
+
+    for brief_file in _briefs(params["warmup"]):
+        run(brief_file)
+    return _timed_briefs(run, _briefs(params["briefs"]))
+
+
+_RUNNERS: Dict[str, Callable[[Dict[str, Any], Path], Dict[str, Any]]] = {
+    "brief": _scenario_brief,
+    "briefs_dir": _scenario_briefs_dir,
+    "experiments": _scenario_experiments,
+    "evaluation": _scenario_evaluation,
+}
+
+
+def run_scenario(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one scenario (in the current process) and returns its result record."""
+    _import_package()
+    from c4modeler.resilience import reset_resilience
+
+    reset_resilience()
+    output = io.StringIO()
+    with tempfile.TemporaryDirectory(prefix="c4-bench-") as tmp, contextlib.redirect_stdout(output):
+        metrics = _RUNNERS[spec["scenario"]](spec["params"], Path(tmp))
+    return {**spec, **metrics, "peak_rss_mb": peak_rss_mb(), "stdout_bytes": len(output.getvalue())}
+
+
+# ======
+# Sweeps
+# ======
+
+def build_specs(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    base = {"latency": args.latency, "briefs": args.briefs, "warmup": args.warmup,
+            "diagram_method": args.diagram_method, "analysis_method": "simple", "collab_rounds": 1,
+            "n_containers": args.containers[0]}
+    specs: List[Dict[str, Any]] = []
+
+    def add(scenario: str, **params: Any) -> None:
+        if scenario in args.only:
+            specs.append({"scenario": scenario, "params": {**base, **params}})
+
+    for n in args.containers:
+        add("brief", n_containers=n)
+    for rounds in args.collab_rounds:
+        add("brief", analysis_method="collaborative", collab_rounds=rounds)
+    for workers in args.workers:
+        add("briefs_dir", max_workers=workers)
+    add("experiments")
+    add("experiments", analysis_method="collaborative", collab_rounds=args.collab_rounds[0])
+    for n in args.containers:
+        add("evaluation", n_containers=n)
+    return specs
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ints(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per LLM call (default 0.05)")
+    parser.add_argument("--briefs", type=int, default=5, help="timed briefs per scenario (default 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed briefs first (imports, graph compile)")
+    parser.add_argument("--containers", type=_ints, default=[2, 4, 8], help="container counts to sweep, e.g. 2,4,8")
+    parser.add_argument("--collab-rounds", type=_ints, default=[1, 2, 3], help="collab_rounds to sweep, e.g. 1,2,3")
+    parser.add_argument("--workers", type=_ints, default=[1, 4], help="max_workers for the briefs-dir batch")
+    parser.add_argument("--diagram-method", default="llm", choices=["llm", "fused", "render"])
+    parser.add_argument("--only", type=lambda s: s.split(","), default=list(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--quick", action="store_true", help="small, fast sweep for smoke testing")
+    parser.add_argument("--in-process", action="store_true", help="skip the per-scenario subprocess (shared peak RSS)")
+    parser.add_argument("--out", type=Path, help="output JSON (default benchmarks/results/pipeline-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    unknown = set(args.only) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.quick:
+        args.latency, args.briefs, args.warmup = min(args.latency, 0.005), min(args.briefs, 2), 1
+        args.containers, args.collab_rounds, args.workers = args.containers[:2], args.collab_rounds[:2], args.workers[:2]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> Path:
+    args = parse_args(argv)
+    specs = build_specs(args)
+    results: List[Dict[str, Any]] = []
+    for i, spec in enumerate(specs, 1):
+        shown = ("analysis_method", "collab_rounds", "n_containers", "max_workers")
+        label = f"{spec['scenario']} " + " ".join(f"{k}={spec['params'][k]}" for k in shown if k in spec["params"])
+        print(f"[{i}/{len(specs)}] {label}", end="", flush=True)
+        if args.in_process:
+            result = run_scenario(spec)
+        else:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(run_scenario, spec).result()
+        results.append(result)
+        lat = result["latency_s"]
+        print(f"  {result['briefs_per_min']} briefs/min  p50={lat['p50']}s p95={lat['p95']}s"
+              f"  overhead={result.get('overhead_per_brief_s', '-')}s/brief  rss={result['peak_rss_mb']}MB")
+
+    report = {
+        "benchmark": "pipeline",
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"pipeline-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {out}")
+    return out
+
+
+if __name__ == "__main__":
+    main()
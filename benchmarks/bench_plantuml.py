@@ -0,0 +1,184 @@
+"""
+PlantUML compile benchmark over a corpus of real diagrams (by default every
+.puml under notebooks/data/results). Compares the ways the evaluation can
+check diagrams:
+
+  java_render    one `java -jar -tsvg` per diagram (the old evaluation path)
+  java_check     one `java -jar -checkonly` per diagram
+  batch_render   all diagrams rendered in one JVM (evaluation with check_only=False)
+  batch_check    all diagrams syntax-checked in one JVM (the evaluation default)
+  daemon_render  warm `-pipe` workers (start_plantuml_daemon); start-up reported separately
+  cached_check   batch_check answered from a warm PlantUMLCompileCache
+
+    python benchmarks/bench_plantuml.py
+    python benchmarks/bench_plantuml.py --modes batch_render,batch_check --repeat 5
+    python benchmarks/bench_plantuml.py --limit 10 --out /tmp/plantuml.json
+
+Needs Java and plantuml.jar (downloaded by `setup_plantuml` if missing).
+Reports per mode the median wall time, diagrams/s, speedup over java_render
+(or the first mode run) and whether pass/fail agrees with it; results go to
+`benchmarks/results/plantuml-<timestamp>.json`, comparable with `compare.py`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_CORPUS = ROOT / "notebooks" / "data" / "results"
+
+MODES = ("java_render", "java_check", "batch_render", "batch_check", "daemon_render", "cached_check")
+
+
+def _import_package() -> None:
+    if str(ROOT / "src") not in sys.path:
+        sys.path.insert(0, str(ROOT / "src"))
+
+
+def load_corpus(corpus: Path, limit: Optional[int]) -> List[Dict[str, str]]:
+    files = sorted(corpus.rglob("*.puml"))[:limit] if limit else sorted(corpus.rglob("*.puml"))
+    return [{"source": str(fp.relative_to(corpus)), "code": fp.read_text(encoding="utf-8").strip()} for fp in files]
+
+
+def _runners(jar: Path, pool_size: int) -> Dict[str, Callable[[List[Dict[str, str]]], Dict[str, Any]]]:
+    from c4modeler.cache import PlantUMLCompileCache
+    from c4modeler.utils import compile_plantuml_batch, compile_plantuml_java, start_plantuml_daemon, stop_plantuml_daemon
+
+    def per_diagram(check_only: bool) -> Callable[[List[Dict[str, str]]], Dict[str, Any]]:
+        def run(diagrams: List[Dict[str, str]]) -> Dict[str, Any]:
+            return {"ok": {d["source"]: compile_plantuml_java(d["code"], jar, check_only=check_only)[0] for d in diagrams}}
+        return run
+
+    def batch(check_only: bool) -> Callable[[List[Dict[str, str]]], Dict[str, Any]]:
+        def run(diagrams: List[Dict[str, str]]) -> Dict[str, Any]:
+            results = compile_plantuml_batch(diagrams, jar, check_only=check_only)
+            return {"ok": {r["source"]: r["ok"] for r in results}}
+        return run
+
+    def daemon(diagrams: List[Dict[str, str]]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        if start_plantuml_daemon(pool_size=pool_size, jar_path=jar) is None:
+            raise RuntimeError("PlantUML daemon did not start")
+        started = time.perf_counter() - t0
+        try:
+            t1 = time.perf_counter()
+            results = compile_plantuml_batch(diagrams, jar)
+            return {"ok": {r["source"]: r["ok"] for r in results}, "startup_s": started,
+                    "timed_s": time.perf_counter() - t1}
+        finally:
+            stop_plantuml_daemon()
+
+    def cached(diagrams: List[Dict[str, str]]) -> Dict[str, Any]:
+        with tempfile.TemporaryDirectory(prefix="c4-bench-cache-") as tmp:
+            cache = PlantUMLCompileCache(Path(tmp) / "plantuml.sqlite")
+            compile_plantuml_batch(diagrams, jar, cache=cache, check_only=True)  # fill; not timed
+            t0 = time.perf_counter()
+            results = compile_plantuml_batch(diagrams, jar, cache=cache, check_only=True)
+            timed = time.perf_counter() - t0
+            cache.close()
+        return {"ok": {r["source"]: r["ok"] for r in results}, "timed_s": timed}
+
+    return {
+        "java_render": per_diagram(False),
+        "java_check": per_diagram(True),
+        "batch_render": batch(False),
+        "batch_check": batch(True),
+        "daemon_render": daemon,
+        "cached_check": cached,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PlantUML compile-mode benchmark.")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="directory searched for *.puml")
+    parser.add_argument("--limit", type=int, help="use only the first N diagrams")
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=list(MODES), help=",".join(MODES))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per mode (median reported)")
+    parser.add_argument("--pool-size", type=int, default=4, help="daemon workers for daemon_render")
+    parser.add_argument("--jar", type=Path, help="plantuml.jar (default: utils.PLANTUML_JAR_PATH)")
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args(argv)
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    _import_package()
+    from c4modeler.utils import PLANTUML_JAR_PATH, plantuml_jar_version, setup_plantuml
+
+    jar = args.jar or PLANTUML_JAR_PATH
+    if args.jar is None and not setup_plantuml():
+        print("PlantUML jar is not available; pass --jar or run with network access once.")
+        return 2
+    if shutil.which("java") is None:
+        print("Java is not on PATH; this benchmark needs a JRE.")
+        return 2
+    diagrams = load_corpus(args.corpus, args.limit)
+    if not diagrams:
+        print(f"No .puml files under {args.corpus}")
+        return 2
+    print(f"{len(diagrams)} diagrams from {args.corpus}")
+
+    runners = _runners(jar, args.pool_size)
+    results: List[Dict[str, Any]] = []
+    baseline: Optional[Dict[str, Any]] = None
+    for mode in args.modes:
+        times: List[float] = []
+        extra: Dict[str, List[float]] = {}
+        outcome: Dict[str, Any] = {}
+        for _ in range(max(1, args.repeat)):
+            t0 = time.perf_counter()
+            outcome = runners[mode](diagrams)
+            times.append(outcome.get("timed_s", time.perf_counter() - t0))
+            if "startup_s" in outcome:
+                extra.setdefault("startup_s", []).append(outcome["startup_s"])
+        wall = statistics.median(times)
+        record: Dict[str, Any] = {
+            "scenario": "plantuml",
+            "params": {"mode": mode, "diagrams": len(diagrams)},
+            "wall_s": round(wall, 4),
+            "diagrams_per_s": round(len(diagrams) / wall, 2) if wall else None,
+            "ms_per_diagram": round(wall / len(diagrams) * 1000, 2),
+            "ok": sum(outcome["ok"].values()),
+            **{k: round(statistics.median(v), 4) for k, v in extra.items()},
+        }
+        if baseline is None:
+            baseline = {"mode": mode, "wall_s": wall, "ok": outcome["ok"]}
+        record["speedup_vs"] = baseline["mode"]
+        record["speedup"] = round(baseline["wall_s"] / wall, 2) if wall else None
+        record["disagreements"] = sorted(s for s, ok in outcome["ok"].items() if baseline["ok"].get(s) != ok)
+        results.append(record)
+        print(f"{mode:<14} {record['wall_s']:>8.3f}s  {record['diagrams_per_s']:>8} diagrams/s  "
+              f"x{record['speedup']} vs {baseline['mode']}  ok={record['ok']}/{len(diagrams)}  "
+              f"disagree={len(record['disagreements'])}")
+
+    report = {
+        "benchmark": "plantuml",
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "jar_version": plantuml_jar_version(jar),
+            "corpus": str(args.corpus),
+            "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"plantuml-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Compares two benchmark result files and flags regressions.
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+
+Results are matched on (scenario, params). A metric regresses when it moves
+in the bad direction by more than `--threshold` (relative); the exit status
+is 1 if anything regressed, so this can gate CI.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# metric path -> True when higher is better
+METRICS: Dict[str, bool] = {
+    "briefs_per_min": True,
+    "diagrams_per_s": True,
+    "latency_s.p50": False,
+    "latency_s.p95": False,
+    "latency_s.p99": False,
+    "overhead_per_brief_s": False,
+    "peak_rss_mb": False,
+    "import_s.median": False,
+    "modules_loaded": False,
+}
+
+
+def _get(record: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def _key(record: Dict[str, Any]) -> str:
+    return json.dumps({"scenario": record.get("scenario"), "params": record.get("params")}, sort_keys=True)
+
+
+def _label(record: Dict[str, Any]) -> str:
+    params = record.get("params") or {}
+    return f"{record.get('scenario')} " + " ".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> Tuple[List[str], int]:
+    """Returns (report lines, number of regressions)."""
+    base = {_key(r): r for r in baseline.get("results", [])}
+    lines: List[str] = []
+    regressions = 0
+    for record in candidate.get("results", []):
+        old = base.get(_key(record))
+        if old is None:
+            lines.append(f"  (new) {_label(record)}")
+            continue
+        lines.append(_label(record))
+        for metric, higher_is_better in METRICS.items():
+            a, b = _get(old, metric), _get(record, metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif worse < -threshold:
+                flag = "  improved"
+            lines.append(f"    {metric:<22} {a:>10.4g} -> {b:>10.4g}  ({change:+.1%}){flag}")
+    return lines, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    candidate = json.loads(args.candidate.read_text(encoding="utf-8"))
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print("\n".join(lines))
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
 __all__ = [
-    "agents", "evaluation", "experiments", "graph", "llm",
-    "models", "pipeline", "prompts", "types", "utils",
+    "agents", "cache", "evaluation", "experiments", "fake_llm", "graph", "hedging", "instrumentation", "llm",
+    "models", "pipeline", "prompts", "render", "resilience", "types", "utils", "validation",
 ]
\ No newline at end of file
@@ -1,22 +1,26 @@
 # src/agents.py
 from __future__ import annotations
 
-import copy
+import asyncio
 import functools
 import re
 from collections import deque
-from typing import Annotated, Dict, List, Optional, Sequence, TypedDict
+from typing import Annotated, Awaitable, Callable, Dict, List, Literal, Optional, Sequence, Tuple, TypedDict
 
 import yaml
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 
 from .models import Agent
-from .types import State
+from .render import render_plantuml
+from .validation import check_c4_yaml, load_c4_yaml
+from .types import LevelOutput, State, merge_c4_model
 from .prompts import (
     # persona strings
     PERSONA_BY_ROLE,
@@ -25,12 +29,16 @@ from .prompts import (
     COMPONENT_TEAM_ROLES,
     # system prompts / templates
     REPORT_GENERATOR_SYSTEM_PROMPT,
+    COLLABORATION_SUMMARY_SYSTEM_PROMPT,
     ANALYSIS_PERSONA_PROMPT,
     ANALYSIS_HUMAN_MESSAGE_PROMPT,
     YAML_PERSONA_PROMPT,
     YAML_HUMAN_MESSAGE_PROMPT,
+    YAML_REPAIR_HUMAN_MESSAGE_PROMPT,
     PLANTUML_PERSONA_PROMPT,
     PLANTUML_HUMAN_MESSAGE_PROMPT,
+    FUSED_PERSONA_PROMPT,
+    FUSED_HUMAN_MESSAGE_PROMPT,
     CONTEXT_YAML_TEMPLATE,
     CONTAINER_YAML_TEMPLATE,
     COMPONENT_YAML_TEMPLATE,
@@ -56,11 +64,25 @@ def build_component_team() -> List[Agent]:
         )
     return [Agent(name=role, persona=persona_for(role)) for role in COMPONENT_TEAM_ROLES]
 
+# ============================================================================
+# Sync/async node wrapper
+# ============================================================================
+
+def dual_node(func: Callable, afunc: Callable, name: Optional[str] = None) -> RunnableLambda:
+    """
+    Wraps a node's sync and async implementations into one runnable, so the same
+    compiled graph runs blocking under `invoke`/`stream` and fully async under
+    `ainvoke`/`astream` (no executor threads).
+    """
+    return RunnableLambda(func, afunc=afunc, name=name)
+
 # ============================================================================
 # Collaborative analysis subgraph (multi-agent round-robin)
 # ============================================================================
 
-class CollaborativeAnalysisState(TypedDict):
+CollaborationMemory = Literal["full", "window", "summary"]
+
+class CollaborativeAnalysisState(TypedDict, total=False):
     """Internal state for the collaborative analysis subgraph."""
     messages: Annotated[List[BaseMessage], add_messages]
     system_brief: str
@@ -69,9 +91,30 @@ class CollaborativeAnalysisState(TypedDict):
     max_rounds: int
     final_analysis: str
     team: List[Agent]
-
-def agent_node(state: CollaborativeAnalysisState, agent: Agent, llm: BaseChatModel) -> Dict:
-    print(f"--- 🗣️  Turn: {agent.name} on C4 Level: '{state['level']}' ---")
+    summary: str            # rolling minutes ("summary" memory)
+    summarized_turns: int   # agent turns already folded into `summary`
+
+def _memory_view(
+    state: CollaborativeAnalysisState,
+    memory: CollaborationMemory = "full",
+    window: Optional[int] = None,
+) -> List[BaseMessage]:
+    """
+    The part of the discussion an agent is shown. The kick-off message is always
+    kept; "window" keeps the last `window` turns, "summary" replaces the turns
+    already summarized with the rolling minutes. `state["messages"]` itself
+    always keeps the full transcript.
+    """
+    messages = state["messages"]
+    head, turns = messages[:1], messages[1:]
+    if memory == "window" and window:
+        return head + turns[-window:]
+    if memory == "summary" and state.get("summary"):
+        minutes = HumanMessage(content=f"Minutes of the discussion so far:\n{state['summary']}")
+        return head + [minutes] + turns[state.get("summarized_turns", 0):]
+    return messages
+
+def _agent_chain(state: CollaborativeAnalysisState, agent: Agent, llm: BaseChatModel):
     system_prompt = (
         "You are a member of an expert team collaboratively creating the analysis for a C4 model diagram.\n"
         f"Your current task is to analyze the provided system brief for the **C4 {state['level']} level**.\n"
@@ -85,25 +128,102 @@ def agent_node(state: CollaborativeAnalysisState, agent: Agent, llm: BaseChatMod
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="messages"),
     ])
-    chain = prompt_template | llm
-    response = chain.invoke({"messages": state["messages"]})
-    sanitized_name = re.sub(r"[^a-zA-Z0-9_-]", "_", agent.name)
+    return prompt_template | llm
+
+def _sanitize_agent_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", name)
+
+def _named_turn(agent: Agent, response: BaseMessage, node_name: Optional[str]) -> Dict:
+    sanitized_name = node_name or _sanitize_agent_name(agent.name)
     named_message = AIMessage(content=response.content, name=sanitized_name)
     return {"messages": [named_message]}
 
-def report_generator_node(state: CollaborativeAnalysisState, llm: BaseChatModel) -> Dict:
-    print("--- 🔬 Generating Final Analysis Report ---")
+def agent_node(
+    state: CollaborativeAnalysisState,
+    agent: Agent,
+    llm: BaseChatModel,
+    node_name: Optional[str] = None,
+    memory: CollaborationMemory = "full",
+    window: Optional[int] = None,
+) -> Dict:
+    print(f"--- 🗣️  Turn: {agent.name} on C4 Level: '{state['level']}' ---")
+    response = _agent_chain(state, agent, llm).invoke({"messages": _memory_view(state, memory, window)})
+    return _named_turn(agent, response, node_name)
+
+async def aagent_node(
+    state: CollaborativeAnalysisState,
+    agent: Agent,
+    llm: BaseChatModel,
+    node_name: Optional[str] = None,
+    memory: CollaborationMemory = "full",
+    window: Optional[int] = None,
+) -> Dict:
+    """Async twin of `agent_node`."""
+    print(f"--- 🗣️  Turn: {agent.name} on C4 Level: '{state['level']}' ---")
+    response = await _agent_chain(state, agent, llm).ainvoke({"messages": _memory_view(state, memory, window)})
+    return _named_turn(agent, response, node_name)
+
+def _summary_chain(llm: BaseChatModel):
+    prompt_template = ChatPromptTemplate.from_messages([
+        ("system", COLLABORATION_SUMMARY_SYSTEM_PROMPT),
+        MessagesPlaceholder(variable_name="messages"),
+    ])
+    return prompt_template | llm
+
+def _summary_inputs(state: CollaborativeAnalysisState) -> Dict:
+    return {
+        "level": state["level"],
+        "summary": state.get("summary") or "(none yet)",
+        "messages": [HumanMessage(content="New contributions since the previous minutes:")]
+                    + state["messages"][1 + state.get("summarized_turns", 0):],
+    }
+
+def summarize_round_node(state: CollaborativeAnalysisState, llm: BaseChatModel) -> Dict:
+    """Folds the turns since the last summary into the rolling minutes ("summary" memory)."""
+    print("--- 🧾 Summarizing Collaboration Round ---")
+    summary = _summary_chain(llm).invoke(_summary_inputs(state)).content
+    return {"summary": summary, "summarized_turns": len(state["messages"]) - 1}
+
+async def asummarize_round_node(state: CollaborativeAnalysisState, llm: BaseChatModel) -> Dict:
+    """Async twin of `summarize_round_node`."""
+    print("--- 🧾 Summarizing Collaboration Round ---")
+    summary = (await _summary_chain(llm).ainvoke(_summary_inputs(state))).content
+    return {"summary": summary, "summarized_turns": len(state["messages"]) - 1}
+
+def _report_chain(llm: BaseChatModel):
     prompt_template = ChatPromptTemplate.from_messages([
         ("system", REPORT_GENERATOR_SYSTEM_PROMPT),
         MessagesPlaceholder(variable_name="messages"),
     ])
-    chain = prompt_template | llm
-    final_report = chain.invoke({
+    return prompt_template | llm
+
+def report_generator_node(
+    state: CollaborativeAnalysisState,
+    llm: BaseChatModel,
+    memory: CollaborationMemory = "full",
+) -> Dict:
+    # "window" still reports from the full transcript (a single, linear-size call);
+    # "summary" reports from the minutes plus the final round.
+    print("--- 🔬 Generating Final Analysis Report ---")
+    final_report = _report_chain(llm).invoke({
         "system_brief": state["system_brief"],
-        "messages": state["messages"],
+        "messages": _memory_view(state, "summary" if memory == "summary" else "full"),
     }).content
     return {"final_analysis": final_report}
 
+async def areport_generator_node(
+    state: CollaborativeAnalysisState,
+    llm: BaseChatModel,
+    memory: CollaborationMemory = "full",
+) -> Dict:
+    """Async twin of `report_generator_node`."""
+    print("--- 🔬 Generating Final Analysis Report ---")
+    final_report = (await _report_chain(llm).ainvoke({
+        "system_brief": state["system_brief"],
+        "messages": _memory_view(state, "summary" if memory == "summary" else "full"),
+    })).content
+    return {"final_analysis": final_report}
+
 def collaboration_router(state: CollaborativeAnalysisState) -> str:
     """Routes based on rounds completed."""
     active_team = state["team"]
@@ -115,25 +235,51 @@ def collaboration_router(state: CollaborativeAnalysisState) -> str:
     else:
         return active_team[0].name  # loop back
 
-def create_collaboration_graph(llm: BaseChatModel, team: List[Agent], max_rounds: int = 2):
-    """Builds and returns a compiled collaborative analysis subgraph for the GIVEN TEAM."""
-    builder = StateGraph(CollaborativeAnalysisState)
-
-    for agent in team:
-        node_name = re.sub(r"[^a-zA-Z0-9_-]", "_", agent.name)
-        builder.add_node(node_name, functools.partial(agent_node, agent=agent, llm=llm))
-
-    builder.add_node("generate_report", functools.partial(report_generator_node, llm=llm))
+def create_collaboration_graph(
+    llm: BaseChatModel,
+    team: List[Agent],
+    max_rounds: int = 2,
+    memory: CollaborationMemory = "full",
+    window: Optional[int] = None,
+):
+    """
+    Builds and returns a compiled collaborative analysis subgraph for the GIVEN TEAM.
 
-    entry_point = re.sub(r"[^a-zA-Z0-9_-]", "_", team[0].name)
+    `memory` bounds what each agent turn is sent:
+      - "full": the whole discussion (prompt size grows every turn)
+      - "window": the kick-off message plus the last `window` turns (default: one round)
+      - "summary": rolling minutes written between rounds plus the current round
+    """
+    builder = StateGraph(CollaborativeAnalysisState)
+    node_names = [_sanitize_agent_name(agent.name) for agent in team]
+    window = window or len(team)
+
+    for agent, node_name in zip(team, node_names):
+        builder.add_node(node_name, dual_node(
+            functools.partial(agent_node, agent=agent, llm=llm, node_name=node_name, memory=memory, window=window),
+            functools.partial(aagent_node, agent=agent, llm=llm, node_name=node_name, memory=memory, window=window),
+            name=node_name,
+        ))
+
+    builder.add_node("generate_report", dual_node(
+        functools.partial(report_generator_node, llm=llm, memory=memory),
+        functools.partial(areport_generator_node, llm=llm, memory=memory),
+        name="generate_report",
+    ))
+    if memory == "summary":
+        builder.add_node("summarize_round", dual_node(
+            functools.partial(summarize_round_node, llm=llm),
+            functools.partial(asummarize_round_node, llm=llm),
+            name="summarize_round",
+        ))
+
+    entry_point = node_names[0]
     builder.set_entry_point(entry_point)
 
-    for i in range(len(team) - 1):
-        src = re.sub(r"[^a-zA-Z0-9_-]", "_", team[i].name)
-        dst = re.sub(r"[^a-zA-Z0-9_-]", "_", team[i + 1].name)
+    for src, dst in zip(node_names, node_names[1:]):
         builder.add_edge(src, dst)
 
-    last_agent = re.sub(r"[^a-zA-Z0-9_-]", "_", team[-1].name)
+    last_agent = node_names[-1]
     first_agent = entry_point
 
     builder.add_conditional_edges(
@@ -141,24 +287,69 @@ def create_collaboration_graph(llm: BaseChatModel, team: List[Agent], max_rounds
         collaboration_router,
         {
             "generate_report": "generate_report",
-            first_agent: first_agent,
+            first_agent: "summarize_round" if memory == "summary" else first_agent,
         },
     )
+    if memory == "summary":
+        builder.add_edge("summarize_round", first_agent)
 
     builder.add_edge("generate_report", END)
     return builder.compile()
 
+TEAM_BUILDERS: Dict[str, Callable[[], List[Agent]]] = {
+    "context": build_context_team,
+    "container": build_container_team,
+    "component": build_component_team,
+}
+
+def build_collaboration_subgraphs(
+    llm: BaseChatModel,
+    collab_rounds: int = 2,
+    memory: CollaborationMemory = "full",
+    window: Optional[int] = None,
+) -> Dict[str, Tuple[List[Agent], object]]:
+    """
+    Compiles the context, container and component team subgraphs once so that
+    `collaborative_analysis_node` can reuse them for every container and brief.
+    Returns {level: (team, compiled_subgraph)}.
+    """
+    subgraphs: Dict[str, Tuple[List[Agent], object]] = {}
+    for level, build_team in TEAM_BUILDERS.items():
+        team = build_team()
+        subgraphs[level] = (team, create_collaboration_graph(
+            llm=llm, team=team, max_rounds=collab_rounds, memory=memory, window=window))
+    return subgraphs
+
 
 # ============================================================================
 # Single-agent nodes used in the main pipeline
 # ============================================================================
 
-
-def analysis_agent_node(state: State, llm: BaseChatModel) -> Dict:
+def _level_update(level: str, component_target: Optional[str], field: str, value: str) -> Dict:
     """
-    Generates the textual analysis for the next required C4 level,
-    exactly like in your notebook (prompts unchanged).
+    Returns a delta for `State.c4_model` touching a single artifact; the
+    `merge_c4_model` reducer folds it into the accumulated model.
     """
+    if level == "context":
+        return {"c4_model": {"context": {field: value}}}
+    if level == "container":
+        return {"c4_model": {"containers": {field: value}}}
+    if level == "component" and component_target:
+        return {"c4_model": {"components": {component_target: {field: value}}}}
+    return {}
+
+def _apply_update(state: State, update: Dict) -> State:
+    """Applies a node's update to a local state copy the way the graph would."""
+    if not update:
+        return state
+    new_state: State = {**state, **update}
+    if "c4_model" in update:
+        new_state["c4_model"] = merge_c4_model(state["c4_model"], update["c4_model"])
+    return new_state
+
+
+def _analysis_request(state: State) -> Optional[Tuple[str, Optional[str], Dict[str, str]]]:
+    """Picks the next C4 level needing analysis; returns (level, component_target, chain inputs) or None."""
     system_brief = state["system_brief"]
     c4_model = state["c4_model"]
     component_target: Optional[str] = None
@@ -175,42 +366,52 @@ def analysis_agent_node(state: State, llm: BaseChatModel) -> Dict:
         component_queue: deque[str] = state.get("component_queue", deque())
         if component_queue:
             component_target = component_queue[0]
+            if c4_model.get("components", {}).get(component_target, {}).get("analysis"):
+                print(f"--- ⏭️ Reusing existing Component Level Analysis for '{component_target}' ---")
+                return None
             level = "component"
             print(f"--- ✍️ Generating Component Level Analysis for '{component_target}' ---")
             context_blob = f"**Container Level Analysis (for context):**\n{c4_model['containers']['analysis']}"
         else:
-            return {}
-        
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", ANALYSIS_PERSONA_PROMPT),
-        ("human", ANALYSIS_HUMAN_MESSAGE_PROMPT),
-    ])
+            return None
 
-    analysis_chain = prompt_template | llm | StrOutputParser()
-
-    analysis = analysis_chain.invoke({
+    return level, component_target, {
         "level": level,
         "brief": system_brief,
         "context": context_blob,
         "component_target": component_target or "",
-    })
-
-    updated_model = copy.deepcopy(c4_model)
-    if level == "context":
-        updated_model["context"] = {"analysis": analysis}
-    elif level == "container":
-        updated_model["containers"] = {"analysis": analysis}
-    elif level == "component" and component_target:
-        if "components" not in updated_model:
-            updated_model["components"] = {}
-        updated_model["components"][component_target] = {"analysis": analysis}
+    }
 
-    return {"c4_model": updated_model}
+def _analysis_chain(llm: BaseChatModel):
+    prompt_template = ChatPromptTemplate.from_messages([
+        ("system", ANALYSIS_PERSONA_PROMPT),
+        ("human", ANALYSIS_HUMAN_MESSAGE_PROMPT),
+    ])
+    return prompt_template | llm | StrOutputParser()
 
-def yaml_structure_node(state: State, llm: BaseChatModel) -> Dict:
+def analysis_agent_node(state: State, llm: BaseChatModel) -> Dict:
     """
-    Converts textual analysis to YAML using your templates (unchanged).
+    Generates the textual analysis for the next required C4 level,
+    exactly like in your notebook (prompts unchanged).
     """
+    request = _analysis_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    analysis = _analysis_chain(llm).invoke(inputs)
+    return _level_update(level, component_target, "analysis", analysis)
+
+async def aanalysis_agent_node(state: State, llm: BaseChatModel) -> Dict:
+    """Async twin of `analysis_agent_node`."""
+    request = _analysis_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    analysis = await _analysis_chain(llm).ainvoke(inputs)
+    return _level_update(level, component_target, "analysis", analysis)
+
+def _yaml_request(state: State) -> Optional[Tuple[str, Optional[str], Dict[str, str]]]:
+    """Picks the next level whose analysis still needs a YAML definition."""
     c4_model = state["c4_model"]
     component_target: Optional[str] = None
 
@@ -237,39 +438,114 @@ def yaml_structure_node(state: State, llm: BaseChatModel) -> Dict:
                 template = COMPONENT_YAML_TEMPLATE
                 ctx = f"Container Level YAML (for reference):\n{c4_model['containers']['yaml_definition']}"
             else:
-                return {}
+                return None
         else:
-            return {}
+            return None
+
+    return level, component_target, {
+        "analysis": analysis,
+        "template": template,
+        "context": ctx,
+    }
 
+def _yaml_chain(llm: BaseChatModel):
     prompt = ChatPromptTemplate.from_messages([
         ("system", YAML_PERSONA_PROMPT),
         ("human", YAML_HUMAN_MESSAGE_PROMPT),
     ])
-    chain = prompt | llm | StrOutputParser()
+    return prompt | llm | StrOutputParser()
 
-    yaml_output = chain.invoke({
-        "analysis": analysis,
-        "template": template,
-        "context": ctx,
-    })
+def yaml_structure_node(state: State, llm: BaseChatModel) -> Dict:
+    """
+    Converts textual analysis to YAML using your templates (unchanged).
+    """
+    request = _yaml_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    yaml_output = _yaml_chain(llm).invoke(inputs)
+    return _level_update(level, component_target, "yaml_definition", yaml_output)
+
+async def ayaml_structure_node(state: State, llm: BaseChatModel) -> Dict:
+    """Async twin of `yaml_structure_node`."""
+    request = _yaml_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    yaml_output = await _yaml_chain(llm).ainvoke(inputs)
+    return _level_update(level, component_target, "yaml_definition", yaml_output)
 
-    updated_model = copy.deepcopy(c4_model)
-    if level == "context":
-        updated_model["context"]["yaml_definition"] = yaml_output
-    elif level == "container":
-        updated_model["containers"]["yaml_definition"] = yaml_output
-    elif level == "component" and component_target:
-        if component_target not in updated_model.get("components", {}):
-            updated_model.setdefault("components", {})
-            updated_model["components"][component_target] = {}
-        updated_model["components"][component_target]["yaml_definition"] = yaml_output
+def _validation_request(state: State) -> Optional[Tuple[str, Optional[str], str]]:
+    """The level whose YAML was produced last: (level, component_target, yaml_text) or None."""
+    c4_model = state["c4_model"]
+    component_queue = state.get("component_queue")
+    if component_queue:
+        component_target = component_queue[0]
+        yaml_text = (c4_model.get("components", {}).get(component_target) or {}).get("yaml_definition")
+        return ("component", component_target, yaml_text) if yaml_text else None
+    for level, key in (("container", "containers"), ("context", "context")):
+        yaml_text = (c4_model.get(key) or {}).get("yaml_definition")
+        if yaml_text:
+            return level, None, yaml_text
+    return None
+
+def _repair_chain(llm: BaseChatModel):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", YAML_PERSONA_PROMPT),
+        ("human", YAML_REPAIR_HUMAN_MESSAGE_PROMPT),
+    ])
+    return prompt | llm | StrOutputParser()
 
-    return {"c4_model": updated_model}
+def _repair_inputs(level: str, yaml_text: str, errors: List[str]) -> Dict[str, str]:
+    return {"level": level, "errors": "\n".join(f"- {e}" for e in errors), "yaml_def": yaml_text}
 
-def plantuml_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+def _validated_update(level: str, component_target: Optional[str], original: str, best: Tuple[str, List[str]]) -> Dict:
+    cleaned, errors = best
+    if errors:
+        print(f"--- ⚠️ {level.capitalize()} YAML is still invalid: {'; '.join(errors[:3])} ---")
+    if cleaned.strip() == original.strip():
+        return {}
+    return _level_update(level, component_target, "yaml_definition", cleaned)
+
+def validate_yaml_node(state: State, llm: BaseChatModel, max_repairs: int = 1) -> Dict:
     """
-    Generates PlantUML code from YAML + analysis using your syntax guide (unchanged).
+    Validates the YAML just produced against its level's template schema
+    (`validation.check_c4_yaml`), after stripping fences and other LLM artifacts
+    locally. Only if that is not enough is the model asked for a repair, with a
+    short prompt carrying just the errors and the YAML.
     """
+    request = _validation_request(state)
+    if request is None:
+        return {}
+    level, component_target, yaml_text = request
+    best = check_c4_yaml(yaml_text, level)
+    for _ in range(max_repairs):
+        if not best[1]:
+            break
+        print(f"--- 🩹 Repairing {level.capitalize()} Level YAML ({len(best[1])} errors) ---")
+        candidate = check_c4_yaml(_repair_chain(llm).invoke(_repair_inputs(level, *best)), level)
+        if len(candidate[1]) < len(best[1]):
+            best = candidate
+    return _validated_update(level, component_target, yaml_text, best)
+
+async def avalidate_yaml_node(state: State, llm: BaseChatModel, max_repairs: int = 1) -> Dict:
+    """Async twin of `validate_yaml_node`."""
+    request = _validation_request(state)
+    if request is None:
+        return {}
+    level, component_target, yaml_text = request
+    best = check_c4_yaml(yaml_text, level)
+    for _ in range(max_repairs):
+        if not best[1]:
+            break
+        print(f"--- 🩹 Repairing {level.capitalize()} Level YAML ({len(best[1])} errors) ---")
+        candidate = check_c4_yaml(await _repair_chain(llm).ainvoke(_repair_inputs(level, *best)), level)
+        if len(candidate[1]) < len(best[1]):
+            best = candidate
+    return _validated_update(level, component_target, yaml_text, best)
+
+def _diagram_request(state: State) -> Optional[Tuple[str, Optional[str], Dict[str, str]]]:
+    """Picks the next level whose YAML definition still needs a diagram."""
     c4_model = state["c4_model"]
     component_target: Optional[str] = None
 
@@ -294,33 +570,146 @@ def plantuml_diagram_node(state: State, llm: BaseChatModel) -> Dict:
                 analysis = comp["analysis"]
                 yaml_def = comp["yaml_definition"]
             else:
-                return {}
+                return None
         else:
-            return {}
+            return None
+
+    return level, component_target, {
+        "syntax_guide": PLANTUML_SYNTAX_GUIDE,
+        "yaml_def": yaml_def,
+        "analysis": analysis,
+    }
 
+def _diagram_chain(llm: BaseChatModel):
     prompt = ChatPromptTemplate.from_messages([
         ("system", PLANTUML_PERSONA_PROMPT),
         ("human", PLANTUML_HUMAN_MESSAGE_PROMPT),
     ])
-    chain = prompt | llm | StrOutputParser()
+    return prompt | llm | StrOutputParser()
 
-    diagram_code = chain.invoke({
-        "syntax_guide": PLANTUML_SYNTAX_GUIDE,
-        "yaml_def": yaml_def,
-        "analysis": analysis,
-    })
+def plantuml_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+    """
+    Generates PlantUML code from YAML + analysis using your syntax guide (unchanged).
+    """
+    request = _diagram_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    diagram_code = _diagram_chain(llm).invoke(inputs)
+    return _level_update(level, component_target, "diagram", diagram_code)
+
+async def aplantuml_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+    """Async twin of `plantuml_diagram_node`."""
+    request = _diagram_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    diagram_code = await _diagram_chain(llm).ainvoke(inputs)
+    return _level_update(level, component_target, "diagram", diagram_code)
 
-    updated_model = copy.deepcopy(c4_model)
-    if level == "context":
-        updated_model["context"]["diagram"] = diagram_code
-    elif level == "container":
-        updated_model["containers"]["diagram"] = diagram_code
-    elif level == "component" and component_target:
-        updated_model.setdefault("components", {})
-        updated_model["components"].setdefault(component_target, {})
-        updated_model["components"][component_target]["diagram"] = diagram_code
 
-    return {"c4_model": updated_model}
+def _rendered_diagram(inputs: Dict[str, str]) -> Optional[str]:
+    try:
+        return render_plantuml(inputs["yaml_def"])
+    except ValueError as e:
+        print(f"--- ⚠️ Could not render diagram from YAML ({e}); falling back to the LLM ---")
+        return None
+
+def render_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+    """
+    Renders the diagram locally from the level's YAML (`render.render_plantuml`);
+    the LLM diagram chain only runs when the YAML is not a usable C4 definition.
+    """
+    request = _diagram_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    diagram_code = _rendered_diagram(inputs)
+    if diagram_code is None:
+        diagram_code = _diagram_chain(llm).invoke(inputs)
+    return _level_update(level, component_target, "diagram", diagram_code)
+
+async def arender_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+    """Async twin of `render_diagram_node`."""
+    request = _diagram_request(state)
+    if request is None:
+        return {}
+    level, component_target, inputs = request
+    diagram_code = _rendered_diagram(inputs)
+    if diagram_code is None:
+        diagram_code = await _diagram_chain(llm).ainvoke(inputs)
+    return _level_update(level, component_target, "diagram", diagram_code)
+
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*$", re.MULTILINE)
+_PLANTUML_BLOCK_RE = re.compile(r"@startuml.*?@enduml", re.DOTALL)
+
+def split_yaml_and_plantuml(text: str) -> Tuple[str, str]:
+    """
+    Splits a fused YAML + PlantUML response into (yaml_definition, diagram).
+    The diagram is the `@startuml ... @enduml` block; everything else, minus any
+    markdown fences, is the YAML. Either part is "" when it cannot be found.
+    """
+    match = _PLANTUML_BLOCK_RE.search(text or "")
+    diagram = match.group(0).strip() if match else ""
+    rest = (text or "")[:match.start()] + (text or "")[match.end():] if match else (text or "")
+    yaml_definition = _FENCE_RE.sub("", rest).strip()
+    return yaml_definition, diagram
+
+def _fused_chain(llm: BaseChatModel):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", FUSED_PERSONA_PROMPT),
+        ("human", FUSED_HUMAN_MESSAGE_PROMPT),
+    ])
+    return prompt | llm | StrOutputParser()
+
+def _fused_result(level: str, component_target: Optional[str], yaml_definition: str, diagram: str) -> Dict:
+    return {"c4_model": merge_c4_model(
+        _level_update(level, component_target, "yaml_definition", yaml_definition)["c4_model"],
+        _level_update(level, component_target, "diagram", diagram)["c4_model"],
+    )}
+
+def _fallback_diagram_inputs(state: State, level: str, component_target: Optional[str], yaml_definition: str) -> Dict[str, str]:
+    with_yaml = _apply_update(state, _level_update(level, component_target, "yaml_definition", yaml_definition))
+    return _diagram_request(with_yaml)[2]
+
+def yaml_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+    """
+    Fused alternative to `yaml_structure_node` + `plantuml_diagram_node`: one call
+    returns both the YAML and the diagram, which `split_yaml_and_plantuml` separates.
+    A missing part falls back to its dedicated chain; a level whose YAML already
+    exists only gets its diagram.
+    """
+    request = _yaml_request(state)
+    if request is None:
+        return plantuml_diagram_node(state, llm)
+    level, component_target, inputs = request
+    print(f"--- 🧩 Generating {level.capitalize()} Level YAML + Diagram in one call ---")
+    yaml_definition, diagram = split_yaml_and_plantuml(
+        _fused_chain(llm).invoke({**inputs, "syntax_guide": PLANTUML_SYNTAX_GUIDE}))
+    if not yaml_definition:
+        print("--- ⚠️ Fused output had no YAML; generating it separately ---")
+        yaml_definition = _yaml_chain(llm).invoke(inputs)
+    if not diagram:
+        print("--- ⚠️ Fused output had no diagram; generating it separately ---")
+        diagram = _diagram_chain(llm).invoke(_fallback_diagram_inputs(state, level, component_target, yaml_definition))
+    return _fused_result(level, component_target, yaml_definition, diagram)
+
+async def ayaml_diagram_node(state: State, llm: BaseChatModel) -> Dict:
+    """Async twin of `yaml_diagram_node`."""
+    request = _yaml_request(state)
+    if request is None:
+        return await aplantuml_diagram_node(state, llm)
+    level, component_target, inputs = request
+    print(f"--- 🧩 Generating {level.capitalize()} Level YAML + Diagram in one call ---")
+    yaml_definition, diagram = split_yaml_and_plantuml(
+        await _fused_chain(llm).ainvoke({**inputs, "syntax_guide": PLANTUML_SYNTAX_GUIDE}))
+    if not yaml_definition:
+        print("--- ⚠️ Fused output had no YAML; generating it separately ---")
+        yaml_definition = await _yaml_chain(llm).ainvoke(inputs)
+    if not diagram:
+        print("--- ⚠️ Fused output had no diagram; generating it separately ---")
+        diagram = await _diagram_chain(llm).ainvoke(_fallback_diagram_inputs(state, level, component_target, yaml_definition))
+    return _fused_result(level, component_target, yaml_definition, diagram)
 
 
 # ============================================================================
@@ -334,25 +723,89 @@ def populate_component_queue_node(state: State) -> Dict:
     print("--- ⚙️ Populating Component Queue ---")
     container_yaml = state["c4_model"]["containers"]["yaml_definition"]
     try:
-        data = yaml.safe_load(container_yaml) or {}
+        data = load_c4_yaml(container_yaml)
         names = [e["name"] for e in data.get("elements", []) if e.get("type") == "container"]
         print(f"Found containers to process: {names}")
-        return {"component_queue": deque(names)}
-    except yaml.YAMLError as e:
-        print(f"Error parsing YAML: {e}")
-        return {}
+        components = state["c4_model"].get("components") or {}
+        done = [n for n in names if all((components.get(n) or {}).get(f) for f in ("analysis", "yaml_definition", "diagram"))]
+        if done:
+            print(f"Skipping containers with complete components: {done}")
+        return {"component_queue": deque(n for n in names if n not in done)}
+    except ValueError as e:
+        print(f"--- ❌ Container YAML is unusable, no components will be generated: {e} ---")
+        return {"component_queue": deque()}
 
 def complete_component_node(state: State) -> Dict:
     """
     Pops the completed component from the front of the queue.
     """
     print("--- ✅ Completing Component Task ---")
-    queue = state["component_queue"]
+    queue = deque(state["component_queue"] or ())
     if queue:
         finished = queue.popleft()
         print(f"Finished processing: {finished}")
     return {"component_queue": queue}
 
+def _component_sub_state(state: State, name: str) -> State:
+    # Each worker sees only its own container (plus any artifacts it already has),
+    # so the step nodes pick it up via the queue head.
+    existing = (state["c4_model"].get("components") or {}).get(name)
+    return {
+        **state,
+        "c4_model": {**state["c4_model"], "components": {name: existing} if existing else {}},
+        "component_queue": deque([name]),
+    }
+
+def _with_components(names: List[str], results: List[LevelOutput]) -> Dict:
+    return {"c4_model": {"components": dict(zip(names, results))}, "component_queue": deque()}
+
+def fan_out_components_node(
+    state: State,
+    steps: Sequence[Callable[[State], Dict]],
+    max_parallel: int = 4,
+) -> Dict:
+    """
+    Runs the per-container chain (analysis -> YAML -> diagram) for every queued
+    container concurrently and merges the results into c4_model["components"].
+    """
+    queue: deque[str] = state.get("component_queue") or deque()
+    names = list(queue)
+    print(f"--- 🔀 Fanning out component generation for {len(names)} containers (max parallel: {max_parallel}) ---")
+
+    def run_container(name: str) -> LevelOutput:
+        sub_state = _component_sub_state(state, name)
+        for step in steps:
+            sub_state = _apply_update(sub_state, step(sub_state))
+        print(f"Finished processing: {name}")
+        return sub_state["c4_model"].get("components", {}).get(name, {})
+
+    with ContextThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        results = list(pool.map(run_container, names))
+
+    return _with_components(names, results)
+
+async def afan_out_components_node(
+    state: State,
+    steps: Sequence[Callable[[State], Awaitable[Dict]]],
+    max_parallel: int = 4,
+) -> Dict:
+    """Async twin of `fan_out_components_node`; bounds concurrency with a semaphore instead of threads."""
+    queue: deque[str] = state.get("component_queue") or deque()
+    names = list(queue)
+    print(f"--- 🔀 Fanning out component generation for {len(names)} containers (max parallel: {max_parallel}) ---")
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+
+    async def run_container(name: str) -> LevelOutput:
+        async with semaphore:
+            sub_state = _component_sub_state(state, name)
+            for step in steps:
+                sub_state = _apply_update(sub_state, await step(sub_state))
+        print(f"Finished processing: {name}")
+        return sub_state["c4_model"].get("components", {}).get(name, {})
+
+    results = await asyncio.gather(*(run_container(name) for name in names))
+    return _with_components(names, list(results))
+
 def should_process_components(state: State) -> str:
     """
     Router that checks the component queue to decide whether to continue or end.
@@ -365,6 +818,22 @@ def should_process_components(state: State) -> str:
         print("Queue is empty. Finishing workflow.")
         return "end_workflow"
 
+def entry_router(state: State) -> str:
+    """
+    Graph entry: starts at the first missing artifact, so a state seeded from
+    existing results only regenerates what is missing. A fresh state starts at "analysis".
+    """
+    model = state["c4_model"]
+    for level in ("context", "containers"):
+        data = model.get(level) or {}
+        if not data.get("analysis"):
+            return "analysis"
+        if not data.get("yaml_definition"):
+            return "yaml"
+        if not data.get("diagram"):
+            return "diagram"
+    return "populate_queue"
+
 def post_diagram_router(state: State) -> str:
     """
     Decide next step after any diagram is generated.
@@ -378,40 +847,44 @@ def post_diagram_router(state: State) -> str:
         return "complete_component"
     
 
-def collaborative_analysis_node(state: State, llm: BaseChatModel, collab_rounds: int = 2) -> Dict:
+def _collaboration_request(
+    state: State,
+    llm: BaseChatModel,
+    collab_rounds: int,
+    subgraphs: Optional[Dict[str, Tuple[List[Agent], object]]] = None,
+):
     """
-    This node acts as a smart orchestrator. It determines the C4 level,
-    selects the correct expert team, and invokes the appropriate subgraph.
+    Selects the level and team, and picks (or builds) the subgraph plus its input.
+    Returns None when the queued component already has an analysis.
     """
-    print("--- 🚀 Orchestrating Collaborative Analysis ---")
-
-    # 1. Determine the current C4 level and select the appropriate team
-    level = ""
+    # 1. Determine the current C4 level
     component_target = None
-    active_team: List[Agent] = [] # The team we will use for the subgraph
 
     if not state["c4_model"].get("context"):
         level = "context"
-        active_team = build_context_team()
         print("--- Selecting Team: Context Level ---")
     elif not state["c4_model"].get("containers"):
         level = "container"
-        active_team = build_container_team()
         print("--- Selecting Team: Container Level ---")
     else:
         level = "component"
-        active_team = build_component_team()
         if state.get("component_queue"):
             component_target = state["component_queue"][0]
+        if state["c4_model"].get("components", {}).get(component_target, {}).get("analysis"):
+            print(f"--- ⏭️ Reusing existing Component Level Analysis for '{component_target}' ---")
+            return None
         print(f"--- Selecting Team: Component Level for '{component_target}' ---")
 
-    # 2. Create the specialized subgraph using the selected team
-    # <<< CHANGED: Pass the active_team to the factory >>>
-    analysis_subgraph = create_collaboration_graph(
-        llm=llm,
-        team=active_team,
-        max_rounds=collab_rounds
-    )
+    # 2. Reuse the precompiled team subgraph, or build one for this call
+    if subgraphs is not None:
+        active_team, analysis_subgraph = subgraphs[level]
+    else:
+        active_team = TEAM_BUILDERS[level]()
+        analysis_subgraph = create_collaboration_graph(
+            llm=llm,
+            team=active_team,
+            max_rounds=collab_rounds
+        )
 
     # 3. Prepare the input for the subgraph
     subgraph_level_description = f"component '{component_target}'" if component_target else level
@@ -423,26 +896,47 @@ def collaborative_analysis_node(state: State, llm: BaseChatModel, collab_rounds:
         "max_rounds": collab_rounds,
         "team": active_team, # <<< CRITICAL: Pass the team into the subgraph's state
     }
-
-    # 4. Invoke the subgraph
     print(f"--- Invoking subgraph for: {subgraph_level_description} ---")
-    subgraph_output = analysis_subgraph.invoke(subgraph_input)
-    final_analysis = subgraph_output['final_analysis']
+    return level, component_target, analysis_subgraph, subgraph_input
 
-    # 5. Update the main graph's state with the result
+def _with_collaborative_analysis(level: str, component_target: Optional[str], final_analysis: str) -> Dict:
+    """Writes the subgraph's final report into the main graph's C4 model."""
+    subgraph_level_description = f"component '{component_target}'" if component_target else level
     print(f"--- ✅ Subgraph complete. Updating main C4 model for: {subgraph_level_description} ---")
-    updated_model = copy.deepcopy(state['c4_model'])
-
-    if level == "context":
-        updated_model["context"] = {"analysis": final_analysis}
-    elif level == "container":
-        updated_model["containers"] = {"analysis": final_analysis}
-    elif level == "component" and component_target:
-        if "components" not in updated_model:
-            updated_model["components"] = {}
-        if component_target not in updated_model["components"]:
-            updated_model["components"][component_target] = {}
-        updated_model["components"][component_target]["analysis"] = final_analysis
+    if level == "component" and component_target:
         print(f"--- Successfully updated analysis for component: '{component_target}' ---")
-
-    return {"c4_model": updated_model}
+    return _level_update(level, component_target, "analysis", final_analysis)
+
+def collaborative_analysis_node(
+    state: State,
+    llm: BaseChatModel,
+    collab_rounds: int = 2,
+    subgraphs: Optional[Dict[str, Tuple[List[Agent], object]]] = None,
+) -> Dict:
+    """
+    This node acts as a smart orchestrator. It determines the C4 level,
+    selects the correct expert team, and invokes the appropriate subgraph.
+    Pass `subgraphs` from `build_collaboration_subgraphs` to skip per-call compilation.
+    """
+    print("--- 🚀 Orchestrating Collaborative Analysis ---")
+    request = _collaboration_request(state, llm, collab_rounds, subgraphs)
+    if request is None:
+        return {}
+    level, component_target, analysis_subgraph, subgraph_input = request
+    subgraph_output = analysis_subgraph.invoke(subgraph_input)
+    return _with_collaborative_analysis(level, component_target, subgraph_output['final_analysis'])
+
+async def acollaborative_analysis_node(
+    state: State,
+    llm: BaseChatModel,
+    collab_rounds: int = 2,
+    subgraphs: Optional[Dict[str, Tuple[List[Agent], object]]] = None,
+) -> Dict:
+    """Async twin of `collaborative_analysis_node`; the subgraph runs via `ainvoke`."""
+    print("--- 🚀 Orchestrating Collaborative Analysis ---")
+    request = _collaboration_request(state, llm, collab_rounds, subgraphs)
+    if request is None:
+        return {}
+    level, component_target, analysis_subgraph, subgraph_input = request
+    subgraph_output = await analysis_subgraph.ainvoke(subgraph_input)
+    return _with_collaborative_analysis(level, component_target, subgraph_output['final_analysis'])
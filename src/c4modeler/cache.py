@@ -0,0 +1,260 @@
+# src/cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from .utils import ensure_dir
+
+
+def _generation_to_dict(generation: Generation) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"text": generation.text, "generation_info": generation.generation_info}
+    if isinstance(generation, ChatGeneration):
+        data["message"] = message_to_dict(generation.message)
+    return data
+
+def _generation_from_dict(data: Dict[str, Any]) -> Generation:
+    if "message" in data:
+        message = messages_from_dict([data["message"]])[0]
+        return ChatGeneration(message=message, generation_info=data.get("generation_info"))
+    return Generation(text=data.get("text", ""), generation_info=data.get("generation_info"))
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent, content-addressed cache for chat model responses.
+
+    Entries are keyed by a SHA-256 of LangChain's `llm_string` (model name,
+    temperature and the other invocation params, including any structured-output
+    schema or bound tools) and the serialized prompt messages. Pass an instance
+    to `get_llm(..., cache=...)`; a re-run with the same brief, model and
+    temperature is then served locally.
+
+    - `ttl_seconds`: entries older than this are treated as misses and dropped.
+    - `max_entries`: least recently used entries are evicted beyond this size.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "data/cache/llm_cache.sqlite",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        self.path = Path(path)
+        ensure_dir(self.path.parent)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        try:
+            return [_generation_from_dict(item) for item in json.loads(value)]
+        except Exception as e:
+            print(f"Warning: dropping unreadable LLM cache entry {key[:12]}: {e}")
+            with self._lock:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self._key(prompt, llm_string)
+        value = json.dumps([_generation_to_dict(generation) for generation in return_val], default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    # Local SQLite calls are fast enough to run inline instead of in an executor.
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear(**kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current number of stored entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PlantUMLCompileCache:
+    """
+    Persistent cache of PlantUML compile results (ok + error log, and the
+    rendered diagram with `store_output=True`).
+
+    Entries are keyed by a SHA-256 of the diagram source, the PlantUML jar's
+    content hash (`utils.plantuml_jar_version`) and the output format, so a new
+    jar or format never reuses old results. Pass an instance as `plantuml_cache`
+    to `evaluate_compilation_success` / `run_full_evaluation` /
+    `run_all_evaluations` (or as `cache` to `utils.compile_plantuml_batch`);
+    unchanged diagrams are then not compiled again.
+
+    - `ttl_seconds` / `max_entries`: as for `SQLiteLLMCache`.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "data/cache/plantuml_cache.sqlite",
+        store_output: bool = False,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        self.path = Path(path)
+        ensure_dir(self.path.parent)
+        self.store_output = store_output
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plantuml_cache ("
+            " key TEXT PRIMARY KEY,"
+            " ok INTEGER NOT NULL,"
+            " log TEXT NOT NULL,"
+            " output TEXT,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS plantuml_cache_accessed ON plantuml_cache (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(code: str, jar_version: str, out_format: str) -> str:
+        return hashlib.sha256(f"{jar_version}\x00{out_format}\x00{code}".encode("utf-8")).hexdigest()
+
+    def lookup(self, code: str, jar_version: str, out_format: str) -> Optional[Dict[str, Any]]:
+        """{"ok", "log"} (+ "output" when stored) for a compiled source, or None."""
+        key = self._key(code, jar_version, out_format)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ok, log, output, created_at FROM plantuml_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            ok, log, output, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM plantuml_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE plantuml_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        result: Dict[str, Any] = {"ok": bool(ok), "log": log}
+        if output is not None:
+            result["output"] = output
+        return result
+
+    def update(self, code: str, jar_version: str, out_format: str, result: Dict[str, Any]) -> None:
+        key = self._key(code, jar_version, out_format)
+        output = result.get("output") if self.store_output else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plantuml_cache (key, ok, log, output, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, int(bool(result.get("ok"))), result.get("log") or "", output, now, now),
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM plantuml_cache WHERE key IN ("
+                    " SELECT key FROM plantuml_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM plantuml_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current number of stored entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM plantuml_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -8,25 +8,26 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
-import yaml
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 from .types import C4Model
 from .llm import get_llm
-from .utils import setup_plantuml, compile_plantuml_java, PLANTUML_JAR_PATH
+from .utils import setup_plantuml, compile_plantuml_batch, PLANTUML_JAR_PATH
+from .validation import load_c4_yaml
 
 # ==============================================================================
 # 0. Small shared helpers
 # ==============================================================================
 
 def _parse_yaml_safe(yaml_string: Optional[str]) -> Dict:
-    """Safely parses a YAML string, returning an empty dict on error."""
+    """Parses a YAML string after local cleanup (fences, tabs, commentary), returning an empty dict on error."""
     if not yaml_string or not isinstance(yaml_string, str) or not yaml_string.strip():
         return {}
     try:
-        return yaml.safe_load(yaml_string) or {}
-    except yaml.YAMLError:
+        return load_c4_yaml(yaml_string)
+    except ValueError as e:
+        print(f"Warning: could not parse YAML definition, scoring it as empty: {e}")
         return {}
 
 def _extract_element_names(parsed_yaml: Dict, element_types: List[str]) -> Set[str]:
@@ -42,19 +43,8 @@ def _extract_element_names(parsed_yaml: Dict, element_types: List[str]) -> Set[s
 # 1) PlantUML compilation success (using your utils helpers)
 # ==============================================================================
 
-def evaluate_compilation_success(c4_model: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Calculates the percentage of diagrams that compile and captures detailed diagnostics.
-    Uses `java -jar <PLANTUML_JAR_PATH> -failfast2 -tsvg ...` via utils.compile_plantuml_java.
-    """
-    print("🤖 Evaluating Metric: PlantUML Compilation Success...")
-    ready = setup_plantuml()
-    if not ready:
-        return {"error": "PlantUML runner not available (download/setup failed)."}
-
-    jar_path = str(PLANTUML_JAR_PATH)
-
-    # Collect diagrams
+def _collect_diagrams(c4_model: Dict[str, Any]) -> List[Dict[str, str]]:
+    """[{"source": "1_Context" | "2_Containers" | "3_Component_<name>", "code": ...}] for the model's diagrams."""
     diagrams: List[Dict[str, str]] = []
     ctx = c4_model.get("context", {}) or {}
     cnt = c4_model.get("containers", {}) or {}
@@ -67,25 +57,89 @@ def evaluate_compilation_success(c4_model: Dict[str, Any]) -> Dict[str, Any]:
     for name, comp in comps.items():
         if isinstance(comp, dict) and comp.get("diagram"):
             diagrams.append({"source": f"3_Component_{name}", "code": comp["diagram"]})
+    return diagrams
+
 
+def compile_model_diagrams(
+    c4_models: Dict[str, Dict[str, Any]],
+    plantuml_cache: Optional[Any] = None,
+    check_only: bool = True,
+) -> Optional[Dict[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Compiles the diagrams of several models (e.g. all runs of an experiment) in
+    one PlantUML JVM. Returns {model_key: {source: {"ok": bool, "log": str}}},
+    to pass to `evaluate_compilation_success` / `run_full_evaluation`, or None
+    when PlantUML is not available. `plantuml_cache` (a
+    `cache.PlantUMLCompileCache`) skips diagrams compiled before; `check_only`
+    as in `evaluate_compilation_success`.
+    """
+    if not setup_plantuml():
+        return None
+    owners: List[Tuple[str, str]] = []
+    batch: List[Dict[str, str]] = []
+    for key, c4_model in c4_models.items():
+        for d in _collect_diagrams(c4_model or {}):
+            if (d["code"] or "").strip():
+                owners.append((key, d["source"]))
+                batch.append({"source": d["source"], "code": d["code"].strip()})
+
+    compiled: Dict[str, Dict[str, Dict[str, Any]]] = {key: {} for key in c4_models}
+    results = compile_plantuml_batch(batch, PLANTUML_JAR_PATH, out_format="svg", cache=plantuml_cache, check_only=check_only)
+    for (key, source), result in zip(owners, results):
+        compiled[key][source] = {"ok": result["ok"], "log": result["log"]}
+    return compiled
+
+
+def evaluate_compilation_success(
+    c4_model: Dict[str, Any],
+    compiled: Optional[Dict[str, Dict[str, Any]]] = None,
+    plantuml_cache: Optional[Any] = None,
+    check_only: bool = True,
+) -> Dict[str, Any]:
+    """
+    Calculates the percentage of diagrams that compile and captures detailed diagnostics.
+    All diagrams are syntax-checked in one `java -jar <PLANTUML_JAR_PATH> -checkonly ...`
+    run (utils.compile_plantuml_batch), without layout or rendering.
+    `check_only=False` renders them to SVG instead: slower, but it also
+    catches errors that only show up during layout.
+    Pass `compiled` (this model's entry from `compile_model_diagrams`) to reuse
+    results from a batch over several models, and `plantuml_cache` (a
+    `cache.PlantUMLCompileCache`) to skip unchanged diagrams.
+    """
+    print("🤖 Evaluating Metric: PlantUML Compilation Success...")
+    diagrams = _collect_diagrams(c4_model)
     if not diagrams:
         return {"metric": "Compilation Success Rate", "score": 0, "successful": 0, "total": 0, "details": []}
 
+    to_compile = [
+        {"source": d["source"], "code": d["code"].strip()}
+        for d in diagrams
+        if (d["code"] or "").strip() and (compiled is None or d["source"] not in compiled)
+    ]
+    if to_compile:
+        if not setup_plantuml():
+            return {"error": "PlantUML runner not available (download/setup failed)."}
+        compiled = {**(compiled or {}), **{
+            r["source"]: {"ok": r["ok"], "log": r["log"]}
+            for r in compile_plantuml_batch(
+                to_compile, PLANTUML_JAR_PATH, out_format="svg", cache=plantuml_cache, check_only=check_only,
+            )
+        }}
+
     successful = 0
     details: List[Dict[str, Any]] = []
 
     for d in diagrams:
-        code = (d["code"] or "").strip()
-        if not code:
+        if not (d["code"] or "").strip():
             details.append({"source": d["source"], "status": "Failed - Empty", "error": "Diagram content empty."})
             continue
 
-        ok, log, _ = compile_plantuml_java(code, jar_path, out_format="svg")
-        if ok:
+        result = compiled[d["source"]]
+        if result["ok"]:
             successful += 1
             details.append({"source": d["source"], "status": "Compiled", "error": None})
         else:
-            details.append({"source": d["source"], "status": "Failed - Syntax Error", "error": (log or "").strip()})
+            details.append({"source": d["source"], "status": "Failed - Syntax Error", "error": (result["log"] or "").strip()})
 
     total = len(diagrams)
     score = round((successful / total) * 100, 2) if total else 0.0
@@ -238,7 +292,7 @@ def evaluate_definitional_consistency(
         return {"score": 0, "details": {"error": f"Missing YAML definition or diagram for {element_type}."}}
 
     try:
-        definition_data = yaml.safe_load(yaml_definition_str) or {}
+        definition_data = load_c4_yaml(yaml_definition_str)
 
         # Try explicit keyed list first
         items = definition_data.get(element_type)
@@ -761,17 +815,25 @@ def run_full_evaluation(
     system_brief: str,
     c4_model: Dict[str, Any],
     judge_model_name: Any,   # keep Any to align with your original usage
-    temperature: float = 0.0
+    temperature: float = 0.0,
+    llm_cache: Optional[Any] = None,
+    compiled: Optional[Dict[str, Dict[str, Any]]] = None,
+    plantuml_cache: Optional[Any] = None,
+    check_only: bool = True,
 ) -> Dict[str, Any]:
     """
     Runs a structured, level-aware evaluation of a C4 model, providing the
     correct context and source of truth to each metric.
+    `compiled` reuses PlantUML results from `compile_model_diagrams`, and
+    `plantuml_cache` (a `cache.PlantUMLCompileCache`) skips unchanged diagrams.
+    `check_only=False` renders diagrams instead of only syntax-checking them
+    (see `evaluate_compilation_success`).
     """
     print("\n" + "="*50)
     print(f"🏁 STARTING FULL C4 MODEL EVALUATION (Judge: {judge_model_name}) 🏁")
     print("="*50 + "\n")
 
-    judge_llm = get_llm(model_name=judge_model_name, temperature=temperature)
+    judge_llm = get_llm(model_name=judge_model_name, temperature=temperature, cache=llm_cache)
     report: Dict[str, Any] = {
         "evaluationMetadata": {
             "judgeModel": judge_model_name,
@@ -782,7 +844,7 @@ def run_full_evaluation(
 
     # Layer 1: Holistic structural checks
     print("--- Running Holistic Structural Checks ---")
-    report["compilationSuccess"] = evaluate_compilation_success(c4_model)
+    report["compilationSuccess"] = evaluate_compilation_success(c4_model, compiled, plantuml_cache, check_only)
     report["abstractionAdherence"] = evaluate_abstraction_adherence(c4_model)
     report["missingInformation"] = check_c4_completeness(c4_model)
     report["emergentNamingConsistency"] = evaluate_emergent_naming_consistency(c4_model)
@@ -1,23 +1,27 @@
 # src/experiments.py
 from __future__ import annotations
 
+import hashlib
 import json
 import re
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from langgraph.checkpoint.memory import InMemorySaver
 
-from .graph import create_c4_modeler_graph
+from .graph import create_c4_modeler_graph, create_sqlite_checkpointer
 from .types import State
 from .utils import (
     save_c4_artifacts,
+    save_c4_artifact_updates,
+    load_c4_model_from_artifacts,
     save_all_evaluation_reports,
     format_evaluation_report,   # if you don’t have this yet, a minimal fallback is below
     zip_folder_with_increment,
 )
-from .evaluation import run_full_evaluation
+from .evaluation import compile_model_diagrams, run_full_evaluation
+from .instrumentation import MetricsCollector
 
 # --- Brief loaders (read YAML files as raw strings) --------------------------
 from pathlib import Path
@@ -70,11 +74,27 @@ def _initial_state(brief_str: str) -> State:
 
 def run_all_experiments(
     app_instance,
-    system_briefs_data: Dict[str, str]
+    system_briefs_data: Dict[str, str],
+    resume: bool = False,
+    results_dir: Optional[str | Path] = None,
+    keep_models: bool = True,
+    collect_metrics: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Runs the LangGraph C4 model generation for each system brief (verbatim
     behavior from your notebook), and collects results.
+
+    With `resume=True` each brief gets a stable thread_id (slug + hash of the
+    brief), so with a durable checkpointer (`build_app_from_config(checkpoint_db=...)`,
+    one database per experiment config) finished briefs are read back from their
+    checkpoints and interrupted ones continue from the last completed node.
+
+    With `results_dir` every node's artifacts are written to
+    `<results_dir>/<thread_id>/` as soon as it finishes (recorded as
+    "artifacts_dir"); `keep_models=False` then drops the final models from the
+    returned list and `run_all_evaluations` reads them back from disk.
+    `collect_metrics=True` stores a per-node / per-agent timing and token
+    summary under "metrics" (and writes metrics.json/csv to the artifacts dir).
     """
     experiment_results: List[Dict[str, Any]] = []
     print("\n--- 🚀 Starting C4 Model Generation Experiments ---")
@@ -86,28 +106,59 @@ def run_all_experiments(
 
         initial_state = _initial_state(system_brief_content)
 
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         brief_name_slug = re.sub(r'[^a-zA-Z0-9-]', '', brief_name.replace(" ", "-").lower())
-        current_thread_id = f"{timestamp}-{brief_name_slug}-{uuid.uuid4().hex[:8]}"
+        if resume:
+            brief_hash = hashlib.sha256(system_brief_content.encode("utf-8")).hexdigest()[:12]
+            current_thread_id = f"{brief_name_slug}-{brief_hash}"
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            current_thread_id = f"{timestamp}-{brief_name_slug}-{uuid.uuid4().hex[:8]}"
         config = {"configurable": {"thread_id": current_thread_id}, "recursion_limit": 200}
 
         print(f"\n--- LangGraph Thread ID: {current_thread_id} ---")
 
+        graph_input: Optional[State] = initial_state
+        if resume:
+            snapshot = app_instance.get_state(config)
+            if snapshot.values:
+                graph_input = None
+                if snapshot.next:
+                    print(f"--- ↩️ Resuming at {list(snapshot.next)} ---")
+                else:
+                    print("--- ⏭️ Already complete, reusing checkpointed state ---")
+
+        artifacts_dir = Path(results_dir) / current_thread_id if results_dir else None
+
+        collector = MetricsCollector(name=brief_name) if collect_metrics else None
+        if collector is not None:
+            config["callbacks"] = [collector]
+
         # Stream execution (prints node names as in your notebook)
-        for event in app_instance.stream(initial_state, config):
+        for event in app_instance.stream(graph_input, config):
             print("\n" + "="*40)
             print(f"Node: {list(event.keys())[0]}")
             print("="*40)
+            if artifacts_dir is not None:
+                for update in event.values():
+                    if isinstance(update, dict) and update.get("c4_model"):
+                        save_c4_artifact_updates(artifacts_dir, update["c4_model"])
 
         final_state_snapshot = app_instance.get_state(config)
         final_c4_model = final_state_snapshot.values["c4_model"]
 
-        experiment_results.append({
+        run: Dict[str, Any] = {
             "brief_name": brief_name,
             "thread_id": current_thread_id,
             "system_brief_content": system_brief_content,
-            "final_c4_model": final_c4_model,
-        })
+            "final_c4_model": final_c4_model if keep_models or artifacts_dir is None else None,
+        }
+        if artifacts_dir is not None:
+            run["artifacts_dir"] = str(artifacts_dir)
+        if collector is not None:
+            run["metrics"] = collector.summary()
+            if artifacts_dir is not None:
+                collector.write(artifacts_dir)
+        experiment_results.append(run)
 
         print(f"\n--- 🎉 C4 Model Generation Complete for {brief_name}! ---")
         print(f"Final state for thread '{current_thread_id}' retrieved and stored.")
@@ -119,17 +170,34 @@ def run_all_experiments(
 def build_app_from_config(
     model_name: str,
     analysis_method: str,
-    collab_rounds: int | None
+    collab_rounds: int | None,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    llm_cache=None,
+    checkpoint_db: Optional[str | Path] = None,
+    collab_memory: str = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: str = "llm",
+    hedge=None,
 ):
     """
     Builds a LangGraph app exactly like your notebook did, using your graph factory.
+    `checkpoint_db` swaps the in-memory checkpointer for a SQLite file, so
+    `run_all_experiments(..., resume=True)` survives a crash or restart.
     """
-    checkpointer = InMemorySaver()
+    checkpointer = create_sqlite_checkpointer(checkpoint_db) if checkpoint_db else InMemorySaver()
     app = create_c4_modeler_graph(
         checkpointer=checkpointer,
         model_name=model_name,
         analysis_method=analysis_method,       # "simple" | "collaborative"
         collab_rounds=collab_rounds or 2,      # default when None
+        component_fan_out=component_fan_out,
+        max_parallel_components=max_parallel_components,
+        llm_cache=llm_cache,                   # e.g. cache.SQLiteLLMCache()
+        collab_memory=collab_memory,           # "full" | "window" | "summary"
+        collab_window=collab_window,
+        diagram_method=diagram_method,         # "llm" | "fused" | "render"
+        hedge=hedge,                           # e.g. hedging.HedgePolicy(fallback_model="gpt-4o-mini")
     )
     return app
 
@@ -146,9 +214,14 @@ def run_all_evaluations(
     save_all_evaluation_reports_func=save_all_evaluation_reports,
     format_evaluation_report_func=format_evaluation_report,
     judge_model_name: str = "gemini-2.5-flash-preview-05-20",
+    llm_cache=None,
+    plantuml_cache=None,
+    check_only: bool = True,
 ) -> Dict[str, Any]:
     """
     Loops over one experiment’s runs, saves artifacts, evaluates, aggregates, and returns a summary.
+    `plantuml_cache` (a `cache.PlantUMLCompileCache`) skips diagrams compiled in earlier evaluations,
+    and `check_only=False` renders diagrams instead of only syntax-checking them.
     """
     print("\n" + "="*60)
     print(f"🔬 Running Evaluations (Judge: {judge_model_name}) for experiment: {experiment_config.get('name')}")
@@ -157,11 +230,26 @@ def run_all_evaluations(
     all_reports: Dict[str, Dict[str, Any]] = {}   # thread_id -> full evaluation report
     summaries: Dict[str, Any] = {}                # thread_id -> summarized view (pretty)
 
+    models: Dict[str, Any] = {}
+    for run in experiment_results:
+        c4_model = run.get("final_c4_model")
+        if c4_model is None and run.get("artifacts_dir"):
+            c4_model = load_c4_model_from_artifacts(run["artifacts_dir"])
+        models[run["thread_id"]] = c4_model
+
+    # All diagrams of the experiment compile in one PlantUML JVM (only the built-in evaluator takes the results).
+    compiled = None
+    if run_full_evaluation_func is run_full_evaluation:
+        print("\n--- Compiling all PlantUML diagrams of the experiment ---")
+        compiled = compile_model_diagrams(
+            {k: m for k, m in models.items() if m}, plantuml_cache=plantuml_cache, check_only=check_only,
+        )
+
     for run in experiment_results:
         brief_name = run["brief_name"]
         thread_id = run["thread_id"]
         brief_text = run["system_brief_content"]
-        c4_model = run["final_c4_model"]
+        c4_model = models[thread_id]
 
         print(f"\n--- Evaluating: {brief_name} (thread {thread_id}) ---")
 
@@ -170,11 +258,19 @@ def run_all_evaluations(
         save_c4_artifacts_func(out_dir, c4_model)
 
         # 2) Run the full evaluation (compilation, abstraction, cross-level, judge-based, etc.)
+        extra_kwargs = {"llm_cache": llm_cache} if llm_cache is not None else {}
+        if compiled is not None and thread_id in compiled:
+            extra_kwargs["compiled"] = compiled[thread_id]
+        if plantuml_cache is not None:
+            extra_kwargs["plantuml_cache"] = plantuml_cache
+        if run_full_evaluation_func is run_full_evaluation:
+            extra_kwargs["check_only"] = check_only
         report = run_full_evaluation_func(
             system_brief=brief_text,
             c4_model=c4_model,
             judge_model_name=judge_model_name,
             temperature=0.0,
+            **extra_kwargs,
         )
 
         all_reports[thread_id] = report
@@ -0,0 +1,384 @@
+# src/fake_llm.py
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_json_schema
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .prompts import (
+    ANALYSIS_PERSONA_PROMPT,
+    FUSED_PERSONA_PROMPT,
+    PLANTUML_PERSONA_PROMPT,
+    YAML_PERSONA_PROMPT,
+)
+from .render import render_plantuml
+
+
+# `fake:<preset>` models; any field can be overridden in the name, e.g. "fake:fast?error_rate=0.1&n_containers=6".
+FAKE_PRESETS: Dict[str, Dict[str, Any]] = {
+    "fake:instant": {"latency": 0.0, "latency_sigma": 0.0},
+    "fake:fast": {"latency": 0.05, "latency_sigma": 0.3},
+    "fake:realistic": {"latency": 2.0, "latency_sigma": 0.5, "tail_probability": 0.05, "tail_multiplier": 5.0},
+    "fake:flaky": {"latency": 0.2, "latency_sigma": 0.5, "error_rate": 0.1},
+}
+
+
+class FakeProviderError(RuntimeError):
+    """Synthetic provider failure; `status_code` makes it look like a 429 / 5xx to the retry layer."""
+
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"Synthetic provider error {status_code}")
+        self.status_code = status_code
+
+
+# Process-wide totals across all fake models, so a benchmark can separate simulated LLM time from its own.
+_usage_lock = threading.Lock()
+_usage: Dict[str, Any] = {"calls": 0, "errors": 0, "simulated_s": 0.0, "input_tokens": 0, "output_tokens": 0}
+
+def fake_usage() -> Dict[str, Any]:
+    """Calls, synthetic errors, seconds spent in simulated latency and tokens reported, since the last reset."""
+    with _usage_lock:
+        return {**_usage, "simulated_s": round(_usage["simulated_s"], 6)}
+
+
+def reset_fake_usage() -> None:
+    with _usage_lock:
+        _usage.update(calls=0, errors=0, simulated_s=0.0, input_tokens=0, output_tokens=0)
+
+
+def _count_usage(delay: float, error: Optional[int], result: Optional[ChatResult] = None) -> None:
+    usage = result.generations[0].message.usage_metadata if result is not None else None
+    with _usage_lock:
+        _usage["calls"] += 1
+        _usage["errors"] += error is not None
+        _usage["simulated_s"] += delay
+        if usage:
+            _usage["input_tokens"] += usage["input_tokens"]
+            _usage["output_tokens"] += usage["output_tokens"]
+
+
+# ==================
+# Canned architecture
+# ==================
+
+_PEOPLE = [("End User", "Uses the system to get their work done."), ("Administrator", "Configures and operates the system.")]
+_EXTERNALS = [("Payment Provider", "Processes card payments."), ("Email Service", "Delivers notification emails.")]
+_CONTAINERS = [
+    ("Web Application", "React"), ("API Service", "Python, FastAPI"), ("Background Worker", "Python, Celery"),
+    ("Database", "PostgreSQL"), ("Message Broker", "RabbitMQ"), ("Admin Portal", "Vue.js"),
+    ("Search Index", "OpenSearch"), ("Notification Service", "Node.js"),
+]
+_COMPONENT_ROLES = [("Controller", "REST controller"), ("Service", "Domain service"), ("Repository", "Data access layer")]
+
+_SYSTEM_RE = re.compile(r"\*\*System:\*\* *([^\n*]+)")
+_BRIEF_NAME_RE = re.compile(r"(?im)^\s*(?:system_?name|name|title)\s*:\s*['\"]?([^'\"\n]+?)['\"]?\s*$")
+_TARGET_RES = [
+    re.compile(r"Components of the '([^']+)' container"),
+    re.compile(r"inside the '([^']+)' container"),
+    re.compile(r"analysis for the component '([^']+)'"),
+]
+_LEVEL_RES = [
+    re.compile(r"C4 \*\*(context|container|component)\*\* level"),
+    re.compile(r"analysis for the (context|container|component)\b"),
+]
+
+
+def _container_names(n: int) -> List[Tuple[str, str]]:
+    return [_CONTAINERS[i] if i < len(_CONTAINERS) else (f"Service {i + 1}", "Go") for i in range(max(1, n))]
+
+
+def _system_name(text: str) -> str:
+    match = _SYSTEM_RE.search(text) or _BRIEF_NAME_RE.search(text)
+    return match.group(1).strip() if match else "Sample System"
+
+
+def _target(text: str) -> str:
+    for pattern in _TARGET_RES:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return _CONTAINERS[0][0]
+
+
+def _level(text: str, default: str = "context") -> str:
+    for pattern in _LEVEL_RES:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return default
+
+
+def _yaml_level(text: str) -> str:
+    """The level of the template a YAML prompt asks for (reference YAMLs of other levels come before it)."""
+    after = text.split("YAML Template", 1)[-1]
+    match = re.search(r"(?m)^\s*level:\s*(context|container|component)", after)
+    return match.group(1) if match else _level(text)
+
+
+def c4_definition(level: str, system: str = "Sample System", n_containers: int = 3, container: Optional[str] = None) -> Dict[str, Any]:
+    """A definition with the structure of the level's YAML template; levels are mutually consistent."""
+    people = [{"type": "person", "name": n, "description": d} for n, d in _PEOPLE]
+    externals = [{"type": "externalSystem", "name": n, "description": d} for n, d in _EXTERNALS]
+
+    if level == "context":
+        return {
+            "level": "context",
+            "scope": f"System Context diagram for {system}",
+            "system": {"name": system, "description": f"{system} lets its users manage their work online."},
+            "elements": people + externals,
+            "relationships": [
+                {"source": "End User", "destination": system, "description": "Uses", "technology": "HTTPS"},
+                {"source": "Administrator", "destination": system, "description": "Administers", "technology": "HTTPS"},
+                {"source": system, "destination": "Payment Provider", "description": "Charges payments via", "technology": "REST/HTTPS"},
+                {"source": system, "destination": "Email Service", "description": "Sends emails via", "technology": "SMTP"},
+            ],
+        }
+
+    if level == "container":
+        containers = _container_names(n_containers)
+        names = [n for n, _ in containers]
+        relationships = [
+            {"source": "End User", "destination": names[0], "description": "Uses", "technology": "HTTPS"},
+            {"source": "Administrator", "destination": names[0], "description": "Administers", "technology": "HTTPS"},
+        ]
+        relationships += [
+            {"source": a, "destination": b, "description": "Calls", "technology": "JSON/HTTPS"}
+            for a, b in zip(names, names[1:])
+        ]
+        relationships += [
+            {"source": names[-1], "destination": "Payment Provider", "description": "Charges payments via", "technology": "REST/HTTPS"},
+            {"source": names[-1], "destination": "Email Service", "description": "Sends emails via", "technology": "SMTP"},
+        ]
+        return {
+            "level": "container",
+            "scope": f"Container diagram for {system}",
+            "system": {"name": system},
+            "elements": people + externals + [
+                {"type": "container", "name": n, "technology": t, "description": f"Hosts the {n.lower()} of {system}."}
+                for n, t in containers
+            ],
+            "relationships": relationships,
+        }
+
+    container = container or _CONTAINERS[0][0]
+    components = [(f"{container} {role}", technology) for role, technology in _COMPONENT_ROLES]
+    return {
+        "level": "component",
+        "scope": f"Component diagram for the {container} container",
+        "parentContainer": {"name": container},
+        "elements": [
+            {"type": "component", "name": n, "technology": t, "description": f"{t} of the {container}."}
+            for n, t in components
+        ],
+        "relationships": [
+            {"source": a, "destination": b, "description": "Invokes"}
+            for (a, _), (b, _) in zip(components, components[1:])
+        ],
+    }
+
+
+def _analysis_text(level: str, system: str, n_containers: int, container: str) -> str:
+    if level == "context":
+        body = (
+            f"{system} is used by " + " and ".join(f"the {n} ({d.lower()})" for n, d in _PEOPLE) + ". "
+            "It depends on " + " and ".join(f"the {n} ({d.lower()})" for n, d in _EXTERNALS) + "."
+        )
+    elif level == "container":
+        body = "The system is split into these containers: " + "; ".join(
+            f"{n} ({t})" for n, t in _container_names(n_containers)) + ". Each container calls the next over JSON/HTTPS."
+    else:
+        body = f"Components of the '{container}' container: " + "; ".join(
+            f"{container} {role} ({t})" for role, t in _COMPONENT_ROLES) + ". Each component invokes the next."
+    return f"**System:** {system}\n\n## {level.capitalize()} level analysis\n\n{body}\n"
+
+
+# ===================
+# Structured output
+# ===================
+
+_RUBRIC_CRITERIA = ["Completeness", "Correctness", "Plausibility", "Clarity & Naming"]
+
+def canned_instance(schema: Dict[str, Any], key: str = "") -> Any:
+    """A value that satisfies a JSON schema (first enum value, ratings of 4, one array item, ...)."""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        properties = schema.get("properties") or {}
+        if not properties and schema.get("title") == "QualitativeRubricEvaluation":
+            return {c: {"score": 4, "justification": f"Synthetic {c.lower()} assessment."} for c in _RUBRIC_CRITERIA}
+        return {name: canned_instance(sub, name) for name, sub in properties.items()}
+    if kind == "array":
+        return [canned_instance(schema.get("items") or {"type": "string"}, key)]
+    if kind == "integer":
+        return min(4, schema.get("maximum", 4))
+    if kind == "number":
+        return 4.0
+    if kind == "boolean":
+        return True
+    return f"Synthetic {key or 'value'}."
+
+
+# ==========
+# The model
+# ==========
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for a provider model: recognizes the pipeline's prompts and
+    answers with canned but structurally valid analysis, template-shaped YAML
+    and C4-PlantUML, after a simulated latency.
+
+    - latency: median seconds per call, log-normally spread by `latency_sigma`;
+      with probability `tail_probability` a call takes `tail_multiplier` times longer.
+    - error_rate: share of calls failing with a `FakeProviderError` whose
+      `status_code` is drawn from `error_statuses` (429 / 503 by default).
+    - Token usage is reported as characters / `chars_per_token`; `output_tokens`
+      pads free-text answers to about that many tokens.
+    - n_containers: containers in the container-level YAML.
+    """
+
+    model: str = "fake:fast"
+    temperature: float = 0.0
+    max_retries: int = 0
+    latency: float = 0.05
+    latency_sigma: float = 0.3
+    tail_probability: float = 0.0
+    tail_multiplier: float = 5.0
+    error_rate: float = 0.0
+    error_statuses: List[int] = Field(default_factory=lambda: [429, 503])
+    chars_per_token: float = 4.0
+    output_tokens: Optional[int] = None
+    n_containers: int = 3
+    seed: Optional[int] = None
+
+    _rng: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-c4"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "n_containers": self.n_containers, "output_tokens": self.output_tokens}
+
+    # --- simulation ---------------------------------------------------------
+
+    def _draw(self) -> Tuple[float, Optional[int]]:
+        """(seconds to wait, error status or None) for one call."""
+        delay = self.latency * math.exp(self._rng.gauss(0.0, self.latency_sigma)) if self.latency > 0 else 0.0
+        if self.tail_probability and self._rng.random() < self.tail_probability:
+            delay *= self.tail_multiplier
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return delay * 0.1, self._rng.choice(self.error_statuses)  # errors come back quickly
+        return delay, None
+
+    def _tokens(self, text: str) -> int:
+        return max(1, math.ceil(len(text) / self.chars_per_token))
+
+    def _pad(self, text: str) -> str:
+        if not self.output_tokens:
+            return text
+        target = int(self.output_tokens * self.chars_per_token)
+        filler = " The design keeps responsibilities separated and interfaces explicit."
+        while len(text) < target:
+            text += filler
+        return text[:target] if len(text) > target else text
+
+    # --- answers --------------------------------------------------------------
+
+    def answer(self, messages: List[BaseMessage], structured_schema: Optional[Dict[str, Any]] = None) -> str:
+        """The canned reply for a prompt (the text of all messages, system message first)."""
+        if structured_schema is not None:
+            return json.dumps(canned_instance(structured_schema))
+        system = str(messages[0].content) if messages else ""
+        text = "\n".join(str(m.content) for m in messages)
+        system_name = _system_name(text)
+
+        if FUSED_PERSONA_PROMPT in system:
+            yaml_text = self._yaml_text(_yaml_level(text), text, system_name)
+            return f"{yaml_text}\n{render_plantuml(yaml_text)}"
+        if YAML_PERSONA_PROMPT in system:
+            level = _level(text) if "failed validation" in text else _yaml_level(text)
+            return self._yaml_text(level, text, system_name)
+        if PLANTUML_PERSONA_PROMPT in system:
+            match = re.search(r"```yaml\n(.*?)```", text, re.DOTALL)
+            try:
+                return render_plantuml(match.group(1) if match else "")
+            except ValueError:
+                return render_plantuml(self._yaml_text("context", text, system_name))
+        if "extract key entities" in system:
+            return "\n".join([system_name] + [n for n, _ in _PEOPLE + _EXTERNALS])
+        if "meticulous verifier" in system:
+            return "\n".join("YES" for line in text.splitlines() if line.strip().startswith("- "))
+        if "running minutes" in system:
+            return self._pad(f"**System:** {system_name}\n\nMinutes: the team agreed on the elements proposed so far for the {_level(text)} level.")
+
+        level = _level(text)
+        analysis = _analysis_text(level, system_name, self.n_containers, _target(text))
+        if ANALYSIS_PERSONA_PROMPT in system or "Scribe-Agent" in system:
+            return self._pad(analysis)
+        # A collaboration agent's turn.
+        return self._pad(f"I support this {level}-level proposal.\n\n{analysis}")
+
+    def _yaml_text(self, level: str, text: str, system_name: str) -> str:
+        definition = c4_definition(level, system_name, self.n_containers, _target(text))
+        return yaml.safe_dump(definition, sort_keys=False, allow_unicode=True)
+
+    def _result(self, messages: List[BaseMessage], structured_schema: Optional[Dict[str, Any]]) -> ChatResult:
+        content = self.answer(messages, structured_schema)
+        input_tokens = sum(self._tokens(str(m.content)) for m in messages)
+        output_tokens = self._tokens(content)
+        message = AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+            response_metadata={"model_name": self.model},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, structured_schema=None, **kwargs) -> ChatResult:
+        delay, error = self._draw()
+        time.sleep(delay)
+        if error is not None:
+            _count_usage(delay, error)
+            raise FakeProviderError(error)
+        result = self._result(messages, structured_schema)
+        _count_usage(delay, None, result)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, structured_schema=None, **kwargs) -> ChatResult:
+        delay, error = self._draw()
+        await asyncio.sleep(delay)
+        if error is not None:
+            _count_usage(delay, error)
+            raise FakeProviderError(error)
+        result = self._result(messages, structured_schema)
+        _count_usage(delay, None, result)
+        return result
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any):
+        """JSON-schema dicts and pydantic models; the canned instance goes through the normal call path."""
+        is_model = isinstance(schema, type) and issubclass(schema, BaseModel)
+        json_schema = convert_to_json_schema(schema) if is_model else schema
+        parser = PydanticOutputParser(pydantic_object=schema) if is_model else JsonOutputParser()
+        bound = self.bind(structured_schema=json_schema)
+        if not include_raw:
+            return bound | parser
+        return bound | RunnableLambda(lambda raw: {"raw": raw, "parsed": parser.invoke(raw), "parsing_error": None})
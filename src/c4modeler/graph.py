@@ -1,31 +1,52 @@
 # src/graph.py
 from __future__ import annotations
 
-from typing import Literal, Type, List
+from typing import Any, Dict, Literal, Optional, Tuple, Type, List
 from collections import deque
 import copy
 import functools
+import sqlite3
+import threading
+from pathlib import Path
 
 from langgraph.graph import StateGraph, END
+from langchain_core.caches import BaseCache
 from langchain_core.messages import HumanMessage
 
 from .llm import get_llm, ModelName
+from .hedging import HedgePolicy
 from .types import State
+from .utils import ensure_dir
 from .models import Agent
 from .agents import (
+    dual_node,
     analysis_agent_node,
+    aanalysis_agent_node,
     yaml_structure_node,
+    ayaml_structure_node,
     plantuml_diagram_node,
+    aplantuml_diagram_node,
+    yaml_diagram_node,
+    ayaml_diagram_node,
+    render_diagram_node,
+    arender_diagram_node,
+    validate_yaml_node,
+    avalidate_yaml_node,
     populate_component_queue_node,
     complete_component_node,
+    fan_out_components_node,
+    afan_out_components_node,
     should_process_components,
+    entry_router,
     post_diagram_router,
     create_collaboration_graph,
+    build_collaboration_subgraphs,
     # team builders use your exact personas from prompts.py
     build_context_team,
     build_container_team,
     build_component_team,
     collaborative_analysis_node,
+    acollaborative_analysis_node,
 )
 
 def create_c4_modeler_graph(
@@ -33,45 +54,121 @@ def create_c4_modeler_graph(
     model_name: ModelName = "gemini-1.5-flash-latest",
     analysis_method: Literal["simple", "collaborative"] = "collaborative",
     collab_rounds: int = 2,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    llm_cache: Optional[BaseCache] = None,
+    collab_memory: Literal["full", "window", "summary"] = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: Literal["llm", "fused", "render"] = "llm",
+    hedge: Optional[HedgePolicy] = None,
 ) -> Type[StateGraph]:
     """
     Factory function to build the C4 Modeler workflow.
+
+    With `component_fan_out=True` the component level runs every container's
+    analysis -> YAML -> diagram chain concurrently (at most
+    `max_parallel_components` at a time) instead of one container per loop.
+
+    LLM nodes carry both sync and async implementations, so the compiled app
+    supports `invoke`/`stream` as well as `ainvoke`/`astream`.
+    `llm_cache` (e.g. `cache.SQLiteLLMCache`) is attached to the model.
+
+    `collab_memory` bounds what each collaboration turn is sent ("full",
+    "window" with `collab_window` turns, or "summary"); see
+    `agents.create_collaboration_graph`.
+
+    `diagram_method="fused"` produces each level's YAML and PlantUML with a
+    single call (`agents.yaml_diagram_node`) instead of one call each;
+    `"render"` draws the diagram locally from the YAML (`render.render_plantuml`)
+    and only calls the LLM when the YAML is unusable.
+
+    Every level's YAML passes through a "validate_yaml" step
+    (`agents.validate_yaml_node`): it is cleaned and checked locally, and the
+    LLM is only asked for a targeted repair when that is not enough.
+
+    `hedge` (a `hedging.HedgePolicy`) duplicates slow LLM calls to a fallback
+    model (or the same one) and keeps whichever answers first.
     """
     print(f"--- 🏗️ Building graph with model: '{model_name}' and analysis: '{analysis_method}' ---")
 
-    llm = get_llm(model_name=model_name)
+    llm = get_llm(model_name=model_name, cache=llm_cache, hedge=hedge)
 
     workflow = StateGraph(State)
 
     if analysis_method == "simple":
-        bound_analysis_agent_node = functools.partial(analysis_agent_node, llm=llm)
-        workflow.add_node("analysis", bound_analysis_agent_node)
+        bound_analysis_node = functools.partial(analysis_agent_node, llm=llm)
+        abound_analysis_node = functools.partial(aanalysis_agent_node, llm=llm)
     else:
-        workflow.add_node("analysis", 
-                          lambda s: collaborative_analysis_node(s, llm=llm, collab_rounds=collab_rounds))
-
-    # --- Remaining nodes & edges (unchanged) ---
-    bound_yaml_structure_node = functools.partial(yaml_structure_node, llm=llm)
-    bound_plantuml_diagram_node = functools.partial(plantuml_diagram_node, llm=llm)
+        # Team subgraphs are compiled once here and reused for every container.
+        subgraphs = build_collaboration_subgraphs(
+            llm=llm, collab_rounds=collab_rounds, memory=collab_memory, window=collab_window)
+        bound_analysis_node = functools.partial(
+            collaborative_analysis_node, llm=llm, collab_rounds=collab_rounds, subgraphs=subgraphs)
+        abound_analysis_node = functools.partial(
+            acollaborative_analysis_node, llm=llm, collab_rounds=collab_rounds, subgraphs=subgraphs)
+    workflow.add_node("analysis", dual_node(bound_analysis_node, abound_analysis_node, name="analysis"))
 
-    workflow.add_node("yaml", bound_yaml_structure_node)
-    workflow.add_node("diagram", bound_plantuml_diagram_node)
+    # --- Per-level artifact steps after the analysis: (node name, sync, async) ---
+    validate_step = ("validate_yaml", functools.partial(validate_yaml_node, llm=llm), functools.partial(avalidate_yaml_node, llm=llm))
+    if diagram_method == "fused":
+        artifact_steps = [
+            ("yaml_diagram", functools.partial(yaml_diagram_node, llm=llm), functools.partial(ayaml_diagram_node, llm=llm)),
+            validate_step,
+        ]
+        diagram_step = "yaml_diagram"
+    else:
+        diagram_nodes = (
+            (render_diagram_node, arender_diagram_node) if diagram_method == "render"
+            else (plantuml_diagram_node, aplantuml_diagram_node)
+        )
+        artifact_steps = [
+            ("yaml", functools.partial(yaml_structure_node, llm=llm), functools.partial(ayaml_structure_node, llm=llm)),
+            validate_step,
+            ("diagram", functools.partial(diagram_nodes[0], llm=llm), functools.partial(diagram_nodes[1], llm=llm)),
+        ]
+        diagram_step = "diagram"
+    for name, step, astep in artifact_steps:
+        workflow.add_node(name, dual_node(step, astep, name=name))
     workflow.add_node("populate_queue", populate_component_queue_node)
     workflow.add_node("complete_component", complete_component_node)
+    if component_fan_out:
+        workflow.add_node("components", dual_node(
+            functools.partial(
+                fan_out_components_node,
+                steps=[bound_analysis_node, *(step for _, step, _ in artifact_steps)],
+                max_parallel=max_parallel_components,
+            ),
+            functools.partial(
+                afan_out_components_node,
+                steps=[abound_analysis_node, *(astep for _, _, astep in artifact_steps)],
+                max_parallel=max_parallel_components,
+            ),
+            name="components",
+        ))
 
-    workflow.set_entry_point("analysis")
-    workflow.add_edge("analysis", "yaml")
-    workflow.add_edge("yaml", "diagram")
+    first_step, last_step = artifact_steps[0][0], artifact_steps[-1][0]
+    # Fresh runs start at "analysis"; states seeded from saved artifacts skip what they already have.
+    workflow.set_conditional_entry_point(entry_router, {
+        "analysis": "analysis",
+        "yaml": first_step,
+        "diagram": diagram_step,
+        "populate_queue": "populate_queue",
+    })
+    workflow.add_edge("analysis", first_step)
+    for (src, _, _), (dst, _, _) in zip(artifact_steps, artifact_steps[1:]):
+        workflow.add_edge(src, dst)
 
-    workflow.add_conditional_edges("diagram", post_diagram_router, {
+    workflow.add_conditional_edges(last_step, post_diagram_router, {
         "analysis": "analysis",
         "populate_queue": "populate_queue",
         "complete_component": "complete_component",
     })
     workflow.add_conditional_edges(
         "populate_queue", should_process_components,
-        {"process_component": "analysis", "end_workflow": END},
+        {"process_component": "components" if component_fan_out else "analysis", "end_workflow": END},
     )
+    if component_fan_out:
+        workflow.add_edge("components", END)
     workflow.add_conditional_edges(
         "complete_component", should_process_components,
         {"process_component": "analysis", "end_workflow": END},
@@ -80,3 +177,77 @@ def create_c4_modeler_graph(
     app = workflow.compile(checkpointer=checkpointer)
     print("✅ LangGraph C4 Modeler compiled successfully with checkpointer!")
     return app
+
+
+# ============================================================================
+# Compiled-graph cache (reused across briefs with the same configuration)
+# ============================================================================
+
+# key -> ((checkpointer, llm_cache), compiled app); both are held so their id()s stay unique.
+_graph_cache: Dict[Tuple, Tuple[Any, Any]] = {}
+_graph_cache_lock = threading.Lock()
+
+def get_c4_modeler_graph(
+    checkpointer,
+    model_name: ModelName = "gemini-1.5-flash-latest",
+    analysis_method: Literal["simple", "collaborative"] = "collaborative",
+    collab_rounds: int = 2,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    llm_cache: Optional[BaseCache] = None,
+    collab_memory: Literal["full", "window", "summary"] = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: Literal["llm", "fused", "render"] = "llm",
+    hedge: Optional[HedgePolicy] = None,
+):
+    """
+    Cached `create_c4_modeler_graph`: returns the compiled app for this
+    configuration (and checkpointer / LLM cache instances), building it on first use.
+    """
+    key = (
+        model_name, analysis_method, collab_rounds,
+        component_fan_out, max_parallel_components, collab_memory, collab_window, diagram_method, hedge,
+        id(checkpointer), id(llm_cache),
+    )
+    with _graph_cache_lock:
+        entry = _graph_cache.get(key)
+        if entry is None:
+            app = create_c4_modeler_graph(
+                checkpointer=checkpointer,
+                model_name=model_name,
+                analysis_method=analysis_method,
+                collab_rounds=collab_rounds,
+                component_fan_out=component_fan_out,
+                max_parallel_components=max_parallel_components,
+                llm_cache=llm_cache,
+                collab_memory=collab_memory,
+                collab_window=collab_window,
+                diagram_method=diagram_method,
+                hedge=hedge,
+            )
+            entry = ((checkpointer, llm_cache), app)
+            _graph_cache[key] = entry
+        return entry[1]
+
+def create_sqlite_checkpointer(db_path: str | Path = "data/checkpoints/c4modeler.sqlite"):
+    """
+    File-backed checkpointer: every completed node is persisted to `db_path`,
+    so an interrupted run can be resumed on the same thread_id.
+    Requires the optional `langgraph-checkpoint-sqlite` package.
+    """
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "SQLite checkpointing needs the optional 'langgraph-checkpoint-sqlite' package: "
+            "pip install langgraph-checkpoint-sqlite"
+        ) from e
+    db_path = Path(db_path)
+    ensure_dir(db_path.parent)
+    # The saver serializes access with its own lock, so one connection can be shared by worker threads.
+    return SqliteSaver(sqlite3.connect(str(db_path), check_same_thread=False))
+
+def clear_graph_cache() -> None:
+    """Drops every cached compiled app (and the LLM clients they hold)."""
+    with _graph_cache_lock:
+        _graph_cache.clear()
@@ -0,0 +1,287 @@
+# src/hedging.py
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Type
+
+from langchain_core.callbacks import AsyncCallbackManager, AsyncCallbackManagerForLLMRun, CallbackManager
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from pydantic import PrivateAttr
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    When a call has been running longer than the `percentile` of the model's
+    recent latencies (and at least `min_delay` seconds), a duplicate is sent to
+    `fallback_model` (or the same model) and the first answer wins.
+    """
+    percentile: float = 0.95
+    fallback_model: Optional[str] = None   # a MODEL_PROVIDERS key; None hedges on the same model
+    min_samples: int = 10                  # latencies observed before hedging starts
+    min_delay: float = 1.0                 # never hedge earlier than this (seconds)
+    window: int = 200                      # recent latencies kept per model
+
+
+# ==================
+# Latency & outcomes
+# ==================
+
+class _ModelStats:
+    def __init__(self, window: int) -> None:
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.counters = {"calls": 0, "hedged": 0, "hedge_won": 0, "primary_won": 0, "failed": 0}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, _ModelStats] = {}
+
+
+def _model_stats(model_key: str, window: int) -> _ModelStats:
+    with _stats_lock:
+        if model_key not in _stats:
+            _stats[model_key] = _ModelStats(window)
+        return _stats[model_key]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def hedge_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Per model: calls, how many hedges fired, how many of those the hedge won
+    (vs. the original call), and the current p50/p95 latency.
+    """
+    with _stats_lock:
+        items = list(_stats.items())
+    out: Dict[str, Dict[str, Any]] = {}
+    for model_key, stats in items:
+        with _stats_lock:
+            latencies = list(stats.latencies)
+            counters = dict(stats.counters)
+        out[model_key] = {
+            **counters,
+            "hedge_rate": round(counters["hedged"] / counters["calls"], 4) if counters["calls"] else 0.0,
+            "hedge_win_rate": round(counters["hedge_won"] / counters["hedged"], 4) if counters["hedged"] else 0.0,
+            "p50_s": round(_percentile(latencies, 0.5), 3) if latencies else None,
+            "p95_s": round(_percentile(latencies, 0.95), 3) if latencies else None,
+        }
+    return out
+
+
+def reset_hedge_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+# ========
+# Hedger
+# ========
+
+_executor_lock = threading.Lock()
+_executors: Dict[str, ContextThreadPoolExecutor] = {}
+_classes_lock = threading.Lock()
+_classes: Dict[Type[BaseChatModel], Type[BaseChatModel]] = {}
+
+def _pool(name: str) -> ContextThreadPoolExecutor:
+    """Thread pool for sync "primary" calls or for "hedge" calls; separate so hedges never queue behind primaries."""
+    with _executor_lock:
+        if name not in _executors:
+            _executors[name] = ContextThreadPoolExecutor(max_workers=32, thread_name_prefix=f"c4-hedge-{name}")
+        return _executors[name]
+
+
+class _Started:
+    """Runs `fn` and records when it started running (not when it was queued)."""
+
+    def __init__(self, fn: Callable[[], ChatResult]) -> None:
+        self.fn = fn
+        self.event = threading.Event()
+        self.at = 0.0
+
+    def __call__(self) -> ChatResult:
+        self.at = time.perf_counter()
+        self.event.set()
+        return self.fn()
+
+
+class Hedger:
+    """Per-model hedging state: the policy, the fallback model and the latency window."""
+
+    def __init__(self, model_key: str, policy: HedgePolicy, fallback: Optional[BaseChatModel] = None) -> None:
+        self.model_key = model_key
+        self.policy = policy
+        self.fallback = fallback
+        self.stats = _model_stats(model_key, policy.window)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history."""
+        with _stats_lock:
+            latencies = list(self.stats.latencies)
+        if len(latencies) < max(1, self.policy.min_samples):
+            return None
+        return max(self.policy.min_delay, _percentile(latencies, self.policy.percentile))
+
+    def count(self, key: str) -> None:
+        with _stats_lock:
+            self.stats.counters[key] += 1
+
+    def observe(self, started: float) -> None:
+        with _stats_lock:
+            self.stats.latencies.append(time.perf_counter() - started)
+
+    def use_fallback(self, kwargs: Dict[str, Any]) -> bool:
+        # Bound tools / response formats are provider-specific, so those calls hedge on the same model.
+        return self.fallback is not None and not kwargs
+
+
+def _as_result(message: Any) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _child_callbacks(run_manager: Any) -> Any:
+    """Callbacks for a fallback call, nested under the hedged LLM run so metrics attribute it to the node."""
+    if run_manager is None:
+        return None
+    manager_class = AsyncCallbackManager if isinstance(run_manager, AsyncCallbackManagerForLLMRun) else CallbackManager
+    return manager_class(
+        handlers=run_manager.inheritable_handlers,
+        inheritable_handlers=run_manager.inheritable_handlers,
+        parent_run_id=run_manager.run_id,
+        tags=run_manager.inheritable_tags,
+        inheritable_tags=run_manager.inheritable_tags,
+        metadata=run_manager.inheritable_metadata,
+        inheritable_metadata=run_manager.inheritable_metadata,
+    )
+
+
+def hedged_model_class(model_class: Type[BaseChatModel]) -> Type[BaseChatModel]:
+    """
+    A subclass of `model_class` that hedges `_generate`/`_agenerate` according
+    to the `Hedger` set on the instance (`model._hedger`). It is still the
+    provider's class, so structured output and caching work as before.
+
+    Sync calls run on shared thread pools (one for primaries, one for hedges)
+    and the losing request is abandoned (its result is discarded); async calls
+    cancel the losing task. Latency is measured from when a call starts running.
+    """
+    with _classes_lock:
+        if model_class in _classes:
+            return _classes[model_class]
+
+    def _hedge_call(self, messages, stop, run_manager, kwargs) -> Callable[[], ChatResult]:
+        hedger: Hedger = self._hedger
+        if hedger.use_fallback(kwargs):
+            callbacks = _child_callbacks(run_manager)
+            return lambda: _as_result(hedger.fallback.invoke(messages, stop=stop, config={"callbacks": callbacks}))
+
+        def same_model() -> ChatResult:
+            if self.rate_limiter:
+                self.rate_limiter.acquire(blocking=True)
+            return model_class._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+        return same_model
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        hedger: Optional[Hedger] = self._hedger
+        if hedger is None:
+            return model_class._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+        hedger.count("calls")
+        started = time.perf_counter()
+        delay = hedger.delay()
+        if delay is None:
+            result = model_class._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+            hedger.observe(started)
+            return result
+
+        run = _Started(lambda: model_class._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs))
+        primary = _pool("primary").submit(run)
+        # Time spent queued for a thread is not provider latency: the hedge clock starts with the call.
+        run.event.wait()
+        started = run.at
+        done, _ = wait([primary], timeout=max(0.0, delay - (time.perf_counter() - started)))
+        if done:
+            hedger.observe(started)
+            return primary.result()
+
+        hedger.count("hedged")
+        hedge = _pool("hedge").submit(_hedge_call(self, messages, stop, run_manager, kwargs))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    hedger.count("hedge_won" if future is hedge else "primary_won")
+                    hedger.observe(started)
+                    return future.result()
+                error = future.exception()
+        hedger.count("failed")
+        raise error
+
+    async def _ahedge_call(self, messages, stop, run_manager, kwargs) -> ChatResult:
+        hedger: Hedger = self._hedger
+        if hedger.use_fallback(kwargs):
+            callbacks = _child_callbacks(run_manager)
+            return _as_result(await hedger.fallback.ainvoke(messages, stop=stop, config={"callbacks": callbacks}))
+        if self.rate_limiter:
+            await self.rate_limiter.aacquire(blocking=True)
+        return await model_class._agenerate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        hedger: Optional[Hedger] = self._hedger
+        if hedger is None:
+            return await model_class._agenerate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+        hedger.count("calls")
+        started = time.perf_counter()
+        delay = hedger.delay()
+        if delay is None:
+            result = await model_class._agenerate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+            hedger.observe(started)
+            return result
+
+        primary = asyncio.ensure_future(model_class._agenerate(self, messages, stop=stop, run_manager=run_manager, **kwargs))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                hedger.observe(started)
+                return primary.result()
+
+            hedger.count("hedged")
+            hedge = asyncio.ensure_future(_ahedge_call(self, messages, stop, run_manager, kwargs))
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedger.count("hedge_won" if task is hedge else "primary_won")
+                        hedger.observe(started)
+                        return task.result()
+                    error = task.exception()
+            hedger.count("failed")
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    hedged = type(f"Hedged{model_class.__name__}", (model_class,), {
+        "__module__": __name__,
+        "__doc__": f"{model_class.__name__} with hedged requests.",
+        "_hedger": PrivateAttr(default=None),
+        "_generate": _generate,
+        "_agenerate": _agenerate,
+    })
+    with _classes_lock:
+        return _classes.setdefault(model_class, hedged)
@@ -0,0 +1,232 @@
+# src/instrumentation.py
+from __future__ import annotations
+
+import csv
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .utils import ensure_dir, save_json
+
+
+_RECORD_FIELDS = [
+    "kind", "node", "path", "started_at", "wall_s", "llm_s",
+    "llm_calls", "input_tokens", "output_tokens", "retries", "error",
+]
+
+
+def _usage_from_result(response: LLMResult) -> Dict[str, int]:
+    """Input/output tokens from the message `usage_metadata`, falling back to provider `llm_output`."""
+    usage = {"input_tokens": 0, "output_tokens": 0}
+    for generations in response.generations:
+        for generation in generations:
+            meta = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if meta:
+                usage["input_tokens"] += int(meta.get("input_tokens") or 0)
+                usage["output_tokens"] += int(meta.get("output_tokens") or 0)
+    if not any(usage.values()):
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        usage["input_tokens"] = int(token_usage.get("prompt_tokens") or 0)
+        usage["output_tokens"] = int(token_usage.get("completion_tokens") or 0)
+    return usage
+
+
+class MetricsCollector(BaseCallbackHandler):
+    """
+    Callback handler that records, for every graph node execution and every
+    collaboration agent turn: wall time, time spent waiting on the LLM, LLM
+    calls, input/output tokens (from response metadata) and retries.
+
+    Pass it in the run config (`{"callbacks": [collector]}`), or use
+    `collect_metrics=True` on the pipeline functions, which write
+    `metrics.json` / `metrics.csv` next to the artifacts.
+
+    LLM time and tokens are attributed to every enclosing node, so an agent
+    turn also counts towards the "analysis" node that ran its team. Concurrent
+    calls (component fan-out) are summed, so `llm_s` can exceed `wall_s`.
+    """
+
+    run_inline = True  # keep async runs on the event loop instead of an executor
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self._nodes: Dict[UUID, Dict[str, Any]] = {}
+        self._llm_started: Dict[UUID, float] = {}
+        self._t0: Optional[float] = None
+        self._t1: Optional[float] = None
+
+    # --- node runs -----------------------------------------------------------
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        now = time.perf_counter()
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        ns = metadata.get("langgraph_checkpoint_ns") or ""
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            if self._t0 is None:
+                self._t0 = now
+            if not node or node.startswith("__") or kwargs.get("name") != node:
+                return
+            parent = self._nodes.get(parent_run_id) if parent_run_id else None
+            if parent is not None and parent["_ns"] == ns:
+                return  # the node's own runnable nested inside its task run
+            segments = [part.split(":", 1)[0] for part in ns.split("|") if part]
+            self._nodes[run_id] = {
+                "kind": "agent" if len(segments) > 1 else "node",
+                "node": node,
+                "path": "/".join(segments) or node,
+                "started_at": round(now - self._t0, 4),
+                "wall_s": 0.0,
+                "llm_s": 0.0,
+                "llm_calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "retries": 0,
+                "error": "",
+                "_ns": ns,
+                "_start": now,
+            }
+
+    def _finish_node(self, run_id: UUID, error: str = "") -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._t1 = now
+            record = self._nodes.pop(run_id, None)
+            if record is None:
+                return
+            record["wall_s"] = round(now - record.pop("_start"), 4)
+            record.pop("_ns")
+            record["llm_s"] = round(record["llm_s"], 4)
+            record["error"] = error
+            self.records.append(record)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_node(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_node(run_id, error=f"{type(error).__name__}: {error}")
+
+    # --- LLM calls & retries -------------------------------------------------
+
+    def _enclosing_nodes(self, run_id: Optional[UUID]) -> List[Dict[str, Any]]:
+        found = []
+        while run_id is not None:
+            if run_id in self._nodes:
+                found.append(self._nodes[run_id])
+            run_id = self._parents.get(run_id)
+        return found
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            self._llm_started[run_id] = time.perf_counter()
+
+    def on_llm_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, parent_run_id=parent_run_id)
+
+    def _finish_llm(self, run_id: UUID, usage: Dict[str, int]) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            started = self._llm_started.pop(run_id, None)
+            elapsed = now - started if started is not None else 0.0
+            for record in self._enclosing_nodes(run_id):
+                record["llm_s"] += elapsed
+                record["llm_calls"] += 1
+                record["input_tokens"] += usage["input_tokens"]
+                record["output_tokens"] += usage["output_tokens"]
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_llm(run_id, _usage_from_result(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_llm(run_id, {"input_tokens": 0, "output_tokens": 0})
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        with self._lock:
+            for record in self._enclosing_nodes(run_id if run_id in self._parents else parent_run_id):
+                record["retries"] += 1
+
+    # --- reporting -----------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals for the run plus per-node and per-agent aggregates."""
+        with self._lock:
+            records = list(self.records)
+            total_wall = (self._t1 - self._t0) if self._t0 is not None and self._t1 is not None else 0.0
+
+        def aggregate(kind: str) -> Dict[str, Dict[str, Any]]:
+            out: Dict[str, Dict[str, Any]] = {}
+            for r in records:
+                if r["kind"] != kind:
+                    continue
+                agg = out.setdefault(r["node"], {
+                    "runs": 0, "wall_s": 0.0, "llm_s": 0.0, "llm_calls": 0,
+                    "input_tokens": 0, "output_tokens": 0, "retries": 0, "errors": 0,
+                })
+                agg["runs"] += 1
+                for key in ("wall_s", "llm_s", "llm_calls", "input_tokens", "output_tokens", "retries"):
+                    agg[key] += r[key]
+                agg["errors"] += 1 if r["error"] else 0
+            for agg in out.values():
+                agg["wall_s"] = round(agg["wall_s"], 4)
+                agg["llm_s"] = round(agg["llm_s"], 4)
+            return out
+
+        nodes = aggregate("node")
+        return {
+            "name": self.name,
+            "wall_s": round(total_wall, 4),
+            "llm_s": round(sum(n["llm_s"] for n in nodes.values()), 4),
+            "llm_calls": sum(n["llm_calls"] for n in nodes.values()),
+            "input_tokens": sum(n["input_tokens"] for n in nodes.values()),
+            "output_tokens": sum(n["output_tokens"] for n in nodes.values()),
+            "retries": sum(n["retries"] for n in nodes.values()),
+            "nodes": nodes,
+            "agents": aggregate("agent"),
+        }
+
+    def write(self, output_dir: str | Path, basename: str = "metrics") -> Path:
+        """Writes `<basename>.json` (summary + records) and `<basename>.csv` (one row per record)."""
+        out = ensure_dir(output_dir)
+        with self._lock:
+            records = list(self.records)
+        save_json(out / f"{basename}.json", {"summary": self.summary(), "records": records})
+        with (out / f"{basename}.csv").open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=_RECORD_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        return out / f"{basename}.json"
@@ -1,43 +1,387 @@
 # src/llm.py
 from __future__ import annotations
 
-from typing import Literal
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Literal, Mapping, Optional, Set, Tuple, Type
+from urllib.parse import parse_qsl
+
+from langchain_core.caches import BaseCache
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
-from langchain_deepseek import ChatDeepSeek
-from langchain_xai import ChatXAI
-
-MODEL_PROVIDER_MAP = {
-    "gemini-1.5-flash-latest": ChatGoogleGenerativeAI,
-    "gemini-1.5-pro-latest": ChatGoogleGenerativeAI,
-    "gemini-2.5-flash-preview-05-20": ChatGoogleGenerativeAI,
-    "gemini-2.5-pro-preview-05-20": ChatGoogleGenerativeAI,
-    "gemini-2.5-pro-preview-06-05": ChatGoogleGenerativeAI,
-    "gpt-4o": ChatOpenAI,
-    "gpt-4o-mini": ChatOpenAI,
-    "deepseek-chat": ChatDeepSeek,
-    "grok-beta": ChatXAI,
-    "grok-3-latest": ChatXAI,
+
+from .hedging import HedgePolicy, Hedger, hedged_model_class
+from .resilience import get_rate_limiter, resilient_model_class
+
+# Provider SDKs are imported on first use (see `get_model_class`), so importing the
+# package only pays for the providers actually used and works without the others installed.
+PROVIDER_CLASSES: Dict[str, Tuple[str, str]] = {
+    "google": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "deepseek": ("langchain_deepseek", "ChatDeepSeek"),
+    "xai": ("langchain_xai", "ChatXAI"),
+    "fake": (f"{__package__}.fake_llm", "FakeChatModel"),
+}
+
+MODEL_PROVIDERS: Dict[str, str] = {
+    "gemini-1.5-flash-latest": "google",
+    "gemini-1.5-pro-latest": "google",
+    "gemini-2.5-flash-preview-05-20": "google",
+    "gemini-2.5-pro-preview-05-20": "google",
+    "gemini-2.5-pro-preview-06-05": "google",
+    "gpt-4o": "openai",
+    "gpt-4o-mini": "openai",
+    "deepseek-chat": "deepseek",
+    "grok-beta": "xai",
+    "grok-3-latest": "xai",
+    # Offline stand-ins with simulated latency (see fake_llm.FAKE_PRESETS)
+    "fake:instant": "fake",
+    "fake:fast": "fake",
+    "fake:realistic": "fake",
+    "fake:flaky": "fake",
 }
 
+
+
+class _ModelClassMap(Mapping):
+    """
+    Model name -> chat model class, as `MODEL_PROVIDER_MAP` has always been, but
+    importing a provider's SDK only when one of its classes is looked up.
+    Membership, `len` and iterating keys import nothing.
+    """
+
+    def __getitem__(self, model_name: str) -> Type[BaseChatModel]:
+        return _import_provider_class(MODEL_PROVIDERS[model_name])
+
+    def __contains__(self, model_name: object) -> bool:
+        return model_name in MODEL_PROVIDERS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(MODEL_PROVIDERS)
+
+    def __len__(self) -> int:
+        return len(MODEL_PROVIDERS)
+
+
+class _ProviderByClassMap(Mapping):
+    """
+    Chat model class -> provider key, as `PROVIDER_NAME_BY_CLASS` has always been.
+    Lookups only check providers whose SDK is already imported (a class can't exist
+    otherwise); iterating imports every installed provider.
+    """
+
+    def __getitem__(self, model_class: Any) -> str:
+        for provider, (module_name, class_name) in PROVIDER_CLASSES.items():
+            module = sys.modules.get(module_name)
+            if module is not None and getattr(module, class_name, None) is model_class:
+                return provider
+        raise KeyError(model_class)
+
+    def __iter__(self) -> Iterator[Type[BaseChatModel]]:
+        for provider in PROVIDER_CLASSES:
+            try:
+                yield _import_provider_class(provider)
+            except ImportError:
+                continue
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+MODEL_PROVIDER_MAP: Mapping[str, Type[BaseChatModel]] = _ModelClassMap()
+PROVIDER_NAME_BY_CLASS: Mapping[Any, str] = _ProviderByClassMap()
+
 ModelName = Literal[
     "gemini-1.5-flash-latest", "gemini-1.5-pro-latest",
     "gemini-2.5-flash-preview-05-20", "gemini-2.5-pro-preview-05-20", "gemini-2.5-pro-preview-06-05",
     "gpt-4o", "gpt-4o-mini",
     "deepseek-chat",
-    "grok-beta", "grok-3-latest"
+    "grok-beta", "grok-3-latest",
+    "fake:instant", "fake:fast", "fake:realistic", "fake:flaky",
 ]
 
-def get_llm(model_name: ModelName, temperature: float = 0.0) -> BaseChatModel:
+def get_llm(
+    model_name: ModelName,
+    temperature: float = 0.0,
+    cache: Optional[BaseCache] = None,
+    resilient: bool = True,
+    hedge: Optional[HedgePolicy] = None,
+    pooled: bool = True,
+) -> BaseChatModel:
     """
-    Instantiates and returns a language model based on a direct mapping.
+    Instantiates and returns a language model based on a direct mapping
+    (`MODEL_PROVIDERS`); the provider's SDK is imported on first use.
+    Pass `cache` (e.g. `cache.SQLiteLLMCache`) to serve repeated calls from a local store.
+
+    With `pooled=True` (default) models come from a process-wide pool keyed by
+    (model name incl. options, temperature, cache, resilient, hedge), so graphs
+    and evaluations share one client and its warm HTTP connections; see
+    `llm_pool_stats()` and `shutdown_llm_pool()`. Pooled models are shared
+    across threads and tasks, so treat them as read-only.
+
+    With `resilient=True` (default) calls go through the provider's shared token
+    bucket and are retried with exponential backoff and jitter on 429/5xx/timeouts
+    behind a per-provider circuit breaker (`resilience.PROVIDER_LIMITS`); the
+    SDK's own retries are turned off so attempts are not multiplied.
+
+    `hedge` (a `hedging.HedgePolicy`) duplicates calls that run past a percentile
+    of the model's recent latency to `hedge.fallback_model` (or the same model)
+    and keeps the first answer; see `hedging.hedge_stats()`.
+
+    `fake:*` models (`fake_llm.FakeChatModel`) run offline with simulated
+    latency; their settings can be overridden in the name, e.g.
+    "fake:realistic?error_rate=0.05&n_containers=6".
     """
+    if not pooled:
+        return _build_llm(model_name, temperature, cache, resilient, hedge, pooled=False).llm
+
+    key = (model_name, temperature, id(cache) if cache is not None else None, resilient, hedge)
+    with _pool_lock:
+        entry = _pool.get(key)
+        if entry is None:
+            build_lock = _pool_building.setdefault(key, threading.Lock())
+    if entry is None:
+        # One builder per key (threads asking for the same model wait for it); other keys are not blocked.
+        with build_lock:
+            with _pool_lock:
+                entry = _pool.get(key)
+            if entry is None:
+                entry = _build_llm(model_name, temperature, cache, resilient, hedge, pooled=True)
+                with _pool_lock:
+                    _pool[key] = entry
+                    _pool_building.pop(key, None)
+                    _pool_counters["misses"] += 1
+                return entry.llm
+    with _pool_lock:
+        _pool_counters["hits"] += 1
+        entry.uses += 1
+    return entry.llm
+
+
+def _build_llm(
+    model_name: ModelName,
+    temperature: float,
+    cache: Optional[BaseCache],
+    resilient: bool,
+    hedge: Optional[HedgePolicy],
+    pooled: bool,
+) -> _PoolEntry:
     print(f"--- ⚙️  Instantiating model: {model_name} ---")
-    model_class = MODEL_PROVIDER_MAP.get(model_name)
-    if model_class is None:
+    started = time.perf_counter()
+    base_name, _, options = model_name.partition("?")
+    provider = get_provider(model_name)
+    model_class = get_model_class(model_name)
+    kwargs: Dict[str, Any] = {"model": model_name, "temperature": temperature}
+    closers: List[Callable[[], Any]] = []
+    aclosers: List[Callable[[], Any]] = []
+    if provider == "fake":
+        from .fake_llm import FAKE_PRESETS
+        kwargs.update(FAKE_PRESETS.get(base_name, {}), **dict(parse_qsl(options)))
+    elif pooled and provider in _OPENAI_COMPATIBLE:
+        # Own HTTP clients instead of langchain_openai's module-level ones, so shutdown can close them.
+        # The SDK's own httpx subclasses, which keep its connection limits and timeouts.
+        from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+        kwargs.update(http_client=DefaultHttpxClient(), http_async_client=DefaultAsyncHttpxClient())
+        closers.append(kwargs["http_client"].close)
+        aclosers.append(kwargs["http_async_client"].aclose)
+    if cache is not None:
+        kwargs["cache"] = cache
+    if resilient:
+        kwargs.update(rate_limiter=get_rate_limiter(provider), max_retries=0)
+        model_class = resilient_model_class(model_class, provider)
+    if hedge is None:
+        llm = model_class(**kwargs)
+    else:
+        llm = hedged_model_class(model_class)(**kwargs)
+        fallback = None
+        if hedge.fallback_model and hedge.fallback_model != model_name:
+            fallback = get_llm(hedge.fallback_model, temperature=temperature, cache=cache,
+                               resilient=resilient, pooled=pooled)
+        llm._hedger = Hedger(model_name, hedge, fallback)
+
+    if pooled and provider == "google":
+        client = getattr(llm, "client", None)
+        if hasattr(client, "close"):
+            closers.append(client.close)
+        if hasattr(getattr(client, "aio", None), "aclose"):
+            aclosers.append(client.aio.aclose)
+    return _PoolEntry(llm, model_name, temperature, time.perf_counter() - started, closers, aclosers)
+
+
+# ===========
+# Client pool
+# ===========
+
+# Providers whose LangChain class talks through the OpenAI SDK and accepts `http_client`.
+_OPENAI_COMPATIBLE = {"openai", "deepseek", "xai"}
+
+
+class _PoolEntry:
+    def __init__(self, llm: BaseChatModel, model_name: str, temperature: float, build_s: float,
+                 closers: List[Callable[[], Any]], aclosers: List[Callable[[], Any]]) -> None:
+        self.llm = llm
+        self.model_name = model_name
+        self.temperature = temperature
+        self.build_s = build_s
+        self.closers = closers
+        self.aclosers = aclosers
+        self.uses = 1
+        self.created = time.monotonic()
+
+    def close(self) -> int:
+        """
+        Closes sync clients now and async ones on a fresh loop. Returns failures.
+        On a running loop async clients can only be closed by tasks on it; those
+        are kept in `_closing` and count their failures when they finish.
+        """
+        failures = 0
+        for close in self.closers:
+            try:
+                close()
+            except Exception:
+                failures += 1
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        for aclose in self.aclosers:
+            if loop is not None:
+                task = loop.create_task(aclose())
+                _closing.add(task)
+                task.add_done_callback(_closed)
+                continue
+            try:
+                asyncio.run(aclose())
+            except Exception:
+                failures += 1
+        return failures
+
+    async def aclose(self) -> int:
+        failures = 0
+        for close in self.closers:
+            try:
+                close()
+            except Exception:
+                failures += 1
+        for aclose in self.aclosers:
+            try:
+                await aclose()
+            except Exception:
+                failures += 1
+        return failures
+
+
+_pool_lock = threading.Lock()
+_pool: Dict[Tuple[Any, ...], _PoolEntry] = {}
+_pool_building: Dict[Tuple[Any, ...], threading.Lock] = {}
+_pool_counters = {"hits": 0, "misses": 0, "closed": 0, "close_errors": 0}
+# Async closes scheduled by `shutdown_llm_pool()` on a running loop; held so they aren't garbage-collected.
+_closing: Set["asyncio.Task[Any]"] = set()
+
+
+def _closed(task: "asyncio.Task[Any]") -> None:
+    _closing.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        with _pool_lock:
+            _pool_counters["close_errors"] += 1
+
+
+def llm_pool_stats() -> Dict[str, Any]:
+    """Pool size, hits/misses since start, closed models, and per pooled model its uses, age and build time."""
+    with _pool_lock:
+        entries = list(_pool.values())
+        counters = dict(_pool_counters)
+    lookups = counters["hits"] + counters["misses"]
+    now = time.monotonic()
+    return {
+        "size": len(entries),
+        **counters,
+        "closing": len(_closing),
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        "models": [
+            {"model": e.model_name, "temperature": e.temperature, "uses": e.uses,
+             "age_s": round(now - e.created, 1), "build_s": round(e.build_s, 4)}
+            for e in entries
+        ],
+    }
+
+
+def _drain_pool() -> List[_PoolEntry]:
+    with _pool_lock:
+        entries = list(_pool.values())
+        _pool.clear()
+        _pool_counters["closed"] += len(entries)
+    # Cached compiled graphs hold the pooled models; drop them so the next run rebuilds
+    # against fresh clients. Only if graph.py is loaded (otherwise nothing is cached).
+    graph = sys.modules.get(f"{__package__}.graph")
+    if graph is not None:
+        graph.clear_graph_cache()
+    return entries
+
+
+def shutdown_llm_pool() -> int:
+    """
+    Empties the pool and closes the pooled models' HTTP clients; later `get_llm`
+    calls build fresh models. Also clears the compiled-graph cache
+    (`graph.clear_graph_cache`), whose apps hold the closed models. Models handed
+    out earlier must not be used after this. Returns the number of models closed. From async code use
+    `await ashutdown_llm_pool()`: on a running loop this can only schedule the async
+    clients' close, which is still pending (`llm_pool_stats()["closing"]`) when it returns.
+    """
+    entries = _drain_pool()
+    try:
+        asyncio.get_running_loop()
+        if any(entry.aclosers for entry in entries):
+            print("--- ⚠️ shutdown_llm_pool() called on a running event loop; async clients close in the "
+                  "background. Use `await ashutdown_llm_pool()` from async code ---")
+    except RuntimeError:
+        pass
+    failures = sum(entry.close() for entry in entries)
+    with _pool_lock:
+        _pool_counters["close_errors"] += failures
+    return len(entries)
+
+
+async def ashutdown_llm_pool() -> int:
+    """Async `shutdown_llm_pool`."""
+    entries = _drain_pool()
+    failures = 0
+    for entry in entries:
+        failures += await entry.aclose()
+    with _pool_lock:
+        _pool_counters["close_errors"] += failures
+    return len(entries)
+
+
+@lru_cache(maxsize=None)
+def _import_provider_class(provider: str) -> Type[BaseChatModel]:
+    module_name, class_name = PROVIDER_CLASSES[provider]
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
         raise ImportError(
-            f"Model '{model_name}' is not available. "
-            f"Check if its provider library (e.g., langchain_xai) is installed."
-        )
-    return model_class(model=model_name, temperature=temperature)
+            f"Provider '{provider}' needs the '{module_name.split('.')[0]}' package; "
+            f"install it to use its models ({e})."
+        ) from e
+    return getattr(module, class_name)
+
+
+def get_model_class(model_name: ModelName) -> Type[BaseChatModel]:
+    """
+    The chat model class for a model name, importing its provider SDK on first use.
+    Raises ImportError for unknown models or when the provider package is missing.
+    """
+    provider = MODEL_PROVIDERS.get(model_name.partition("?")[0])
+    if provider is None:
+        raise ImportError(f"Model '{model_name}' is not available (known models: {', '.join(MODEL_PROVIDERS)}).")
+    return _import_provider_class(provider)
+
+
+def get_provider(model_name: ModelName) -> str:
+    """
+    Returns the provider key ("google", "openai", "deepseek", "xai", "fake") for a model name.
+    """
+    return MODEL_PROVIDERS.get(model_name.partition("?")[0], "unknown")
@@ -1,26 +1,231 @@
 # src/pipeline.py
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import threading
+import uuid
+import weakref
 from collections import deque
+from concurrent.futures import as_completed
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import yaml
+from langchain_core.caches import BaseCache
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 
 from .types import State, C4Model
-from .utils import ensure_dir, sanitize_filename, save_c4_artifacts, load_yaml
-from .graph import create_c4_modeler_graph
-from .llm import ModelName
+from .utils import (
+    ensure_dir,
+    sanitize_filename,
+    save_c4_artifacts,
+    save_c4_artifact_updates,
+    load_yaml,
+    load_c4_model_from_artifacts,
+    missing_c4_artifacts,
+)
+from .graph import get_c4_modeler_graph
+from .llm import ModelName, get_provider, llm_pool_stats
+from .instrumentation import MetricsCollector
+from .hedging import HedgePolicy, hedge_stats
+from .validation import load_c4_yaml
 
 def _empty_c4_model() -> C4Model:
     return {"context": {}, "containers": {}, "components": {}}
 
-def _initial_state(brief_str: str) -> State:
+def _initial_state(brief_str: str, c4_model: Optional[C4Model] = None) -> State:
     return {
         "messages": [],
         "system_brief": brief_str,
-        "c4_model": _empty_c4_model(),
+        "c4_model": c4_model or _empty_c4_model(),
         "component_queue": None,  # was: deque()
     }
 
+_ARTIFACT_FIELDS = ("analysis", "yaml_definition", "diagram")
+
+def _leading_artifacts(data: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    # Each artifact is derived from the previous one, so keep only the unbroken prefix.
+    kept: Dict[str, str] = {}
+    for field in _ARTIFACT_FIELDS:
+        value = (data or {}).get(field)
+        if not (value or "").strip():
+            break
+        kept[field] = value
+    return kept
+
+def seed_c4_model(artifacts: C4Model) -> C4Model:
+    """
+    Turns a model read by `load_c4_model_from_artifacts` into a graph seed.
+
+    Blank or missing artifacts are dropped, together with anything derived from
+    them at the same level. Component keys are mapped back to the container names
+    of the L2 YAML, so the nodes regenerate exactly the missing pieces.
+    """
+    seed = _empty_c4_model()
+    seed["context"] = _leading_artifacts(artifacts.get("context"))
+    seed["containers"] = _leading_artifacts(artifacts.get("containers"))
+    if "yaml_definition" not in seed["containers"]:
+        return seed
+
+    try:
+        data = load_c4_yaml(seed["containers"]["yaml_definition"])
+        names = [e["name"] for e in data.get("elements", []) if e.get("type") == "container"]
+    except Exception as e:
+        print(f"Could not parse container YAML while seeding: {e}")
+        return seed
+    by_safe_name = {sanitize_filename(str(n)): d for n, d in (artifacts.get("components") or {}).items()}
+    for name in names:
+        component = _leading_artifacts(by_safe_name.get(sanitize_filename(name)))
+        if component:
+            seed["components"][name] = component
+    return seed
+
+
+def _prepare_brief(
+    brief: Dict[str, Any] | str,
+    results_dir: str | Path,
+    result_name: Optional[str],
+) -> Tuple[str, Path]:
+    """Returns the brief as a YAML string and the output folder for its artifacts."""
+    if isinstance(brief, str):
+        brief_str = brief
+        brief_dict: Dict[str, Any] = {}
+    else:
+        brief_dict = brief
+        brief_str = yaml.safe_dump(brief_dict, sort_keys=False)
+
+    return brief_str, ensure_dir(_brief_folder(brief_dict, results_dir, result_name))
+
+
+def _brief_folder(brief: Dict[str, Any] | str, results_dir: str | Path, result_name: Optional[str]) -> Path:
+    """The results folder of a brief: named after its title, else `result_name`."""
+    brief_dict = brief if isinstance(brief, dict) else {}
+    title = brief_dict.get("title") or brief_dict.get("name") or result_name or "run"
+    return Path(results_dir) / sanitize_filename(title)
+
+
+def _check_distinct_folders(briefs: Mapping[str, Dict[str, Any] | str], results_dir: str | Path) -> None:
+    """
+    Raises ValueError when two briefs of a batch would write into the same
+    results folder (e.g. same title), before any of them starts.
+    `briefs` maps each brief's result name to its content.
+    """
+    seen: Dict[Path, str] = {}
+    for name, brief in briefs.items():
+        folder = _brief_folder(brief, results_dir, name)
+        if folder in seen:
+            raise ValueError(
+                f"Briefs '{seen[folder]}' and '{name}' would both write to {folder}; give them distinct titles."
+            )
+        seen[folder] = name
+
+
+def brief_thread_id(
+    brief_str: str,
+    out_path: Path,
+    model_name: ModelName,
+    analysis_method: str,
+    collab_rounds: int,
+    component_fan_out: bool = False,
+    collab_memory: str = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: str = "llm",
+    hedge: Optional[HedgePolicy] = None,
+) -> str:
+    """
+    Stable thread_id for a brief and run configuration, so a rerun finds its
+    checkpoints. Every option that changes the graph's nodes or state is part
+    of it, so resuming with a different configuration starts a new thread
+    instead of continuing a run of another graph.
+    """
+    parts = [brief_str, model_name, analysis_method, str(collab_rounds), str(component_fan_out)]
+    # Options added later only count when set, so default runs keep their earlier thread_ids.
+    options = {"collab_memory": (collab_memory, "full"), "collab_window": (collab_window, None),
+               "diagram_method": (diagram_method, "llm"), "hedge": (hedge, None)}
+    parts += [f"{name}={value!r}" for name, (value, default) in options.items() if value != default]
+    fingerprint = "\x00".join(parts)
+    return f"{out_path.name}-{hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:12]}"
+
+def _run_config(app, thread_id: str, resume: bool) -> Dict[str, Any]:
+    config: Dict[str, Any] = {"recursion_limit": 200}
+    if app.checkpointer is not None:
+        # Fresh runs get their own thread so old checkpoints never leak into the new state.
+        config["configurable"] = {"thread_id": thread_id if resume else f"{thread_id}-{uuid.uuid4().hex[:8]}"}
+    return config
+
+def _completed_artifacts(out_path: Path) -> Optional[C4Model]:
+    model = load_c4_model_from_artifacts(out_path)
+    if model and not missing_c4_artifacts(model):
+        print(f"--- ⏭️ Skipping '{out_path.name}': artifacts already complete ---")
+        return model
+    return None
+
+def _save_update(out_path: Path, mode: str, chunk: Any) -> None:
+    # "updates" chunks are {node_name: delta}; each c4_model delta is written as soon as its node finishes.
+    if mode != "updates":
+        return
+    for update in chunk.values():
+        if isinstance(update, dict) and update.get("c4_model"):
+            save_c4_artifact_updates(out_path, update["c4_model"])
+
+def _stream(app, graph_input: Optional[State], config: Dict[str, Any], out_path: Path) -> State:
+    final_state: State = {}
+    for mode, chunk in app.stream(graph_input, config, stream_mode=["updates", "values"]):
+        _save_update(out_path, mode, chunk)
+        if mode == "values":
+            final_state = chunk
+    return final_state
+
+async def _astream(app, graph_input: Optional[State], config: Dict[str, Any], out_path: Path) -> State:
+    final_state: State = {}
+    async for mode, chunk in app.astream(graph_input, config, stream_mode=["updates", "values"]):
+        _save_update(out_path, mode, chunk)
+        if mode == "values":
+            final_state = chunk
+    return final_state
+
+def _attach_metrics(config: Dict[str, Any], out_path: Path) -> MetricsCollector:
+    collector = MetricsCollector(name=out_path.name)
+    config["callbacks"] = [*config.get("callbacks", []), collector]
+    return collector
+
+def _write_metrics(collector: MetricsCollector, out_path: Path) -> None:
+    summary = collector.summary()
+    collector.write(out_path)
+    print(
+        f"--- ⏱️ {out_path.name}: {summary['wall_s']}s total, {summary['llm_s']}s waiting on LLM, "
+        f"{summary['llm_calls']} calls, {summary['input_tokens']} in / {summary['output_tokens']} out tokens ---"
+    )
+    for model, stats in hedge_stats().items():
+        print(
+            f"--- 🪁 {model}: hedged {stats['hedged']}/{stats['calls']} calls this process, "
+            f"hedge won {stats['hedge_won']} (p50 {stats['p50_s']}s, p95 {stats['p95_s']}s) ---"
+        )
+    pool = llm_pool_stats()
+    print(f"--- 🔌 LLM client pool: {pool['size']} models, {pool['hits']} reused / {pool['misses']} built this process ---")
+
+def _invoke(app, state: State, config: Dict[str, Any], resume: bool, out_path: Path) -> State:
+    if resume and app.checkpointer is not None:
+        snapshot = app.get_state(config)
+        if snapshot.values:
+            if not snapshot.next:
+                return snapshot.values
+            print(f"--- ↩️ Resuming thread '{config['configurable']['thread_id']}' at {list(snapshot.next)} ---")
+            return _stream(app, None, config, out_path)
+    return _stream(app, state, config, out_path)
+
+async def _ainvoke(app, state: State, config: Dict[str, Any], resume: bool, out_path: Path) -> State:
+    if resume and app.checkpointer is not None:
+        snapshot = await app.aget_state(config)
+        if snapshot.values:
+            if not snapshot.next:
+                return snapshot.values
+            print(f"--- ↩️ Resuming thread '{config['configurable']['thread_id']}' at {list(snapshot.next)} ---")
+            return await _astream(app, None, config, out_path)
+    return await _astream(app, state, config, out_path)
+
 
 def generate_c4_for_brief(
     brief: Dict[str, Any] | str,
@@ -30,36 +235,277 @@ def generate_c4_for_brief(
     results_dir: str | Path = "data/results",
     result_name: Optional[str] = None,
     checkpointer=None,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    llm_cache: Optional[BaseCache] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    collect_metrics: bool = False,
+    collab_memory: str = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: str = "llm",
+    hedge: Optional[HedgePolicy] = None,
 ) -> Tuple[C4Model, Path]:
     """
     Run the full workflow for a single brief and save artifacts.
-    """
-    if isinstance(brief, str):
-        brief_str = brief
-        brief_dict: Dict[str, Any] = {}
-    else:
-        import yaml as _yaml
-        brief_dict = brief
-        brief_str = _yaml.safe_dump(brief_dict, sort_keys=False)
+    Each node's artifacts are written (atomically) as soon as it finishes, so
+    partial results survive a failure; the full model is saved once more at the end.
+    The compiled graph is cached per configuration (see `graph.clear_graph_cache`).
 
-    title = brief_dict.get("title") or brief_dict.get("name") or result_name or "run"
-    out_path = ensure_dir(Path(results_dir) / sanitize_filename(title))
+    With `resume=True` a brief whose artifacts are already complete is skipped,
+    and with a durable checkpointer (see `graph.create_sqlite_checkpointer`) an
+    interrupted run continues from its last completed node.
+    `incremental=True` seeds the state from the artifacts already in the brief's
+    results folder and only generates the missing or blank ones.
+    `collect_metrics=True` writes per-node / per-agent timings and token counts
+    to `metrics.json` and `metrics.csv` in the results folder (see `instrumentation`).
+    `collab_memory` ("full" | "window" | "summary") bounds the collaboration prompts,
+    and `diagram_method` picks how diagrams are made ("llm", "fused" YAML + diagram
+    call, or "render" locally from the YAML). `hedge` (a `hedging.HedgePolicy`)
+    duplicates slow LLM calls; metrics then also report how often hedges fired and won.
+    """
+    brief_str, out_path = _prepare_brief(brief, results_dir, result_name)
+    if resume and (done := _completed_artifacts(out_path)) is not None:
+        return done, out_path
 
-    app = create_c4_modeler_graph(
+    app = get_c4_modeler_graph(
         checkpointer=checkpointer,
         model_name=model_name,
         analysis_method=analysis_method,  # "simple" | "collaborative"
         collab_rounds=collab_rounds,
+        component_fan_out=component_fan_out,
+        max_parallel_components=max_parallel_components,
+        llm_cache=llm_cache,
+        collab_memory=collab_memory,
+        collab_window=collab_window,
+        diagram_method=diagram_method,
+        hedge=hedge,
     )
 
-    state: State = _initial_state(brief_str)
-    config = {"recursion_limit": 200}
-    final_state: State = app.invoke(state, config)
+    seed = seed_c4_model(load_c4_model_from_artifacts(out_path)) if incremental else None
+    state: State = _initial_state(brief_str, seed)
+    thread_id = brief_thread_id(
+        brief_str, out_path, model_name, analysis_method, collab_rounds, component_fan_out,
+        collab_memory, collab_window, diagram_method, hedge,
+    )
+    config = _run_config(app, thread_id, resume)
+    collector = _attach_metrics(config, out_path) if collect_metrics else None
+    try:
+        final_state: State = _invoke(app, state, config, resume, out_path)
+    finally:
+        if collector is not None:
+            _write_metrics(collector, out_path)
 
     c4_model: C4Model = final_state["c4_model"]
     save_c4_artifacts(out_path, c4_model)
     return c4_model, out_path
 
+# Process-wide cap on briefs in flight per event loop (asyncio primitives are bound to their loop).
+_max_briefs_in_flight = 8
+_brief_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _BriefSlots] = weakref.WeakKeyDictionary()
+_brief_slots_lock = threading.Lock()
+
+class _BriefSlots:
+    """Briefs in flight on one event loop, admitted against the current `_max_briefs_in_flight`."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.changed = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.in_flight < _max_briefs_in_flight)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.in_flight -= 1
+        await self.wake()
+
+    async def wake(self) -> None:
+        async with self.changed:
+            self.changed.notify_all()
+
+def set_max_briefs_in_flight(limit: int) -> None:
+    """
+    Caps how many `agenerate_c4_for_brief` runs may be in flight at once on an
+    event loop, across every batch and direct call (default 8). Briefs already
+    running keep their slot; after a lower limit new briefs wait until the
+    running ones drain below it, so the cap is never exceeded.
+    """
+    global _max_briefs_in_flight
+    with _brief_slots_lock:
+        _max_briefs_in_flight = max(1, limit)
+        slots = list(_brief_slots.items())
+    for loop, slot in slots:
+        if loop.is_running():  # waiters may now fit under a higher limit
+            asyncio.run_coroutine_threadsafe(slot.wake(), loop)
+
+def _brief_slot() -> _BriefSlots:
+    loop = asyncio.get_running_loop()
+    with _brief_slots_lock:
+        slot = _brief_slots.get(loop)
+        if slot is None:
+            slot = _brief_slots[loop] = _BriefSlots()
+        return slot
+
+async def agenerate_c4_for_brief(
+    brief: Dict[str, Any] | str,
+    model_name: ModelName = "gemini-1.5-flash-latest",
+    analysis_method: str = "collaborative",
+    collab_rounds: int = 2,
+    results_dir: str | Path = "data/results",
+    result_name: Optional[str] = None,
+    checkpointer=None,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    llm_cache: Optional[BaseCache] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    collect_metrics: bool = False,
+    collab_memory: str = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: str = "llm",
+    hedge: Optional[HedgePolicy] = None,
+) -> Tuple[C4Model, Path]:
+    """
+    Async variant of `generate_c4_for_brief`: every LLM call goes through
+    `ainvoke`, so many briefs can share one event loop. At most
+    `set_max_briefs_in_flight` briefs run at once per loop; the others wait here.
+    Resuming needs an async checkpointer (e.g. `AsyncSqliteSaver`).
+    """
+    async with _brief_slot():
+        brief_str, out_path = _prepare_brief(brief, results_dir, result_name)
+        if resume and (done := _completed_artifacts(out_path)) is not None:
+            return done, out_path
+
+        app = get_c4_modeler_graph(
+            checkpointer=checkpointer,
+            model_name=model_name,
+            analysis_method=analysis_method,  # "simple" | "collaborative"
+            collab_rounds=collab_rounds,
+            component_fan_out=component_fan_out,
+            max_parallel_components=max_parallel_components,
+            llm_cache=llm_cache,
+            collab_memory=collab_memory,
+            collab_window=collab_window,
+            diagram_method=diagram_method,
+            hedge=hedge,
+        )
+
+        seed = seed_c4_model(load_c4_model_from_artifacts(out_path)) if incremental else None
+        state: State = _initial_state(brief_str, seed)
+        thread_id = brief_thread_id(
+            brief_str, out_path, model_name, analysis_method, collab_rounds, component_fan_out,
+            collab_memory, collab_window, diagram_method, hedge,
+        )
+        config = _run_config(app, thread_id, resume)
+        collector = _attach_metrics(config, out_path) if collect_metrics else None
+        try:
+            final_state: State = await _ainvoke(app, state, config, resume, out_path)
+        finally:
+            if collector is not None:
+                _write_metrics(collector, out_path)
+
+        c4_model: C4Model = final_state["c4_model"]
+        save_c4_artifacts(out_path, c4_model)
+        return c4_model, out_path
+
+async def agenerate_c4_for_briefs(
+    briefs: Mapping[str, Dict[str, Any] | str],
+    model_name: ModelName = "gemini-1.5-flash-latest",
+    analysis_method: str = "collaborative",
+    collab_rounds: int = 2,
+    results_dir: str | Path = "data/results",
+    max_in_flight: Optional[int] = None,
+    checkpointer=None,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    llm_cache: Optional[BaseCache] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    collect_metrics: bool = False,
+    collab_memory: str = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: str = "llm",
+    hedge: Optional[HedgePolicy] = None,
+) -> Dict[str, Path]:
+    """
+    Runs many briefs concurrently on one event loop.
+
+    `briefs` maps a brief name to its content (e.g. `load_briefs_from_dir(...)`).
+    Briefs wait on the process-wide slots of `agenerate_c4_for_brief`
+    (`set_max_briefs_in_flight`); `max_in_flight` additionally caps this batch
+    alone, without changing the process-wide limit. A failing brief is
+    reported and skipped instead of aborting the batch, and briefs that would
+    share a results folder are rejected (ValueError) before any starts.
+    Returns {brief_name: output_dir} for the briefs that finished.
+    """
+    _check_distinct_folders(briefs, results_dir)
+    batch_slots = asyncio.Semaphore(max(1, max_in_flight)) if max_in_flight is not None else nullcontext()
+    outputs: Dict[str, Path] = {}
+
+    async def run_one(name: str, brief: Dict[str, Any] | str) -> Path:
+        async with batch_slots:
+            print(f"\n=== Running brief: {name} ===")
+            _, out_path = await agenerate_c4_for_brief(
+                brief,
+                model_name=model_name,
+                analysis_method=analysis_method,
+                collab_rounds=collab_rounds,
+                results_dir=results_dir,
+                result_name=name,
+                checkpointer=checkpointer,
+                component_fan_out=component_fan_out,
+                max_parallel_components=max_parallel_components,
+                llm_cache=llm_cache,
+                resume=resume,
+                incremental=incremental,
+                collect_metrics=collect_metrics,
+                collab_memory=collab_memory,
+                collab_window=collab_window,
+                diagram_method=diagram_method,
+                hedge=hedge,
+            )
+        outputs[name] = out_path
+        print(f"=== ✅ Finished brief: {name} ({len(outputs)}/{len(briefs)}) ===")
+        return out_path
+
+    results = await asyncio.gather(*(run_one(name, brief) for name, brief in briefs.items()), return_exceptions=True)
+    for name, result in zip(briefs, results):
+        if isinstance(result, BaseException):
+            print(f"=== ❌ Failed brief: {name}: {result} ===")
+    return outputs
+
+# Process-wide caps on briefs in flight per provider (e.g. {"google": 2, "openai": 8}).
+_provider_slots: Dict[str, Tuple[int, threading.BoundedSemaphore]] = {}
+_provider_slots_lock = threading.Lock()
+
+def set_provider_concurrency(provider: str, limit: Optional[int]) -> None:
+    """
+    Caps how many briefs may run concurrently against `provider` across every
+    batch in this process. `None` removes the cap. Setting the current limit
+    again keeps the existing semaphore, so batches already running share it;
+    a different limit applies to briefs that start after the change.
+    """
+    with _provider_slots_lock:
+        if limit is None:
+            _provider_slots.pop(provider, None)
+            return
+        limit = max(1, limit)
+        current = _provider_slots.get(provider)
+        if current is None or current[0] != limit:
+            _provider_slots[provider] = (limit, threading.BoundedSemaphore(limit))
+
+@contextmanager
+def _provider_slot(model_name: ModelName):
+    with _provider_slots_lock:
+        entry = _provider_slots.get(get_provider(model_name))
+    if entry is None:
+        yield
+        return
+    with entry[1]:
+        yield
+
 def generate_c4_for_briefs_dir(
     briefs_dir: str | Path,
     model_name: ModelName = "gemini-1.5-flash-latest",
@@ -68,27 +514,87 @@ def generate_c4_for_briefs_dir(
     results_dir: str | Path = "data/results",
     pattern: str = "*.yaml",
     checkpointer=None,
+    component_fan_out: bool = False,
+    max_parallel_components: int = 4,
+    max_workers: int = 1,
+    provider_limits: Optional[Dict[str, int]] = None,
+    outputs: Optional[Dict[str, Path]] = None,
+    llm_cache: Optional[BaseCache] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    collect_metrics: bool = False,
+    collab_memory: str = "full",
+    collab_window: Optional[int] = None,
+    diagram_method: str = "llm",
+    hedge: Optional[HedgePolicy] = None,
 ) -> Dict[str, Path]:
     """
     Batch: iterate briefs in a directory and generate outputs.
+
+    With `max_workers > 1` briefs run concurrently in a thread pool. Either way
+    a failing brief is reported and skipped instead of aborting the batch.
+    `provider_limits` (e.g. {"google": 2, "openai": 8}) caps briefs in flight
+    per provider, see `set_provider_concurrency`. Briefs that would share a
+    results folder (same title) are rejected with ValueError before any starts. Pass your own `outputs` dict
+    to watch {brief_file_name: output_dir} fill in as briefs finish.
+    `resume=True` skips finished briefs and, with a durable `checkpointer`,
+    picks interrupted ones up where they stopped. `incremental=True` regenerates
+    only the missing artifacts of each brief's existing results folder, and
+    `collect_metrics=True` writes per-brief metrics next to its artifacts.
     """
     briefs_dir = Path(briefs_dir)
-    outputs: Dict[str, Path] = {}
+    outputs = {} if outputs is None else outputs
+    for provider, limit in (provider_limits or {}).items():
+        set_provider_concurrency(provider, limit)
+
+    def run_brief(brief_file: Path, brief: Dict[str, Any]) -> Path:
+        with _provider_slot(model_name):
+            print(f"\n=== Running brief: {brief_file.name} ===")
+            _, out_path = generate_c4_for_brief(
+                brief,
+                model_name=model_name,
+                analysis_method=analysis_method,
+                collab_rounds=collab_rounds,
+                results_dir=results_dir,
+                result_name=brief_file.stem,
+                checkpointer=checkpointer,
+                component_fan_out=component_fan_out,
+                max_parallel_components=max_parallel_components,
+                llm_cache=llm_cache,
+                resume=resume,
+                incremental=incremental,
+                collect_metrics=collect_metrics,
+                collab_memory=collab_memory,
+                collab_window=collab_window,
+                diagram_method=diagram_method,
+                hedge=hedge,
+            )
+        return out_path
 
+    jobs = []
     for brief_file in sorted(briefs_dir.glob(pattern)):
         brief = load_yaml(brief_file)
         if not brief:
             print(f"Skipping (could not load): {brief_file}")
             continue
-        print(f"\n=== Running brief: {brief_file.name} ===")
-        _, out_path = generate_c4_for_brief(
-            brief,
-            model_name=model_name,
-            analysis_method=analysis_method,
-            collab_rounds=collab_rounds,
-            results_dir=results_dir,
-            checkpointer=checkpointer,
-        )
-        outputs[brief_file.name] = out_path
+        jobs.append((brief_file, brief))
+    _check_distinct_folders({brief_file.stem: brief for brief_file, brief in jobs}, results_dir)
+
+    def record(brief_file: Path, result: Callable[[], Path]) -> None:
+        try:
+            outputs[brief_file.name] = result()
+            print(f"=== ✅ Finished brief: {brief_file.name} ({len(outputs)}/{len(jobs)}) ===")
+        except Exception as e:
+            print(f"=== ❌ Failed brief: {brief_file.name}: {e} ===")
+
+    if max_workers <= 1:
+        for brief_file, brief in jobs:
+            record(brief_file, lambda: run_brief(brief_file, brief))
+        return outputs
+
+    with ContextThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_brief, brief_file, brief): brief_file for brief_file, brief in jobs}
+        for future in as_completed(futures):
+            record(futures[future], future.result)
 
     return outputs
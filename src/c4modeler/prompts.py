@@ -137,6 +137,23 @@ Your role is to **compile and integrate** every insight from the collaborative d
 Now, review the ENTIRE conversation history and generate the final, all-inclusive, consolidated analysis report based on these strict rules.
 """
 
+COLLABORATION_SUMMARY_SYSTEM_PROMPT = """You keep the running minutes of a C4 model design session for the **{level}** level.
+
+Merge the previous minutes with the new contributions below into one updated set of minutes.
+
+**RULES:**
+1.  **KEEP EVERY DECISION:** Every agreed element, name, technology, version, responsibility, relationship and security or operational requirement must survive.
+2.  **KEEP OPEN POINTS:** Record unresolved questions, critiques and who raised them.
+3.  **DROP ONLY REPETITION:** Remove restatements, pleasantries and superseded proposals (note what replaced them).
+
+Reply with the updated minutes only.
+
+---
+**Previous minutes:**
+{summary}
+---
+"""
+
 ANALYSIS_PERSONA_PROMPT = "You are an expert software architect specializing in the C4 model."
 YAML_PERSONA_PROMPT = "You are a meticulous software architect. Your task is to convert a textual analysis into a structured YAML file. You must adhere strictly to the provided template."
 PLANTUML_PERSONA_PROMPT = "You are an expert software architect and a specialist in generating C4 diagrams using PlantUML. Your task is to convert a YAML definition into a valid PlantUML diagram, using the accompanying analysis for context."
@@ -201,6 +218,48 @@ PLANTUML_HUMAN_MESSAGE_PROMPT = """Generate a C4 PlantUML diagram based on the p
         - Your output must be ONLY the raw PlantUML code, starting with `@startuml`. Do not add any commentary, explanations, or markdown fences like ```plantuml.
         """
 
+YAML_REPAIR_HUMAN_MESSAGE_PROMPT = """The following C4 **{level}** level YAML failed validation.
+
+        **Errors:**
+        {errors}
+
+        **YAML:**
+        ```yaml
+        {yaml_def}
+        ```
+
+        **Instructions:**
+        - Fix only the listed errors; keep every other element, relationship and value unchanged.
+        - Your output must be ONLY the raw YAML string, starting with `level: ...`. Do not add any commentary, explanations, or markdown fences like ```yaml.
+        """
+
+FUSED_PERSONA_PROMPT = "You are a meticulous software architect and a specialist in generating C4 diagrams using PlantUML. Your task is to convert a textual analysis into a structured YAML file that adheres strictly to the provided template, and then into a valid PlantUML diagram of that YAML."
+
+FUSED_HUMAN_MESSAGE_PROMPT = """Based on the provided textual analysis, generate BOTH the YAML definition and the C4 PlantUML diagram for it.
+
+        **Textual Analysis:**
+        ```
+        {analysis}
+        ```
+
+        {context}
+
+        **YAML Template (the YAML part MUST follow this format):**
+        ```yaml
+        {template}
+        ```
+
+        **Reference Syntax Guide (for the PlantUML part):**
+        ```plantuml
+        {syntax_guide}
+        ```
+
+        **Instructions:**
+        - First, output the raw YAML: populate all fields in the template based on the analysis, starting with `level: ...`, without deviating from the template's structure.
+        - Then, output the raw PlantUML code for exactly that YAML, starting with `@startuml` and ending with `@enduml`. Convert every element and relationship from the YAML into the correct PlantUML syntax, using the analysis to write better relationship descriptions if needed.
+        - Do not add any commentary, explanations, or markdown fences like ```yaml or ```plantuml.
+        """
+
 # YAML templates (verbatim)
 CONTEXT_YAML_TEMPLATE = """
 # C4 Model: Level 1 - System Context
@@ -0,0 +1,164 @@
+# src/render.py
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+from .validation import load_c4_yaml
+
+
+# C4-PlantUML ships in the PlantUML standard library, so rendered diagrams compile offline.
+_INCLUDE_BY_LEVEL = {
+    "context": "!include <C4/C4_Context>",
+    "container": "!include <C4/C4_Container>",
+    "component": "!include <C4/C4_Component>",
+}
+
+# YAML element type -> (C4-PlantUML macro, takes a technology argument)
+_MACRO_BY_TYPE = {
+    "person": ("Person", False),
+    "externalperson": ("Person_Ext", False),
+    "system": ("System", False),
+    "externalsystem": ("System_Ext", False),
+    "systemext": ("System_Ext", False),
+    "container": ("Container", True),
+    "containerdb": ("ContainerDb", True),
+    "database": ("ContainerDb", True),
+    "externalcontainer": ("Container_Ext", True),
+    "component": ("Component", True),
+    "componentdb": ("ComponentDb", True),
+}
+
+# Types drawn inside the level's boundary
+_INNER_TYPES = {
+    "container": {"container", "containerdb", "database"},
+    "component": {"component", "componentdb"},
+}
+
+
+def _alias(name: str) -> str:
+    """snake_case PlantUML alias for an element name."""
+    alias = re.sub(r"[^a-zA-Z0-9]+", "_", str(name)).strip("_").lower()
+    if not alias or alias[0].isdigit():
+        alias = f"e_{alias}"
+    return alias
+
+
+def _text(value: Any) -> str:
+    """Quoted-argument-safe text: double quotes become single quotes, newlines spaces."""
+    return " ".join(str(value or "").split("\n")).replace('"', "'").strip()
+
+
+def _type_key(value: Any) -> str:
+    return re.sub(r"[^a-z]", "", str(value or "").lower())
+
+
+class _Renderer:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.aliases: Dict[str, str] = {}   # normalized name -> alias
+
+    def declare(self, name: str) -> str:
+        alias = base = _alias(name)
+        n = 2
+        while alias in self.aliases.values():
+            alias = f"{base}_{n}"
+            n += 1
+        self.aliases[name.strip().lower()] = alias
+        return alias
+
+    def resolve(self, name: Any) -> Optional[str]:
+        key = str(name or "").strip().lower()
+        if key in self.aliases:
+            return self.aliases[key]
+        alias = _alias(key)
+        return alias if alias in self.aliases.values() else None
+
+    def element(self, element: Dict[str, Any], indent: str = "") -> None:
+        macro, with_technology = _MACRO_BY_TYPE.get(_type_key(element.get("type")), ("System_Ext", False))
+        name = str(element["name"])
+        alias = self.declare(name)
+        args = [alias, f'"{_text(name)}"']
+        if with_technology:
+            args.append(f'"{_text(element.get("technology"))}"')
+        args.append(f'"{_text(element.get("description"))}"')
+        self.lines.append(f"{indent}{macro}({', '.join(args)})")
+
+    def relationship(self, rel: Dict[str, Any]) -> None:
+        source, destination = self.resolve(rel.get("source")), self.resolve(rel.get("destination"))
+        if source is None or destination is None:
+            self.lines.append(f"' skipped relationship with unknown endpoint: {_text(rel.get('source'))} -> {_text(rel.get('destination'))}")
+            return
+        args = [source, destination, f'"{_text(rel.get("description"))}"']
+        if rel.get("technology"):
+            args.append(f'"{_text(rel["technology"])}"')
+        self.lines.append(f"Rel({', '.join(args)})")
+
+
+def _parse(yaml_text: str) -> Dict[str, Any]:
+    data = load_c4_yaml(yaml_text)
+    level = str(data.get("level", "")).strip().lower()
+    if level not in _INCLUDE_BY_LEVEL:
+        raise ValueError(f"unknown C4 level: {data.get('level')!r}")
+    elements = data.get("elements")
+    if not isinstance(elements, list) or not elements:
+        raise ValueError("YAML definition has no elements")
+    for element in elements:
+        if not isinstance(element, dict) or not element.get("name"):
+            raise ValueError(f"element without a name: {element!r}")
+    relationships = data.get("relationships") or []
+    if not isinstance(relationships, list) or not all(isinstance(r, dict) for r in relationships):
+        raise ValueError("relationships must be a list of mappings")
+    return data
+
+
+def render_plantuml(yaml_text: str) -> str:
+    """
+    Renders a C4-PlantUML diagram directly from a level's YAML definition
+    (the structure of CONTEXT/CONTAINER/COMPONENT_YAML_TEMPLATE).
+
+    Elements become `Person`, `System`, `System_Ext`, `Container(Db)` and
+    `Component` macros with snake_case aliases; containers are wrapped in a
+    `System_Boundary` and components in a `Container_Boundary`; relationships
+    become `Rel`. Relationships pointing at unknown elements are kept as
+    comments, so the output always compiles.
+
+    Raises ValueError when the YAML is not a usable C4 definition.
+    """
+    data = _parse(yaml_text)
+    level = str(data["level"]).strip().lower()
+    system = data.get("system") if isinstance(data.get("system"), dict) else {}
+    parent = data.get("parentContainer") if isinstance(data.get("parentContainer"), dict) else {}
+
+    r = _Renderer()
+    r.lines += ["@startuml", _INCLUDE_BY_LEVEL[level], "LAYOUT_WITH_LEGEND()", ""]
+    if data.get("scope"):
+        r.lines += [f"title {_text(data['scope'])}", ""]
+
+    inner_types = _INNER_TYPES.get(level, set())
+    inner = [e for e in data["elements"] if _type_key(e.get("type")) in inner_types]
+    outer = [e for e in data["elements"] if _type_key(e.get("type")) not in inner_types]
+
+    for element in outer:
+        r.element(element)
+
+    if level == "context":
+        if system.get("name") and r.resolve(system["name"]) is None:
+            r.element({"type": "system", "name": system["name"], "description": system.get("description")})
+    else:
+        boundary_name = parent.get("name") if level == "component" else system.get("name")
+        boundary_name = boundary_name or ("Container" if level == "component" else "System")
+        macro = "Container_Boundary" if level == "component" else "System_Boundary"
+        boundary_alias = r.declare(f"{boundary_name} boundary")
+        # Relationships may target the boundary itself (e.g. a user -> the system).
+        r.aliases.setdefault(str(boundary_name).strip().lower(), boundary_alias)
+        r.lines.append(f'{macro}({boundary_alias}, "{_text(boundary_name)}") {{')
+        for element in inner:
+            r.element(element, indent="  ")
+        r.lines.append("}")
+
+    r.lines.append("")
+    for rel in data.get("relationships") or []:
+        r.relationship(rel)
+    r.lines.append("@enduml")
+    return "\n".join(r.lines) + "\n"
@@ -0,0 +1,344 @@
+# src/resilience.py
+from __future__ import annotations
+
+import dataclasses
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from tenacity import AsyncRetrying, RetryCallState, Retrying, retry_if_exception, stop_after_attempt
+
+
+# ======================
+# Per-provider settings
+# ======================
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    """Throttling, retry and circuit-breaker settings shared by every model of one provider."""
+    requests_per_second: Optional[float] = 2.0   # token bucket refill rate; None disables throttling
+    max_bucket_size: float = 4.0                 # burst size
+    max_attempts: int = 5                        # first call + retries
+    initial_delay: float = 1.0                   # backoff: initial_delay * 2**(attempt - 1) ...
+    max_delay: float = 30.0                      # ... capped here, plus up to `jitter` seconds
+    jitter: float = 1.0
+    failure_threshold: int = 5                   # consecutive 5xx/timeout failures that open the circuit
+    reset_timeout: float = 30.0                  # seconds before a half-open trial call is let through
+
+PROVIDER_LIMITS: Dict[str, ProviderLimits] = {
+    "google": ProviderLimits(requests_per_second=2.0, max_bucket_size=4.0),
+    "openai": ProviderLimits(requests_per_second=5.0, max_bucket_size=10.0),
+    "deepseek": ProviderLimits(requests_per_second=2.0, max_bucket_size=4.0),
+    "xai": ProviderLimits(requests_per_second=2.0, max_bucket_size=4.0),
+    "fake": ProviderLimits(requests_per_second=None),  # offline benchmarks measure the pipeline, not a quota
+}
+
+_registry_lock = threading.Lock()
+_rate_limiters: Dict[str, Optional[InMemoryRateLimiter]] = {}
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_model_classes: Dict[Type[BaseChatModel], Type[BaseChatModel]] = {}
+
+
+def provider_limits(provider: str) -> ProviderLimits:
+    return PROVIDER_LIMITS.get(provider) or ProviderLimits()
+
+
+def configure_provider(provider: str, **overrides: Any) -> ProviderLimits:
+    """
+    Overrides `ProviderLimits` fields for a provider, e.g.
+    `configure_provider("google", requests_per_second=0.25, max_attempts=8)`.
+    Resets its rate limiter and circuit breaker; call it before building models.
+    """
+    with _registry_lock:
+        limits = dataclasses.replace(provider_limits(provider), **overrides)
+        PROVIDER_LIMITS[provider] = limits
+        _rate_limiters.pop(provider, None)
+        _breakers.pop(provider, None)
+    return limits
+
+
+def get_rate_limiter(provider: str) -> Optional[InMemoryRateLimiter]:
+    """The provider's token bucket, shared by all its models across threads and async tasks."""
+    with _registry_lock:
+        if provider not in _rate_limiters:
+            limits = provider_limits(provider)
+            _rate_limiters[provider] = InMemoryRateLimiter(
+                requests_per_second=limits.requests_per_second,
+                check_every_n_seconds=min(0.1, 1.0 / limits.requests_per_second),
+                max_bucket_size=limits.max_bucket_size,
+            ) if limits.requests_per_second else None
+        return _rate_limiters[provider]
+
+
+def get_circuit_breaker(provider: str) -> "CircuitBreaker":
+    with _registry_lock:
+        if provider not in _breakers:
+            limits = provider_limits(provider)
+            _breakers[provider] = CircuitBreaker(provider, limits.failure_threshold, limits.reset_timeout)
+        return _breakers[provider]
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-provider circuit state and call/retry/failure/rejection counters for this process."""
+    with _registry_lock:
+        breakers = dict(_breakers)
+    return {provider: breaker.stats() for provider, breaker in breakers.items()}
+
+
+def reset_resilience() -> None:
+    """Drops all rate limiters and circuit breakers (e.g. between benchmark runs)."""
+    with _registry_lock:
+        _rate_limiters.clear()
+        _breakers.clear()
+
+
+# ================
+# Circuit breaker
+# ================
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive server-side failures
+    (5xx, timeouts, connection errors; 429s are left to backoff);
+    open -> half-open after `reset_timeout` seconds, letting a single trial call
+    through; the trial's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.counters = {"calls": 0, "failures": 0, "retries": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "open" or (self.state == "half_open" and self._trial_in_flight):
+                self.counters["rejected"] += 1
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                raise CircuitOpenError(
+                    f"Circuit for provider '{self.name}' is open after repeated failures; retry in {retry_in:.0f}s."
+                )
+            if self.state == "half_open":
+                self._trial_in_flight = True
+            self.counters["calls"] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.counters["failures"] += 1
+            self._consecutive_failures += 1
+            if self.state == "half_open" or self._consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.counters["opened"] += 1
+                    print(f"--- 🔌 Circuit opened for provider '{self.name}' ---")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.counters["retries"] += 1
+
+    def release(self) -> None:
+        """Ends a call whose error says nothing about provider health (e.g. a 400)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, **self.counters}
+
+
+# ==========================
+# Retryable error detection
+# ==========================
+
+_RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+_RETRYABLE_NAMES = {
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "TooManyRequests",
+    "ServerError", "Timeout", "ReadTimeout", "ConnectTimeout", "ConnectError", "RemoteProtocolError",
+}
+_RETRYABLE_MESSAGES = ("429", "rate limit", "resource exhausted", "overloaded", "503", "unavailable")
+
+
+def _error_chain(error: BaseException) -> List[BaseException]:
+    chain: List[BaseException] = []
+    while error is not None and error not in chain and len(chain) < 8:
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    return chain
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for candidate in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(candidate, int) and 100 <= candidate < 600:
+            return candidate
+    return None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    429s, 5xx, timeouts and connection errors, judged by HTTP status where the
+    provider SDK exposes one (OpenAI, Google, httpx), else by exception name or
+    message. Wrapped errors (e.g. ChatGoogleGenerativeAIError) are unwrapped.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    for e in _error_chain(error):
+        status = _status_code(e)
+        if status is not None:
+            return status in _RETRYABLE_STATUS
+        if isinstance(e, (TimeoutError, ConnectionError)) or type(e).__name__ in _RETRYABLE_NAMES:
+            return True
+    message = str(error).lower()
+    return any(marker in message for marker in _RETRYABLE_MESSAGES)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    for e in _error_chain(error):
+        headers = getattr(getattr(e, "response", None), "headers", None) or {}
+        try:
+            value = headers.get("retry-after")
+            if value is not None:
+                return float(value)
+        except (TypeError, ValueError, AttributeError):
+            return None
+    return None
+
+
+# ==================
+# Resilient models
+# ==================
+
+def _wait(limits: ProviderLimits) -> Callable[[RetryCallState], float]:
+    """Exponential backoff with jitter, or the server's Retry-After when it asks for longer."""
+    def wait(retry_state: RetryCallState) -> float:
+        backoff = min(limits.max_delay, limits.initial_delay * 2 ** (retry_state.attempt_number - 1))
+        delay = backoff + random.uniform(0, limits.jitter)
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        retry_after = _retry_after(error) if error else None
+        return min(limits.max_delay, max(delay, retry_after or 0.0))
+    return wait
+
+
+def _retry_kwargs(provider: str, breaker: CircuitBreaker, run_manager: Any, is_async: bool = False) -> Dict[str, Any]:
+    limits = provider_limits(provider)
+
+    def log_retry(retry_state: RetryCallState) -> None:
+        breaker.record_retry()
+        error = retry_state.outcome.exception()
+        # next_action.sleep rather than upcoming_sleep, which only exists from tenacity 8.3.
+        sleep = retry_state.next_action.sleep if retry_state.next_action else 0.0
+        print(f"--- 🔁 {provider} call failed ({type(error).__name__}); "
+              f"retry {retry_state.attempt_number}/{limits.max_attempts - 1} in {sleep:.1f}s ---")
+
+    def before_sleep(retry_state: RetryCallState) -> None:
+        log_retry(retry_state)
+        if run_manager is not None:
+            run_manager.on_retry(retry_state)
+
+    async def abefore_sleep(retry_state: RetryCallState) -> None:
+        log_retry(retry_state)
+        if run_manager is not None:
+            await run_manager.on_retry(retry_state)
+
+    return {
+        "stop": stop_after_attempt(max(1, limits.max_attempts)),
+        "wait": _wait(limits),
+        # Once the circuit has opened, surface the provider's error instead of retrying into it.
+        "retry": retry_if_exception(lambda e: is_retryable_error(e) and breaker.state != "open"),
+        "before_sleep": abefore_sleep if is_async else before_sleep,
+        "reraise": True,
+    }
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    return any(
+        _status_code(e) == 429 or type(e).__name__ in {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+        for e in _error_chain(error)
+    )
+
+
+def _record(breaker: CircuitBreaker, error: BaseException) -> None:
+    # 429s mean "slow down", not "down": backoff handles them without tripping the circuit.
+    if is_retryable_error(error) and not _is_rate_limited(error):
+        breaker.record_failure()
+    else:
+        breaker.release()
+
+
+def resilient_model_class(model_class: Type[BaseChatModel], provider: str) -> Type[BaseChatModel]:
+    """
+    A subclass of `model_class` whose `_generate`/`_agenerate` retry retryable
+    errors with exponential backoff and jitter behind the provider's circuit
+    breaker. Since it is still the provider's own class, `with_structured_output`,
+    `bind_tools`, caching and the `rate_limiter` field all keep working; retries
+    take a fresh token from the rate limiter.
+    """
+    with _registry_lock:
+        if model_class in _model_classes:
+            return _model_classes[model_class]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        breaker = get_circuit_breaker(provider)
+        for attempt in Retrying(**_retry_kwargs(provider, breaker, run_manager)):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1 and self.rate_limiter:
+                    self.rate_limiter.acquire(blocking=True)
+                breaker.before_call()
+                try:
+                    result = model_class._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+                except BaseException as e:
+                    _record(breaker, e)
+                    raise
+                breaker.record_success()
+                return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        breaker = get_circuit_breaker(provider)
+        async for attempt in AsyncRetrying(**_retry_kwargs(provider, breaker, run_manager, is_async=True)):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1 and self.rate_limiter:
+                    await self.rate_limiter.aacquire(blocking=True)
+                breaker.before_call()
+                try:
+                    result = await model_class._agenerate(self, messages, stop=stop, run_manager=run_manager, **kwargs)
+                except BaseException as e:
+                    _record(breaker, e)
+                    raise
+                breaker.record_success()
+                return result
+
+    resilient = type(f"Resilient{model_class.__name__}", (model_class,), {
+        "__module__": __name__,
+        "__doc__": f"{model_class.__name__} with retries and a circuit breaker for provider '{provider}'.",
+        "_generate": _generate,
+        "_agenerate": _agenerate,
+    })
+    with _registry_lock:
+        return _model_classes.setdefault(model_class, resilient)
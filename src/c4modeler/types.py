@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import deque
-from typing import TypedDict, Dict, Sequence
+from typing import Annotated, TypedDict, Dict, Sequence
 from langchain_core.messages import BaseMessage
 
 # Artifacts for a single C4 level/diagram
@@ -17,9 +17,26 @@ class C4Model(TypedDict):
     # Components keyed by container name
     components: Dict[str, LevelOutput]
 
+def merge_c4_model(current: C4Model, update: C4Model) -> C4Model:
+    """
+    Reducer for `State.c4_model`: nodes return only the artifacts they produced
+    (e.g. {"components": {"API": {"diagram": ...}}}) and this merges them level
+    by level. Only dict shells are copied; artifact strings are shared.
+    """
+    merged = dict(current or {})
+    for key in ("context", "containers"):
+        if key in update:
+            merged[key] = {**(merged.get(key) or {}), **(update[key] or {})}
+    if "components" in update:
+        components = dict(merged.get("components") or {})
+        for name, level_output in (update["components"] or {}).items():
+            components[name] = {**(components.get(name) or {}), **(level_output or {})}
+        merged["components"] = components
+    return merged
+
 # Global state carried through your LangGraph app
 class State(TypedDict):
     messages: Sequence[BaseMessage]
     system_brief: str
-    c4_model: C4Model
+    c4_model: Annotated[C4Model, merge_c4_model]
     component_queue: deque[str]
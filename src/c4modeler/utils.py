@@ -1,21 +1,31 @@
 # src/utils.py
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
 
+import atexit
 import glob
+import hashlib
 import json
 import os
 import platform
+import queue
 import re
 import shutil
 import subprocess
+import tempfile
+import threading
+import time
 import uuid
 
 import requests
 import yaml
 
+from .validation import load_c4_yaml
+
 
 # ============
 # Paths & I/O
@@ -58,6 +68,24 @@ def write_text(path: str | Path, content: str) -> bool:
         return False
 
 
+def write_text_atomic(path: str | Path, content: str) -> bool:
+    """
+    Write text via a temp file in the same folder plus `os.replace`, so readers
+    never see a half-written file. Returns True on success.
+    """
+    p = Path(path)
+    tmp = p.with_name(f".{p.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, p)
+        return True
+    except Exception as e:
+        print(f"Failed to write {path}: {e}")
+        tmp.unlink(missing_ok=True)
+        return False
+
+
 def load_yaml(path: str | Path) -> Dict[str, Any] | None:
     """Load YAML file to dict (or None if missing/error)."""
     p = Path(path)
@@ -99,6 +127,34 @@ def save_json(path: str | Path, obj: Dict[str, Any]) -> bool:
 # C4 artifact save/load utils
 # ===========================
 
+_LEVEL_FILE_PREFIXES = {"context": "1_context", "containers": "2_container"}
+_ARTIFACT_SUFFIXES = {"analysis": "analysis.md", "yaml_definition": "definition.yaml", "diagram": "diagram.puml"}
+
+
+def _c4_artifact_files(c4_model: Dict[str, Any], only_present: bool = False):
+    """Yields (relative path, content) for the artifacts of a (partial) C4 model."""
+    for level, prefix in _LEVEL_FILE_PREFIXES.items():
+        data = c4_model.get(level) or {}
+        if data:
+            for field, suffix in _ARTIFACT_SUFFIXES.items():
+                if not only_present or field in data:
+                    yield f"{prefix}_{suffix}", data.get(field) or ""
+
+    for container_name, component_data in (c4_model.get("components") or {}).items():
+        safe = sanitize_filename(container_name)
+        for field, suffix in _ARTIFACT_SUFFIXES.items():
+            if not only_present or field in (component_data or {}):
+                yield f"3_components/{safe}_{suffix}", (component_data or {}).get(field) or ""
+
+
+def _save_artifact(out: Path, relpath: str, content: str) -> None:
+    full = out / relpath
+    if write_text_atomic(full, content):
+        print(f"  - Saved {full.name}")
+    else:
+        print(f"  - Failed to save {full.name}")
+
+
 def save_c4_artifacts(output_dir: str | Path, final_c4_model: Dict[str, Any]) -> None:
     """
     Save C4 model artifacts (analysis, YAML, PlantUML) into a folder structure.
@@ -117,43 +173,19 @@ def save_c4_artifacts(output_dir: str | Path, final_c4_model: Dict[str, Any]) ->
           <container>_diagram.puml
     """
     out = ensure_dir(output_dir)
+    for relpath, content in _c4_artifact_files(final_c4_model):
+        _save_artifact(out, relpath, content)
 
-    def _save(relpath: str, content: str) -> None:
-        if content is None:
-            content = ""
-        full = out / relpath
-        ok = write_text(full, content)
-        if ok:
-            print(f"  - Saved {full.name}")
-        else:
-            print(f"  - Failed to save {full.name}")
-
-    # L1 Context
-    ctx = final_c4_model.get("context") or {}
-    if ctx:
-        _save("1_context_analysis.md", ctx.get("analysis", ""))
-        _save("1_context_definition.yaml", ctx.get("yaml_definition", ""))
-        _save("1_context_diagram.puml", ctx.get("diagram", ""))
-
-    # L2 Containers
-    cont = final_c4_model.get("containers") or {}
-    if cont:
-        _save("2_container_analysis.md", cont.get("analysis", ""))
-        _save("2_container_definition.yaml", cont.get("yaml_definition", ""))
-        _save("2_container_diagram.puml", cont.get("diagram", ""))
-
-    # L3 Components
-    comps = final_c4_model.get("components") or {}
-    if comps:
-        comp_dir = ensure_dir(out / "3_components")
-        for container_name, component_data in comps.items():
-            safe = sanitize_filename(container_name)
-            _save(comp_dir.joinpath(f"{safe}_analysis.md").relative_to(out).as_posix(),
-                  (component_data or {}).get("analysis", ""))
-            _save(comp_dir.joinpath(f"{safe}_definition.yaml").relative_to(out).as_posix(),
-                  (component_data or {}).get("yaml_definition", ""))
-            _save(comp_dir.joinpath(f"{safe}_diagram.puml").relative_to(out).as_posix(),
-                  (component_data or {}).get("diagram", ""))
+
+def save_c4_artifact_updates(output_dir: str | Path, c4_model_update: Dict[str, Any]) -> None:
+    """
+    Save only the artifacts carried by a node's `c4_model` delta (same layout as
+    `save_c4_artifacts`), e.g. from `app.stream(..., stream_mode="updates")`.
+    Files the delta does not mention are left untouched.
+    """
+    out = ensure_dir(output_dir)
+    for relpath, content in _c4_artifact_files(c4_model_update, only_present=True):
+        _save_artifact(out, relpath, content)
 
 
 def load_c4_model_from_artifacts(artifacts_dir: str | Path) -> Dict[str, Any]:
@@ -188,8 +220,12 @@ def load_c4_model_from_artifacts(artifacts_dir: str | Path) -> Dict[str, Any]:
 
             try:
                 comp_yaml = load_yaml(ypath_p) or {}
-                if isinstance(comp_yaml, dict) and "container" in comp_yaml:
-                    original_name = comp_yaml["container"]
+                if isinstance(comp_yaml, dict):
+                    parent = comp_yaml.get("parentContainer")
+                    name = parent.get("name") if isinstance(parent, dict) else comp_yaml.get("container")
+                    # The file name is authoritative; only trust the YAML name when it agrees with it.
+                    if name and sanitize_filename(str(name)) == safe_name:
+                        original_name = name
             except Exception as e:
                 print(f"Could not parse container name from {ypath_p}: {e}")
 
@@ -204,6 +240,37 @@ def load_c4_model_from_artifacts(artifacts_dir: str | Path) -> Dict[str, Any]:
     return model
 
 
+def missing_c4_artifacts(c4_model: Dict[str, Any]) -> List[str]:
+    """
+    List the artifacts a C4 model still lacks, e.g.
+    ["containers.diagram", "components[API Gateway].analysis"].
+
+    Every container named in the L2 YAML needs an L3 entry; blank text counts as missing.
+    An empty list means the model is complete.
+    """
+    missing: List[str] = []
+    fields = ("analysis", "yaml_definition", "diagram")
+
+    for level in ("context", "containers"):
+        data = c4_model.get(level) or {}
+        missing.extend(f"{level}.{f}" for f in fields if not (data.get(f) or "").strip())
+    if missing:
+        return missing
+
+    try:
+        data = load_c4_yaml(c4_model["containers"]["yaml_definition"])
+        names = [e["name"] for e in data.get("elements", []) if e.get("type") == "container"]
+    except Exception as e:
+        return [f"containers.yaml_definition (unparseable: {e})"]
+
+    components = c4_model.get("components") or {}
+    by_safe_name = {sanitize_filename(str(n)): d for n, d in components.items()}
+    for name in names:
+        comp = components.get(name) or by_safe_name.get(sanitize_filename(name)) or {}
+        missing.extend(f"components[{name}].{f}" for f in fields if not (comp.get(f) or "").strip())
+    return missing
+
+
 def save_all_evaluation_reports(
     all_reports: Dict[str, Dict[str, Any]],
     output_filename: str = "all_evaluation_summary.json",
@@ -251,26 +318,34 @@ def setup_plantuml() -> bool:
     return True
 
 
-def compile_plantuml_java(puml_src: str, jar_path: str | Path, out_format: str = "svg") -> Tuple[bool, str, Optional[Path]]:
+def compile_plantuml_java(
+    puml_src: str,
+    jar_path: str | Path,
+    out_format: str = "svg",
+    check_only: bool = False,
+) -> Tuple[bool, str, Optional[Path]]:
     """
     Compile PlantUML source using `java -jar <jar_path> -failfast2 -t<fmt>`.
     Returns (ok, log, output_file_path or None).
     Uses a temp .puml in CWD; deletes temp artifacts after run.
+    `check_only=True` runs `-checkonly` instead: syntax check, no layout or
+    rendering, and no output file.
     """
     jar_path = str(Path(jar_path).resolve())
     tmp_stem = f"temp_diagram_{uuid.uuid4().hex}"
     tmp_puml = Path(f"{tmp_stem}.puml")
     out_path = Path(f"{tmp_stem}.{out_format}")
+    mode = "-checkonly" if check_only else f"-t{out_format}"
 
     try:
         tmp_puml.write_text(puml_src, encoding="utf-8")
         proc = subprocess.run(
-            ["java", "-jar", jar_path, "-failfast2", f"-t{out_format}", str(tmp_puml)],
+            ["java", "-jar", jar_path, "-failfast2", mode, str(tmp_puml)],
             capture_output=True,
             text=True,
             check=False,
         )
-        ok = proc.returncode == 0 and out_path.exists()
+        ok = proc.returncode == 0 and (check_only or out_path.exists())
         log = (proc.stdout or "") + (proc.stderr or "")
         return ok, log, (out_path if out_path.exists() else None)
     finally:
@@ -285,6 +360,474 @@ def compile_plantuml_java(puml_src: str, jar_path: str | Path, out_format: str =
             pass
 
 
+_TEXT_FORMATS = {"svg", "txt", "utxt", "eps", "latex"}
+_PLANTUML_ERROR_RE = re.compile(r"^Error line \d+ in file: (.+?)\s*$")
+
+_jar_versions: Dict[Tuple[str, int, int], str] = {}
+
+def plantuml_jar_version(jar_path: str | Path) -> str:
+    """Short SHA-256 of the jar's bytes (memoized per path/size/mtime); "missing" if there is no jar."""
+    path = Path(jar_path).resolve()
+    try:
+        st = path.stat()
+    except OSError:
+        return "missing"
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    if key not in _jar_versions:
+        digest = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _jar_versions[key] = digest.hexdigest()[:16]
+    return _jar_versions[key]
+
+
+def compile_plantuml_batch(
+    diagrams: List[Dict[str, str]],
+    jar_path: str | Path,
+    out_format: str = "svg",
+    cache: Optional[Any] = None,
+    keep_output: bool = False,
+    check_only: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Compile many PlantUML sources in a single `java -jar <jar_path>` run.
+    `diagrams` is a list of {"source": label, "code": puml}; returns, in the same
+    order, {"source": label, "ok": bool, "log": str}.
+
+    Each diagram gets its own temp directory so its output is found whatever
+    name its `@startuml` line gives it; a diagram fails when PlantUML reports an
+    error for its file or produces no output. Unlike `compile_plantuml_java`
+    there is no `-failfast2`, which would stop the whole batch at the first error.
+    While a `PlantUMLDaemon` is running (`start_plantuml_daemon`) the diagrams
+    go to its warm JVMs instead.
+
+    With `cache` (a `cache.PlantUMLCompileCache`) diagrams whose source, jar
+    version and format were compiled before are answered from disk (marked
+    "cached": True) and only the rest are compiled. `keep_output=True` (or a
+    cache with `store_output`) adds the rendered text ("output") for text formats
+    such as svg. Failures of the runner itself (no Java, crashed or hung JVM) are
+    marked "transient" and never cached.
+
+    `check_only=True` asks PlantUML for a syntax check (`-checkonly`) instead of
+    layout + rendering; it is ignored when output is wanted (`keep_output`) and
+    while the daemon runs, whose warm workers always render (results are then
+    cached as renders).
+    """
+    keep_output = keep_output or bool(getattr(cache, "store_output", False))
+    daemon = get_plantuml_daemon()
+    if daemon is not None and daemon.out_format != out_format:
+        daemon = None
+    check_only = check_only and not keep_output and daemon is None
+    if cache is None:
+        return _compile_plantuml_uncached(diagrams, jar_path, out_format, keep_output, check_only, daemon)
+
+    version = plantuml_jar_version(jar_path)
+    cache_format = "check" if check_only else out_format
+    results: List[Optional[Dict[str, Any]]] = []
+    for d in diagrams:
+        hit = cache.lookup(d["code"] or "", version, cache_format)
+        if hit is not None and keep_output and hit.get("output") is None:
+            hit = None  # stored without output; recompile to get it
+        results.append({"source": d["source"], **hit, "cached": True} if hit is not None else None)
+
+    misses = [i for i, r in enumerate(results) if r is None]
+    compiled = _compile_plantuml_uncached(
+        [diagrams[i] for i in misses], jar_path, out_format, keep_output, check_only, daemon,
+    )
+    for i, result in zip(misses, compiled):
+        results[i] = result
+        if not result.get("transient"):
+            cache.update(diagrams[i]["code"] or "", version, cache_format, result)
+    return results  # type: ignore[return-value]
+
+
+def _compile_plantuml_uncached(
+    diagrams: List[Dict[str, str]],
+    jar_path: str | Path,
+    out_format: str,
+    keep_output: bool,
+    check_only: bool = False,
+    daemon: Optional[PlantUMLDaemon] = None,
+) -> List[Dict[str, Any]]:
+    if daemon is not None:
+        return daemon.compile_many(diagrams, keep_output=keep_output)
+
+    results = [{"source": d["source"], "ok": False, "log": ""} for d in diagrams]
+    todo = list(range(len(diagrams)))
+    if check_only:
+        # -checkonly writes nothing, so a source without a diagram block is caught here.
+        for i, d in enumerate(diagrams):
+            results[i]["log"] = _block_problem(d["code"] or "") or ""
+        todo = [i for i in todo if not results[i]["log"]]
+    if not todo:
+        return results
+
+    with tempfile.TemporaryDirectory(prefix="c4-puml-") as tmp:
+        files: Dict[int, Path] = {}
+        for i in todo:
+            fp = Path(tmp) / f"{i:04d}" / f"diagram_{i:04d}.puml"
+            fp.parent.mkdir()
+            fp.write_text(diagrams[i]["code"] or "", encoding="utf-8")
+            files[i] = fp
+
+        try:
+            proc = subprocess.run(
+                ["java", "-jar", str(Path(jar_path).resolve()), "-charset", "UTF-8", "-nbthread", "auto",
+                 "-checkonly" if check_only else f"-t{out_format}", *map(str, files.values())],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError as e:
+            for i in todo:
+                results[i].update(log=f"Could not start PlantUML: {e}", transient=True)
+            return results
+        log = (proc.stdout or "") + (proc.stderr or "")
+
+        # "Error line N in file: <path>" starts the error block of that file.
+        index_by_name = {fp.name: i for i, fp in files.items()}
+        errors: Dict[int, List[str]] = {}
+        current: Optional[int] = None
+        for line in log.splitlines():
+            match = _PLANTUML_ERROR_RE.match(line.strip())
+            if match:
+                current = index_by_name.get(Path(match.group(1)).name)
+                if current is not None:
+                    errors.setdefault(current, [])
+            if current is not None:
+                errors[current].append(line)
+
+        if check_only and proc.returncode != 0 and not errors:
+            # The check failed without saying where (some jars only set the exit code):
+            # render these diagrams once to attribute the errors.
+            rendered = _compile_plantuml_uncached([diagrams[i] for i in todo], jar_path, out_format, False)
+            for i, r in zip(todo, rendered):
+                results[i] = r
+            return results
+
+        for i, fp in files.items():
+            r = results[i]
+            outputs = [] if check_only else list(fp.parent.glob(f"*.{out_format}"))
+            if i in errors:
+                r["log"] = "\n".join(errors[i]).replace(str(fp), r["source"])
+            elif not check_only and not outputs:
+                r["log"] = _block_problem(diagrams[i]["code"] or "") or "PlantUML produced no output for this diagram."
+            elif proc.returncode != 0 and not errors:
+                # Failed run without per-file errors (e.g. the JVM crashed): nothing can be trusted.
+                r.update(log=log, transient=True)
+            else:
+                r["ok"] = True
+            if keep_output and outputs and out_format in _TEXT_FORMATS:
+                r["output"] = outputs[0].read_text(encoding="utf-8", errors="replace")
+    return results
+
+
+# ================
+# PlantUML daemon
+# ================
+
+_PIPE_DELIMITER = "___C4MODELER_END_OF_DIAGRAM___"
+_PIPE_PROBE = "@startuml\nAlice -> Bob : ping\n@enduml\n"
+_START_TAG_RE = re.compile(r"^\s*@start\w+", re.MULTILINE)
+_END_TAG_RE = re.compile(r"^\s*@end\w+", re.MULTILINE)
+
+
+def _block_problem(code: str) -> Optional[str]:
+    """Why PlantUML would produce nothing for `code` (no diagram block), or None."""
+    if not _START_TAG_RE.search(code):
+        return "PlantUML produced no output for this diagram (no @startuml block)."
+    if not _END_TAG_RE.search(code):
+        return "PlantUML produced no output for this diagram (@startuml without @enduml)."
+    return None
+
+
+class PlantUMLWorkerError(RuntimeError):
+    """A pipe worker died, timed out or returned something unparseable; it gets restarted."""
+
+
+class _PlantUMLTimeout(PlantUMLWorkerError):
+    """The diagram took longer than the timeout; it is not retried (it would most likely hang again)."""
+
+
+class _PlantUMLWorker:
+    """One `java -jar plantuml.jar -pipe` process; diagrams in on stdin, images + delimiter out on stdout."""
+
+    def __init__(self, jar_path: str | Path, out_format: str, java_args: Sequence[str]) -> None:
+        self.proc = subprocess.Popen(
+            ["java", *java_args, "-jar", str(Path(jar_path).resolve()), "-pipe", "-pipeNoStderr",
+             "-charset", "UTF-8", f"-t{out_format}", "-pipedelimitor", _PIPE_DELIMITER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.stderr: Deque[str] = deque(maxlen=50)
+        self.last_ok = 0.0
+        threading.Thread(target=self._pump_stdout, daemon=True, name="plantuml-stdout").start()
+        threading.Thread(target=self._pump_stderr, daemon=True, name="plantuml-stderr").start()
+
+    def _pump_stdout(self) -> None:
+        for line in self.proc.stdout:
+            self.lines.put(line.rstrip("\r\n"))
+        self.lines.put(None)  # EOF: the process is gone
+
+    def _pump_stderr(self) -> None:
+        for line in self.proc.stderr:
+            self.stderr.append(line.rstrip())
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def render(self, code: str, timeout: float) -> Tuple[bool, str, str]:
+        """(ok, error log, image text) for one source; raises PlantUMLWorkerError when the worker is unusable."""
+        blocks = len(_START_TAG_RE.findall(code))
+        try:
+            self.proc.stdin.write(code.rstrip("\n") + "\n")
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise PlantUMLWorkerError(f"PlantUML worker stdin closed: {e}") from e
+
+        deadline = time.monotonic() + timeout
+        ok, errors, image = True, [], []
+        for _ in range(blocks):
+            # With -pipeNoStderr a failing diagram starts with "ERROR", its line number and the messages.
+            in_error = None
+            while True:
+                try:
+                    line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise _PlantUMLTimeout(f"PlantUML worker timed out after {timeout}s") from None
+                if line is None:
+                    raise PlantUMLWorkerError("PlantUML worker exited: " + " | ".join(self.stderr))
+                if line == _PIPE_DELIMITER:
+                    break
+                if in_error is None:
+                    in_error = line.strip() == "ERROR"
+                    if in_error:
+                        ok = False
+                        continue
+                if in_error and line.lstrip().startswith("<"):
+                    in_error = False  # the error image follows the messages
+                if in_error:
+                    errors.append(line)
+                else:
+                    image.append(line)
+        if ok:
+            self.last_ok = time.monotonic()
+        if errors and errors[0].strip().isdigit():
+            errors = [f"Error line {errors[0].strip()}: {errors[1] if len(errors) > 1 else ''}".rstrip(), *errors[2:]]
+        return ok, "\n".join(errors), "\n".join(image)
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class PlantUMLDaemon:
+    """
+    A pool of long-lived `plantuml.jar -pipe` JVMs. Diagrams are streamed over
+    stdin/stdout, so after warm-up each compile runs at JIT-warmed speed instead
+    of paying JVM start-up.
+
+    Workers are started (and probed with a tiny diagram) up front. A worker
+    that dies, times out or desynchronizes is restarted and the diagram retried
+    once; a worker idle for more than `health_interval` seconds is probed
+    before reuse. `stats()` reports compiles, failures, restarts and checks.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 2,
+        jar_path: str | Path = PLANTUML_JAR_PATH,
+        out_format: str = "svg",
+        timeout: float = 60.0,
+        health_interval: float = 300.0,
+        java_args: Sequence[str] = ("-Djava.awt.headless=true",),
+    ) -> None:
+        self.pool_size = max(1, pool_size)
+        self.jar_path = jar_path
+        self.out_format = out_format
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.java_args = tuple(java_args)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._counters = {"compiled": 0, "failed": 0, "restarts": 0, "health_checks": 0, "worker_errors": 0}
+        self._idle: "queue.Queue[_PlantUMLWorker]" = queue.Queue()
+        self._all: List[_PlantUMLWorker] = []
+        try:
+            for _ in range(self.pool_size):
+                self._idle.put(self._spawn(probe=True))
+        except Exception:
+            self.close()
+            raise
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[key] += n
+
+    def _spawn(self, probe: bool) -> _PlantUMLWorker:
+        worker = _PlantUMLWorker(self.jar_path, self.out_format, self.java_args)
+        with self._lock:
+            self._all.append(worker)
+        if probe:
+            self._count("health_checks")
+            try:
+                worker.render(_PIPE_PROBE, self.timeout)  # start-up failures surface here
+            except PlantUMLWorkerError:
+                worker.proc.kill()
+                worker.close()
+                raise
+        return worker
+
+    def _restart(self, worker: _PlantUMLWorker) -> _PlantUMLWorker:
+        self._count("restarts")
+        worker.proc.kill()
+        worker.close()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        return self._spawn(probe=False)
+
+    def _healthy(self, worker: _PlantUMLWorker) -> bool:
+        if not worker.alive():
+            return False
+        if time.monotonic() - worker.last_ok < self.health_interval:
+            return True
+        self._count("health_checks")
+        try:
+            return worker.render(_PIPE_PROBE, self.timeout)[0]
+        except PlantUMLWorkerError:
+            return False
+
+    def compile(self, code: str, keep_output: bool = False) -> Dict[str, Any]:
+        """{"ok", "log"} for one PlantUML source (+ "output" with `keep_output`, "transient" for runner failures)."""
+        if self._closed:
+            raise RuntimeError("PlantUML daemon is stopped")
+        problem = _block_problem(code)
+        if problem:
+            self._count("failed")
+            return {"ok": False, "log": problem}
+
+        worker = self._idle.get()
+        try:
+            for attempt in (1, 2):
+                try:
+                    if not self._healthy(worker):
+                        worker = self._restart(worker)
+                    ok, log, image = worker.render(code, self.timeout)
+                    self._count("compiled" if ok else "failed")
+                    result: Dict[str, Any] = {"ok": ok, "log": log}
+                    if keep_output and self.out_format in _TEXT_FORMATS:
+                        result["output"] = image
+                    return result
+                except PlantUMLWorkerError as e:
+                    self._count("worker_errors")
+                    worker = self._restart(worker)
+                    if attempt == 2 or isinstance(e, _PlantUMLTimeout):
+                        self._count("failed")
+                        return {"ok": False, "log": str(e), "transient": True}
+            raise AssertionError("unreachable")
+        except OSError as e:  # java could not be (re)started
+            self._count("failed")
+            return {"ok": False, "log": f"Could not start PlantUML: {e}", "transient": True}
+        finally:
+            self._idle.put(worker)
+
+    def compile_many(self, diagrams: List[Dict[str, str]], keep_output: bool = False) -> List[Dict[str, Any]]:
+        """`compile_plantuml_batch`-shaped results, spread over the pool's workers."""
+        with ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="plantuml") as pool:
+            outcomes = list(pool.map(lambda d: self.compile(d["code"] or "", keep_output), diagrams))
+        return [{"source": d["source"], **outcome} for d, outcome in zip(diagrams, outcomes)]
+
+    def health_check(self) -> Dict[str, int]:
+        """Probes every idle worker now and restarts the unhealthy ones."""
+        checked = restarted = 0
+        workers: List[_PlantUMLWorker] = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            worker.last_ok = 0.0  # force a probe
+            checked += 1
+            if not self._healthy(worker):
+                worker = self._restart(worker)
+                restarted += 1
+            self._idle.put(worker)
+        return {"checked": checked, "restarted": restarted}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            alive = sum(w.alive() for w in self._all)
+        return {"pool_size": self.pool_size, "alive": alive, **counters}
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers, self._all = list(self._all), []
+        for worker in workers:
+            worker.close()
+
+
+_daemon_lock = threading.Lock()
+_daemon: Optional[PlantUMLDaemon] = None
+
+
+def start_plantuml_daemon(pool_size: int = 2, **kwargs: Any) -> Optional[PlantUMLDaemon]:
+    """
+    Starts (or restarts with new settings) the process-wide PlantUML daemon used by
+    `compile_plantuml_batch` and hence the evaluation; see `PlantUMLDaemon` for
+    the options. Returns None when the jar is not available or Java fails to start.
+    """
+    global _daemon
+    jar_path = Path(kwargs.get("jar_path", PLANTUML_JAR_PATH))
+    if jar_path == PLANTUML_JAR_PATH and not setup_plantuml():
+        return None
+    if not jar_path.exists():
+        print(f"❌ PlantUML jar not found: {jar_path}")
+        return None
+    stop_plantuml_daemon()
+    try:
+        daemon = PlantUMLDaemon(pool_size=pool_size, **kwargs)
+    except (OSError, PlantUMLWorkerError) as e:
+        print(f"❌ Could not start the PlantUML daemon: {e}")
+        return None
+    with _daemon_lock:
+        _daemon = daemon
+    print(f"✅ PlantUML daemon running with {daemon.pool_size} worker(s).")
+    return daemon
+
+
+def get_plantuml_daemon() -> Optional[PlantUMLDaemon]:
+    with _daemon_lock:
+        return _daemon
+
+
+def stop_plantuml_daemon() -> None:
+    global _daemon
+    with _daemon_lock:
+        daemon, _daemon = _daemon, None
+    if daemon is not None:
+        daemon.close()
+
+atexit.register(stop_plantuml_daemon)
+
+
 # ======================
 # Packaging convenience
 # ======================
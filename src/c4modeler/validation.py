@@ -0,0 +1,157 @@
+# src/validation.py
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .prompts import CONTEXT_YAML_TEMPLATE, CONTAINER_YAML_TEMPLATE, COMPONENT_YAML_TEMPLATE
+
+
+# ==========================
+# Local cleanup of LLM YAML
+# ==========================
+
+_FENCE_LINE_RE = re.compile(r"^\s*(```|~~~)[\w-]*\s*$")
+# A document starts at the template's `# C4 Model` header or at a top-level (column-0) mapping key.
+_YAML_START_RE = re.compile(r"^(#\s*C4 Model|[A-Za-z_][\w-]*\s*:(\s|$))", re.IGNORECASE)
+
+def _fenced_block(lines: List[str]) -> List[str]:
+    """The lines of the first fenced block, or all lines when there is no fence."""
+    fences = [i for i, line in enumerate(lines) if _FENCE_LINE_RE.match(line)]
+    if not fences:
+        return lines
+    if len(fences) > 1:
+        return lines[fences[0] + 1:fences[1]]
+    # A single fence either opens a truncated block or closes an unfenced document.
+    after = lines[fences[0] + 1:]
+    return after if any(_YAML_START_RE.match(line) for line in after) else lines[:fences[0]]
+
+def clean_yaml_text(text: Optional[str]) -> str:
+    """
+    Strips the usual LLM artifacts around a YAML answer: commentary around a
+    markdown fence (the first fenced block is the document), commentary before
+    an unfenced document (it starts at the first top-level key or the
+    template's `# C4 Model` header), BOMs, tabs used for indentation, and
+    `---` / `...` document markers.
+    """
+    lines = _fenced_block((text or "").replace("\ufeff", "").replace("\r\n", "\n").split("\n"))
+
+    start = next((i for i, line in enumerate(lines) if _YAML_START_RE.match(line)), None)
+    if start is not None:
+        lines = lines[start:]
+
+    kept: List[str] = []
+    for line in lines:
+        if line.strip() in ("---", "..."):
+            continue
+        indent = len(line) - len(line.lstrip(" \t"))
+        kept.append(line[:indent].replace("\t", "  ") + line[indent:])
+    return "\n".join(kept).strip() + "\n"
+
+
+def _load_mapping(text: str) -> Dict[str, Any]:
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"YAML syntax error: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a YAML mapping at the top level, got {type(data).__name__}")
+    return data
+
+
+def load_c4_yaml(text: Optional[str]) -> Dict[str, Any]:
+    """`yaml.safe_load` after `clean_yaml_text`; raises ValueError when it is not a YAML mapping."""
+    return _load_mapping(clean_yaml_text(text))
+
+
+# ===================================
+# Schemas derived from the templates
+# ===================================
+
+# Descriptive fields an otherwise valid definition may omit.
+_OPTIONAL_KEYS = {"scope", "description", "technology"}
+
+def _schema_from_template(template: str) -> Dict[str, Any]:
+    data = yaml.safe_load(template)
+    required = lambda keys: sorted(set(keys) - _OPTIONAL_KEYS)
+    return {
+        "level": data["level"],
+        "keys": required(data.keys()),
+        "nested": {k: required(v.keys()) for k, v in data.items() if isinstance(v, dict)},
+        "element_keys": required(set.intersection(*(set(e) for e in data["elements"]))),
+        "relationship_keys": required(set.intersection(*(set(r) for r in data["relationships"]))),
+    }
+
+C4_YAML_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "context": _schema_from_template(CONTEXT_YAML_TEMPLATE),
+    "container": _schema_from_template(CONTAINER_YAML_TEMPLATE),
+    "component": _schema_from_template(COMPONENT_YAML_TEMPLATE),
+}
+
+
+def validate_c4_yaml(data: Dict[str, Any], level: str) -> List[str]:
+    """Checks a parsed definition against the schema of its level's template; returns the errors found."""
+    schema = C4_YAML_SCHEMAS[level]
+    errors: List[str] = []
+
+    if str(data.get("level", "")).strip().lower() != schema["level"]:
+        errors.append(f"`level` must be `{schema['level']}` (got {data.get('level')!r})")
+    for key in schema["keys"]:
+        # An empty `relationships: []` is valid; every other required key needs a value.
+        if key not in data or (data[key] in (None, "", [], {}) and key != "relationships"):
+            errors.append(f"missing top-level key `{key}`")
+    for key, nested_keys in schema["nested"].items():
+        block = data.get(key)
+        if block is not None and not isinstance(block, dict):
+            errors.append(f"`{key}` must be a mapping")
+        elif isinstance(block, dict):
+            errors += [f"`{key}` is missing `{k}`" for k in nested_keys if not block.get(k)]
+
+    elements = data.get("elements")
+    if elements is not None and not isinstance(elements, list):
+        errors.append("`elements` must be a list")
+        elements = []
+    for i, element in enumerate(elements or []):
+        if not isinstance(element, dict):
+            errors.append(f"elements[{i}] must be a mapping")
+            continue
+        errors += [f"elements[{i}] is missing `{k}`" for k in schema["element_keys"] if not element.get(k)]
+    inner = {"container": "container", "component": "component"}.get(level)
+    if inner and elements and not any(isinstance(e, dict) and e.get("type") == inner for e in elements):
+        errors.append(f"no element of type `{inner}`")
+
+    relationships = data.get("relationships") or []
+    if not isinstance(relationships, list):
+        errors.append("`relationships` must be a list")
+        relationships = []
+    for i, rel in enumerate(relationships):
+        if not isinstance(rel, dict):
+            errors.append(f"relationships[{i}] must be a mapping")
+            continue
+        errors += [f"relationships[{i}] is missing `{k}`" for k in schema["relationship_keys"] if not rel.get(k)]
+    return errors
+
+
+def check_c4_yaml(text: Optional[str], level: str) -> Tuple[str, List[str]]:
+    """
+    Local repair + validation: returns (cleaned YAML text, errors).
+    An empty error list means the cleaned text is a valid definition for `level`.
+    """
+    cleaned = clean_yaml_text(text)
+    errors = _errors(cleaned, level)
+    if errors and cleaned.strip() != (text or "").strip():
+        # The cleanup is heuristic: never hand back a text it made worse than the original.
+        original_errors = _errors(text or "", level)
+        if len(original_errors) < len(errors):
+            return text or "", original_errors
+    return cleaned, errors
+
+
+def _errors(text: str, level: str) -> List[str]:
+    try:
+        data = _load_mapping(text)
+    except ValueError as e:
+        return [str(e)]
+    return validate_c4_yaml(data, level)
@@ -0,0 +1,73 @@
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from c4modeler import cache as cache_module
+from c4modeler.cache import PlantUMLCompileCache, SQLiteLLMCache
+
+
+class Clock:
+    """Replaces time.time in c4modeler.cache; every reading advances one second unless set."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+def _answer(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_llm_cache_round_trip(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "llm.sqlite")
+    assert cache.lookup("prompt", "model") is None
+    cache.update("prompt", "model", _answer("hi"))
+    assert cache.lookup("prompt", "model")[0].message.content == "hi"
+    assert cache.lookup("prompt", "other-model") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.3333, "entries": 1}
+
+
+def test_llm_cache_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    cache = SQLiteLLMCache(tmp_path / "llm.sqlite", ttl_seconds=10)
+    cache.update("prompt", "model", _answer("hi"))
+    assert cache.lookup("prompt", "model") is not None
+    clock.now += 60
+    assert cache.lookup("prompt", "model") is None
+    assert cache.stats()["entries"] == 0  # expired entries are dropped
+
+
+def test_llm_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module.time, "time", Clock())
+    cache = SQLiteLLMCache(tmp_path / "llm.sqlite", max_entries=2)
+    cache.update("a", "model", _answer("a"))
+    cache.update("b", "model", _answer("b"))
+    assert cache.lookup("a", "model") is not None  # a is now more recent than b
+    cache.update("c", "model", _answer("c"))
+    assert cache.lookup("b", "model") is None
+    assert cache.lookup("a", "model") is not None and cache.lookup("c", "model") is not None
+
+
+def test_plantuml_cache_keys_on_jar_and_format(tmp_path):
+    cache = PlantUMLCompileCache(tmp_path / "plantuml.sqlite")
+    cache.update("@startuml\n@enduml", "jar-1", "svg", {"ok": True, "log": "", "output": "<svg/>"})
+    assert cache.lookup("@startuml\n@enduml", "jar-1", "svg") == {"ok": True, "log": ""}  # no store_output
+    assert cache.lookup("@startuml\n@enduml", "jar-2", "svg") is None
+    assert cache.lookup("@startuml\n@enduml", "jar-1", "check") is None
+
+
+def test_plantuml_cache_ttl_and_eviction(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    cache = PlantUMLCompileCache(tmp_path / "plantuml.sqlite", store_output=True, ttl_seconds=10, max_entries=2)
+    for code in ("a", "b"):
+        cache.update(code, "jar", "svg", {"ok": True, "log": "", "output": code})
+    assert cache.lookup("a", "jar", "svg")["output"] == "a"
+    cache.update("c", "jar", "svg", {"ok": False, "log": "Syntax Error?"})
+    assert cache.lookup("b", "jar", "svg") is None
+    assert cache.lookup("c", "jar", "svg") == {"ok": False, "log": "Syntax Error?"}
+    clock.now += 60
+    assert cache.lookup("a", "jar", "svg") is None
@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+import yaml
+
+from c4modeler.fake_llm import fake_usage, reset_fake_usage
+from c4modeler.pipeline import generate_c4_for_brief
+
+BRIEF = Path(__file__).resolve().parents[1] / "data" / "briefs" / "online-bookstore.yaml"
+
+
+def test_llm_calls_are_attributed_to_nodes_and_agents(tmp_path):
+    brief = yaml.safe_load(BRIEF.read_text(encoding="utf-8"))
+    reset_fake_usage()
+    _, out_path = generate_c4_for_brief(brief, model_name="fake:instant", analysis_method="collaborative",
+                                        collab_rounds=1, results_dir=tmp_path, collect_metrics=True)
+    usage = fake_usage()
+    metrics = json.loads((out_path / "metrics.json").read_text(encoding="utf-8"))
+    summary, records = metrics["summary"], metrics["records"]
+
+    # Every call counted once at node level, although agents nest inside nodes.
+    assert summary["llm_calls"] == usage["calls"]
+    assert summary["input_tokens"] == usage["input_tokens"]
+    assert summary["output_tokens"] == usage["output_tokens"]
+
+    agents = [r for r in records if r["kind"] == "agent"]
+    nodes = [r for r in records if r["kind"] == "node"]
+    assert agents and nodes
+    assert all("/" in r["path"] for r in agents) and all("/" not in r["path"] for r in nodes)
+    # Agent turns also count towards the node that ran the team.
+    agent_calls = sum(a["llm_calls"] for a in summary["agents"].values())
+    assert 0 < agent_calls <= sum(n["llm_calls"] for n in summary["nodes"].values())
+    assert (out_path / "metrics.csv").read_text(encoding="utf-8").startswith("kind,node,path,")
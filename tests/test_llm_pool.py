@@ -0,0 +1,63 @@
+import asyncio
+from pathlib import Path
+
+import yaml
+
+from c4modeler import llm
+from c4modeler.graph import get_c4_modeler_graph
+from c4modeler.llm import llm_pool_stats, shutdown_llm_pool
+from c4modeler.pipeline import generate_c4_for_brief
+
+BRIEF = Path(__file__).resolve().parents[1] / "data" / "briefs" / "online-bookstore.yaml"
+MODEL = "fake:instant"
+
+
+def test_generate_after_shutdown_rebuilds_graph(tmp_path):
+    brief = yaml.safe_load(BRIEF.read_text(encoding="utf-8"))
+    generate_c4_for_brief(brief, model_name=MODEL, analysis_method="simple", results_dir=tmp_path)
+    before = get_c4_modeler_graph(None, MODEL, analysis_method="simple")
+
+    assert shutdown_llm_pool() >= 1
+    after = get_c4_modeler_graph(None, MODEL, analysis_method="simple")
+    assert after is not before  # the cached app held the closed model
+
+    c4_model, out_path = generate_c4_for_brief(brief, model_name=MODEL, analysis_method="simple", results_dir=tmp_path)
+    assert c4_model["context"]["diagram"]
+    assert llm_pool_stats()["size"] == 1
+    shutdown_llm_pool()
+
+
+def test_sync_shutdown_on_running_loop_tracks_async_closes(capsys):
+    async def ok():
+        pass
+
+    async def broken():
+        raise RuntimeError("close failed")
+
+    async def main():
+        with llm._pool_lock:
+            llm._pool[("test",)] = llm._PoolEntry(None, "test", 0.0, 0.0, [], [ok, broken])
+        errors = llm_pool_stats()["close_errors"]
+        assert shutdown_llm_pool() == 1
+        assert llm_pool_stats()["closing"] == 2
+        await asyncio.gather(*llm._closing, return_exceptions=True)
+        await asyncio.sleep(0)  # let the done-callbacks run
+        stats = llm_pool_stats()
+        assert stats["closing"] == 0
+        assert stats["close_errors"] == errors + 1
+
+    asyncio.run(main())
+    assert "ashutdown_llm_pool" in capsys.readouterr().out
+
+
+def test_model_provider_map_resolves_classes_lazily(monkeypatch):
+    imported = []
+    monkeypatch.setattr(llm, "_import_provider_class", lambda provider: imported.append(provider))
+    assert "gpt-4o" in llm.MODEL_PROVIDER_MAP and list(llm.MODEL_PROVIDER_MAP) == list(llm.MODEL_PROVIDERS)
+    assert imported == []
+    monkeypatch.undo()
+
+    assert "gpt-4o" in llm.MODEL_PROVIDER_MAP and len(llm.MODEL_PROVIDER_MAP) == len(llm.MODEL_PROVIDERS)
+    model_class = llm.MODEL_PROVIDER_MAP["fake:instant"]
+    assert model_class.__name__ == "FakeChatModel"
+    assert llm.PROVIDER_NAME_BY_CLASS[model_class] == "fake"
@@ -0,0 +1,77 @@
+import asyncio
+from pathlib import Path
+
+from c4modeler import pipeline
+from c4modeler.hedging import HedgePolicy
+from c4modeler.pipeline import brief_thread_id
+
+ARGS = ("title: Shop\n", Path("data/results/shop"), "fake:instant", "simple", 1, False)
+
+
+def test_thread_id_covers_graph_options():
+    base = brief_thread_id(*ARGS)
+    variants = [
+        brief_thread_id(*ARGS, diagram_method="render"),
+        brief_thread_id(*ARGS, diagram_method="fused"),
+        brief_thread_id(*ARGS, collab_memory="window", collab_window=2),
+        brief_thread_id(*ARGS, collab_memory="summary"),
+        brief_thread_id(*ARGS, hedge=HedgePolicy()),
+    ]
+    assert len({base, *variants}) == len(variants) + 1
+    assert brief_thread_id(*ARGS, diagram_method="render") == variants[0]  # stable across calls
+
+
+def test_default_options_keep_thread_id():
+    explicit = brief_thread_id(*ARGS, collab_memory="full", collab_window=None, diagram_method="llm", hedge=None)
+    assert explicit == brief_thread_id(*ARGS)
+
+
+def _tracking_ainvoke(monkeypatch, delay=0.02):
+    """Replaces the graph run with a sleep and records the peak number of briefs in flight."""
+    seen = {"now": 0, "peak": 0}
+
+    async def ainvoke(app, state, config, resume, out_path):
+        seen["now"] += 1
+        seen["peak"] = max(seen["peak"], seen["now"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            seen["now"] -= 1
+        return {"c4_model": {"context": {}, "containers": {}, "components": {}}}
+
+    monkeypatch.setattr(pipeline, "_ainvoke", ainvoke)
+    monkeypatch.setattr(pipeline, "save_c4_artifacts", lambda *a, **k: None)
+    return seen
+
+
+def _briefs(prefix, n):
+    return {f"{prefix}{i}": {"title": f"{prefix}{i}"} for i in range(n)}
+
+
+def test_brief_limit_is_shared_and_never_exceeded_after_lowering(monkeypatch, tmp_path):
+    seen = _tracking_ainvoke(monkeypatch)
+    monkeypatch.setattr(pipeline, "_max_briefs_in_flight", 4)
+
+    async def main():
+        run = lambda prefix: pipeline.agenerate_c4_for_briefs(_briefs(prefix, 6), model_name="fake:instant",
+                                                             results_dir=tmp_path)
+        first = asyncio.ensure_future(run("a"))
+        await asyncio.sleep(0.005)
+        assert seen["now"] == 4
+        pipeline.set_max_briefs_in_flight(2)
+        seen["peak"] = seen["now"]
+        second = await run("b")
+        return await first, second
+
+    first, second = asyncio.run(main())
+    assert len(first) == len(second) == 6
+    assert seen["peak"] <= 4  # running briefs kept their slots; no new ones were admitted above the cap
+
+
+def test_batch_max_in_flight_is_scoped_to_the_batch(monkeypatch, tmp_path):
+    seen = _tracking_ainvoke(monkeypatch)
+    monkeypatch.setattr(pipeline, "_max_briefs_in_flight", 8)
+    outputs = asyncio.run(pipeline.agenerate_c4_for_briefs(_briefs("c", 6), model_name="fake:instant",
+                                                            results_dir=tmp_path, max_in_flight=2))
+    assert len(outputs) == 6 and seen["peak"] == 2
+    assert pipeline._max_briefs_in_flight == 8
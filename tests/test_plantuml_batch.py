@@ -0,0 +1,68 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+from c4modeler.utils import compile_plantuml_batch
+
+# Minimal stand-in for `java -jar plantuml.jar`: renders every file that has no BROKEN line,
+# reports the others the way PlantUML does ("Error line N in file: <path>") and exits 1.
+FAKE_JAVA = textwrap.dedent('''\
+    #!{python}
+    import sys
+    from pathlib import Path
+    args = sys.argv[1:]
+    check_only = "-checkonly" in args
+    failed = False
+    for arg in args:
+        if not arg.endswith(".puml"):
+            continue
+        path = Path(arg)
+        lines = path.read_text(encoding="utf-8").splitlines()
+        if not any(line.startswith("@startuml") for line in lines) or "@enduml" not in lines:
+            continue
+        broken = [i for i, line in enumerate(lines, 1) if "BROKEN" in line]
+        if broken:
+            failed = True
+            print(f"Error line {{broken[0]}} in file: {{path}}")
+            print("Some diagram description contains errors")
+        elif not check_only:
+            path.with_suffix(".svg").write_text("<svg/>", encoding="utf-8")
+    sys.exit(1 if failed else 0)
+''')
+
+
+@pytest.fixture
+def fake_java(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    java = bin_dir / "java"
+    java.write_text(FAKE_JAVA.format(python=sys.executable), encoding="utf-8")
+    java.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path / "plantuml.jar"
+
+
+DIAGRAMS = [
+    {"source": "context", "code": "@startuml\nA -> B\n@enduml"},
+    {"source": "container", "code": "@startuml\nBROKEN\n@enduml"},
+    {"source": "component/API", "code": "A -> B"},
+]
+
+
+@pytest.mark.parametrize("check_only", [False, True])
+def test_errors_are_attributed_to_their_diagram(fake_java, check_only):
+    results = compile_plantuml_batch(DIAGRAMS, fake_java, check_only=check_only)
+    assert [r["source"] for r in results] == ["context", "container", "component/API"]
+    assert [r["ok"] for r in results] == [True, False, False]
+    assert results[0]["log"] == ""
+    assert results[1]["log"].startswith("Error line 2 in file: container")  # temp path replaced by the label
+    assert "no @startuml block" in results[2]["log"]
+    assert not any(r.get("transient") for r in results)
+
+
+def test_missing_java_is_transient(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    results = compile_plantuml_batch(DIAGRAMS[:1], tmp_path / "plantuml.jar")
+    assert not results[0]["ok"] and results[0]["transient"]
@@ -0,0 +1,77 @@
+import pytest
+
+from c4modeler.prompts import COMPONENT_YAML_TEMPLATE, CONTAINER_YAML_TEMPLATE, CONTEXT_YAML_TEMPLATE
+from c4modeler.render import render_plantuml
+
+CONTAINER_YAML = """
+level: container
+scope: Container diagram for "Shop"
+system:
+  name: Shop
+elements:
+  - type: person
+    name: Customer
+    description: Buys things
+  - type: container
+    name: Web App
+    technology: React
+    description: Storefront
+  - type: database
+    name: Orders DB
+    technology: PostgreSQL
+    description: Orders
+relationships:
+  - source: Customer
+    destination: Web App
+    description: Uses
+    technology: HTTPS
+  - source: Web App
+    destination: Orders DB
+    description: Reads and writes
+  - source: Web App
+    destination: Payment Gateway
+    description: Charges cards
+"""
+
+
+def test_container_diagram():
+    puml = render_plantuml(CONTAINER_YAML)
+    lines = puml.splitlines()
+    assert lines[0] == "@startuml" and lines[-1] == "@enduml"
+    assert "!include <C4/C4_Container>" in lines
+    assert "title Container diagram for 'Shop'" in lines
+    assert 'Person(customer, "Customer", "Buys things")' in lines
+    assert 'System_Boundary(shop_boundary, "Shop") {' in lines
+    assert '  Container(web_app, "Web App", "React", "Storefront")' in lines
+    assert '  ContainerDb(orders_db, "Orders DB", "PostgreSQL", "Orders")' in lines
+    assert 'Rel(customer, web_app, "Uses", "HTTPS")' in lines
+    assert 'Rel(web_app, orders_db, "Reads and writes")' in lines
+    # Unknown endpoints are kept as a comment so the diagram still compiles.
+    assert "' skipped relationship with unknown endpoint: Web App -> Payment Gateway" in lines
+
+
+def test_duplicate_names_get_distinct_aliases():
+    yaml_text = CONTAINER_YAML.replace("name: Orders DB", "name: Web-App")
+    puml = render_plantuml(yaml_text)
+    assert "Container(web_app," in puml and "ContainerDb(web_app_2," in puml
+
+
+@pytest.mark.parametrize("template, include", [
+    (CONTEXT_YAML_TEMPLATE, "!include <C4/C4_Context>"),
+    (CONTAINER_YAML_TEMPLATE, "!include <C4/C4_Container>"),
+    (COMPONENT_YAML_TEMPLATE, "!include <C4/C4_Component>"),
+])
+def test_renders_every_template(template, include):
+    puml = render_plantuml(template)
+    assert include in puml and puml.rstrip().endswith("@enduml")
+
+
+@pytest.mark.parametrize("yaml_text", [
+    "level: deployment\nelements:\n  - name: x\n",
+    "level: context\nelements: []\n",
+    "level: context\nelements:\n  - type: person\n",
+    "not: [valid",
+])
+def test_rejects_unusable_definitions(yaml_text):
+    with pytest.raises(ValueError):
+        render_plantuml(yaml_text)
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from c4modeler.fake_llm import FakeChatModel, FakeProviderError
+from c4modeler.llm import get_llm
+from c4modeler.resilience import (
+    PROVIDER_LIMITS,
+    CircuitOpenError,
+    configure_provider,
+    get_circuit_breaker,
+    reset_resilience,
+)
+
+RESET_TIMEOUT = 0.05
+
+
+@pytest.fixture(autouse=True)
+def zero_backoff():
+    """fake provider: 3 attempts without waiting, circuit opens after 2 server errors."""
+    saved = PROVIDER_LIMITS.get("fake")
+    configure_provider("fake", max_attempts=3, initial_delay=0.0, max_delay=0.0, jitter=0.0,
+                       failure_threshold=2, reset_timeout=RESET_TIMEOUT)
+    yield
+    PROVIDER_LIMITS["fake"] = saved
+    reset_resilience()
+
+
+def scripted(monkeypatch, statuses):
+    """Makes `fake:flaky` fail with `statuses` in order, then succeed; returns the list of attempts."""
+    attempts = []
+    remaining = iter(statuses)
+
+    def draw(self):
+        attempts.append(1)
+        return 0.0, next(remaining, None)
+
+    monkeypatch.setattr(FakeChatModel, "_draw", draw)
+    return attempts
+
+
+def flaky():
+    return get_llm("fake:flaky", pooled=False)
+
+
+def test_retries_rate_limits_and_server_errors(monkeypatch):
+    attempts = scripted(monkeypatch, [429, 503])
+    assert flaky().invoke("hello").content
+    assert len(attempts) == 3
+    stats = get_circuit_breaker("fake").stats()
+    assert stats["retries"] == 2 and stats["state"] == "closed"
+
+
+def test_async_retries(monkeypatch):
+    attempts = scripted(monkeypatch, [503])
+    assert asyncio.run(flaky().ainvoke("hello")).content
+    assert len(attempts) == 2
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    attempts = scripted(monkeypatch, [429] * 5)
+    with pytest.raises(FakeProviderError):
+        flaky().invoke("hello")
+    assert len(attempts) == 3
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    attempts = scripted(monkeypatch, [400])
+    with pytest.raises(FakeProviderError):
+        flaky().invoke("hello")
+    assert len(attempts) == 1
+    stats = get_circuit_breaker("fake").stats()
+    assert stats["retries"] == 0 and stats["failures"] == 0 and stats["state"] == "closed"
+
+
+def test_rate_limits_do_not_open_the_circuit(monkeypatch):
+    scripted(monkeypatch, [429] * 3)
+    with pytest.raises(FakeProviderError):
+        flaky().invoke("hello")
+    assert get_circuit_breaker("fake").state == "closed"
+
+
+def test_circuit_opens_then_half_open_trial_decides(monkeypatch):
+    llm = flaky()
+    attempts = scripted(monkeypatch, [503, 503])
+    with pytest.raises(FakeProviderError):
+        llm.invoke("hello")  # second failure opens the circuit, so the last attempt is not made
+    assert len(attempts) == 2
+    assert get_circuit_breaker("fake").state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        llm.invoke("hello")
+    assert len(attempts) == 2  # rejected without calling the provider
+
+    time.sleep(RESET_TIMEOUT * 1.5)
+    attempts = scripted(monkeypatch, [503])
+    with pytest.raises(FakeProviderError):
+        llm.invoke("hello")  # the failed half-open trial re-opens the circuit
+    assert len(attempts) == 1 and get_circuit_breaker("fake").state == "open"
+
+    time.sleep(RESET_TIMEOUT * 1.5)
+    attempts = scripted(monkeypatch, [])
+    assert llm.invoke("hello").content
+    assert len(attempts) == 1
+    stats = get_circuit_breaker("fake").stats()
+    assert stats["state"] == "closed" and stats["opened"] == 2 and stats["rejected"] == 1
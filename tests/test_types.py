@@ -0,0 +1,41 @@
+from c4modeler.types import merge_c4_model
+
+
+def _model():
+    return {
+        "context": {"analysis": "ctx", "yaml_definition": "level: context\n"},
+        "containers": {"analysis": "cnt"},
+        "components": {"API": {"analysis": "api"}},
+    }
+
+
+def test_level_fields_are_merged_not_replaced():
+    merged = merge_c4_model(_model(), {"context": {"diagram": "@startuml\n@enduml"}})
+    assert merged["context"] == {"analysis": "ctx", "yaml_definition": "level: context\n", "diagram": "@startuml\n@enduml"}
+    assert merged["containers"] == {"analysis": "cnt"}
+
+
+def test_updated_field_wins():
+    merged = merge_c4_model(_model(), {"containers": {"analysis": "new"}})
+    assert merged["containers"]["analysis"] == "new"
+
+
+def test_components_merge_per_container():
+    merged = merge_c4_model(_model(), {"components": {"API": {"diagram": "d"}, "Worker": {"analysis": "w"}}})
+    assert merged["components"] == {"API": {"analysis": "api", "diagram": "d"}, "Worker": {"analysis": "w"}}
+
+
+def test_current_state_is_not_mutated():
+    current = _model()
+    merge_c4_model(current, {"context": {"diagram": "d"}, "components": {"API": {"diagram": "d"}}})
+    assert current == _model()
+
+
+def test_empty_and_none_updates_keep_state():
+    current = _model()
+    assert merge_c4_model(current, {}) == current
+    assert merge_c4_model(current, {"context": None, "components": None}) == current
+
+
+def test_missing_current_state():
+    assert merge_c4_model(None, {"context": {"analysis": "a"}}) == {"context": {"analysis": "a"}}
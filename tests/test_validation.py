@@ -0,0 +1,54 @@
+from c4modeler.prompts import CONTAINER_YAML_TEMPLATE
+from c4modeler.validation import check_c4_yaml, clean_yaml_text
+
+BODY = CONTAINER_YAML_TEMPLATE.strip().split("\n", 1)[1]  # without the `# C4 Model` header
+
+
+def _reordered(body: str) -> str:
+    """The template with `system:` moved above `level:`."""
+    lines = body.splitlines()
+    i = next(i for i, line in enumerate(lines) if line.startswith("system:"))
+    system = lines[i:i + 2]
+    rest = [line for j, line in enumerate(lines) if j not in (i, i + 1)]
+    return "\n".join(system + rest) + "\n"
+
+
+def test_keeps_keys_before_level():
+    text = _reordered(BODY)
+    assert clean_yaml_text(text).startswith("system:")
+    assert check_c4_yaml(text, "container")[1] == []
+
+
+def test_indented_level_key_is_not_a_start_marker():
+    text = BODY.replace('    name: "[User Role A]"', '    name: "[User Role A]"\n    level: high', 1)
+    assert "level: high" in text
+    cleaned, errors = check_c4_yaml(text, "container")
+    assert errors == []
+    assert cleaned.startswith("level: container")
+
+
+def test_fenced_block_wins_over_commentary():
+    text = f"Sure:\n```yaml\n{_reordered(BODY)}```\nLet me know if you need changes."
+    cleaned, errors = check_c4_yaml(text, "container")
+    assert errors == []
+    assert cleaned.startswith("system:") and "Let me know" not in cleaned
+
+
+def test_commentary_before_unfenced_document():
+    cleaned, errors = check_c4_yaml(f"Here is the YAML you asked for.\n\n{CONTAINER_YAML_TEMPLATE}", "container")
+    assert errors == []
+    assert cleaned.startswith("# C4 Model")
+
+
+def test_closing_fence_only():
+    cleaned, errors = check_c4_yaml(f"{BODY}\n```\nHope this helps!", "container")
+    assert errors == []
+    assert "Hope" not in cleaned
+
+
+def test_never_returns_text_worse_than_the_original():
+    # A block scalar whose lines look like fences: cleaning would cut the document short.
+    text = BODY.replace('scope: "Container diagram for [System Name]"', 'scope: |\n  ```\n  not a fence\n  ```', 1)
+    cleaned, errors = check_c4_yaml(text, "container")
+    assert errors == []
+    assert cleaned == text